@@ -0,0 +1,273 @@
+"""
+ai_insight.py
+Blocked engine for the AI Insight "Similar VOC (Count)" computation.
+
+A title can only count towards a (Model No. + Module) group if its own
+stripped Model No. and Module equal the group's, so comparing a group's
+representative against all n titles (then discarding everything outside the
+group) wastes O(groups × n × d) work on an O(Σ group²)-sized answer.
+
+Engine:
+  1. Factorize rows once — raw (Model No., Module) groups, stripped blocks and
+     lowercased titles — all in first-appearance order.
+  2. Representative per group = most frequent lowercased title (ties → the
+     title seen first), found with one np.unique over (group, title) codes.
+  3. One batched matmul per group: its block's member embeddings against the
+     representative vector.
+  4. Similar titles deduplicated and counted with np.unique, ordered by count
+     (ties keep first-seen order).
+
+Title embeddings are cached by title text (TitleEmbeddingCache, persisted
+next to the artifact) so a refresh after an upload only encodes titles that
+were not seen before.
+
+The computation runs offline (generate_ai_insight.py, right after analytics
+generation) and writes downloads/<source>/ai_insight.json; the RAG server's
+/ai-insight route only serves that artifact.
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# analytics.json rows live in the row store written by server/analytics
+_ANALYTICS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server", "analytics")
+if _ANALYTICS_DIR not in sys.path:
+    sys.path.append(_ANALYTICS_DIR)
+
+import row_store
+
+# ── Config ────────────────────────────────────────────────────────────────────
+
+# Encoder and threshold per AI Insight source (downloads/<source>/analytics.json)
+AI_INSIGHT_SOURCES = {
+    "samsung_members_voc": {"encoder": "all-MiniLM-L6-v2", "threshold": 0.78},
+    "global_voc_plm":      {"encoder": "all-MiniLM-L6-v2", "threshold": 0.70},
+}
+DEFAULT_AI_INSIGHT_SOURCE = "samsung_members_voc"
+
+ARTIFACT_NAME  = "ai_insight.json"
+CACHE_DIR_NAME = "__ai_insight_cache__"
+CACHE_FILE     = "title_embeddings.npz"
+
+# ── Title embedding cache ─────────────────────────────────────────────────────
+
+
+class TitleEmbeddingCache:
+    """
+    title text → normalised embedding, for a single encoder.
+    Only titles missing from the cache are sent to `encode_fn`; after each
+    lookup the cache is pruned to the titles of the current rows so it never
+    outgrows the dataset.
+    """
+
+    def __init__(self, encoder: str):
+        self.encoder = encoder
+        self.vectors: dict = {}
+
+    def load(self, path: str) -> bool:
+        """Load a cache written by save(); ignored if built with another encoder."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data["encoder"]) != self.encoder:
+                    return False
+                self.vectors = dict(zip(data["titles"].tolist(), data["vectors"]))
+            return True
+        except (OSError, KeyError, ValueError):
+            return False
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        titles = list(self.vectors)
+        vectors = (np.stack([self.vectors[t] for t in titles]) if titles
+                   else np.empty((0, 0), dtype="float32"))
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, encoder=np.array(self.encoder), titles=np.array(titles, dtype=str), vectors=vectors)
+        os.replace(tmp, path)
+
+    def embed(self, titles: list, encode_fn) -> tuple:
+        """
+        Returns (matrix, codes, n_encoded): one row per UNIQUE title in
+        first-appearance order, the row of every input title, and how many
+        titles actually had to be encoded.
+        """
+        index: dict = {}
+        codes = np.fromiter(
+            (index.setdefault(t, len(index)) for t in titles), dtype=np.int64, count=len(titles)
+        )
+        unique_titles = list(index)
+
+        missing = [t for t in unique_titles if t not in self.vectors]
+        if missing:
+            new_vecs = np.asarray(encode_fn(missing), dtype="float32")
+            self.vectors.update(zip(missing, new_vecs))
+
+        self.vectors = {t: self.vectors[t] for t in unique_titles}
+        if not unique_titles:
+            return np.empty((0, 0), dtype="float32"), codes, len(missing)
+        matrix = np.stack([self.vectors[t] for t in unique_titles])
+        return matrix, codes, len(missing)
+
+
+def _factorize(values) -> tuple:
+    """Codes in first-appearance order (like pandas.factorize) and the uniques."""
+    index: dict = {}
+    codes = np.fromiter(
+        (index.setdefault(v, len(index)) for v in values), dtype=np.int64, count=len(values)
+    )
+    return codes, list(index)
+
+# ── Engine ────────────────────────────────────────────────────────────────────
+
+
+def compute_similar_voc(rows: list, embeddings: np.ndarray, emb_codes: np.ndarray, threshold: float) -> list:
+    """
+    rows        → dicts with non-empty "Title", "Model No." and "Module"
+    embeddings  → normalised title embeddings, one row per unique title
+    emb_codes   → row index into `embeddings` for every entry of `rows`
+
+    Returns the per-group results sorted by count descending
+    (model, module, voc, count, similar_titles).
+    """
+    n = len(rows)
+    if n == 0:
+        return []
+
+    models  = [r["Model No."] for r in rows]
+    modules = [r["Module"] for r in rows]
+    titles  = [r["Title"].strip() for r in rows]
+
+    # Raw group (exact values) vs block (stripped values — what a match must equal)
+    group_codes, group_keys = _factorize(list(zip(models, modules)))
+    block_codes, block_keys = _factorize([(m.strip(), mod.strip()) for m, mod in zip(models, modules)])
+    title_codes, title_keys = _factorize([t.lower() for t in titles])
+    n_titles = len(title_keys)
+
+    # ── Representative per group: most frequent title, ties → first seen ──────
+    combo = group_codes * n_titles + title_codes
+    uniq, first_idx, counts = np.unique(combo, return_index=True, return_counts=True)
+    uniq_group = uniq // n_titles
+    order = np.lexsort((first_idx, -counts, uniq_group))
+    is_head = np.ones(len(order), dtype=bool)
+    is_head[1:] = uniq_group[order][1:] != uniq_group[order][:-1]
+    rep_idx = first_idx[order][is_head]                   # indexed by group code
+
+    # ── Block members, each block's rows ascending ────────────────────────────
+    block_order = np.argsort(block_codes, kind="stable")
+    bounds = np.flatnonzero(np.diff(block_codes[block_order])) + 1
+    block_members = dict(zip(block_keys, np.split(block_order, bounds)))
+
+    results = []
+    for g, (model, module) in enumerate(group_keys):
+        rep = int(rep_idx[g])
+        rep_title = title_keys[title_codes[rep]]
+        cand = block_members.get((model, module))
+        similar_titles = []
+        similar_count = 0
+
+        if cand is not None:
+            cand = cand[cand != rep]
+            if len(cand):
+                # One batched matmul: block members vs representative
+                scores = embeddings[emb_codes[cand]] @ embeddings[emb_codes[rep]]
+                hits = cand[scores >= threshold]
+                similar_count = int(len(hits))
+
+                if similar_count:
+                    t_uniq, t_first, t_counts = np.unique(
+                        title_codes[hits], return_index=True, return_counts=True
+                    )
+                    by_first = np.argsort(t_first, kind="stable")
+                    by_count = by_first[np.argsort(-t_counts[by_first], kind="stable")]
+                    similar_titles = [
+                        {
+                            "model": model,
+                            "voc":   titles[hits[t_first[k]]],
+                            "count": int(t_counts[k]),
+                        }
+                        for k in by_count
+                    ]
+
+        results.append({
+            "model":  model,
+            "module": module,
+            "voc":    rep_title.capitalize(),
+            "count":  similar_count,
+            "similar_titles": similar_titles,
+        })
+
+    results.sort(key=lambda x: x["count"], reverse=True)
+    return results
+
+
+# ── Artifact generation ───────────────────────────────────────────────────────
+
+
+def load_insight_rows(source_rows) -> list:
+    """Rows of an analytics row store with a title, model and module."""
+    rows = []
+    for r in source_rows:
+        title = r.get("Title") or r.get("content") or r.get("Content") or ""
+        model = r.get("Model No.") or r.get("model") or ""
+        module = r.get("Module") or r.get("module") or ""
+
+        if title and model and module:
+            rows.append({"Title": title, "Model No.": model, "Module": module})
+    return rows
+
+
+def artifact_path(base_dir: str, source: str) -> str:
+    return os.path.join(base_dir, "downloads", source, ARTIFACT_NAME)
+
+
+def generate_artifact(base_dir: str, source: str, encode_fn) -> dict:
+    """
+    Compute the AI Insight payload for `source` and write it atomically to
+    downloads/<source>/ai_insight.json.
+
+    encode_fn(encoder_name, texts) → normalised float32 embeddings.
+    Raises FileNotFoundError if the source has no analytics.json yet and
+    ValueError if it has no usable rows.
+    """
+    cfg = AI_INSIGHT_SOURCES[source]
+    source_dir = os.path.join(base_dir, "downloads", source)
+    analytics_path = os.path.join(source_dir, "analytics.json")
+
+    analytics_mtime = os.path.getmtime(analytics_path)
+    rows = load_insight_rows(row_store.iter_rows(
+        source_dir, fields=["Title", "content", "Content", "Model No.", "model", "Module", "module"],
+    ))
+    if not rows:
+        raise ValueError(f"No valid rows found in {analytics_path}")
+
+    cache_path = os.path.join(source_dir, CACHE_DIR_NAME, CACHE_FILE)
+    cache = TitleEmbeddingCache(cfg["encoder"])
+    cache.load(cache_path)
+
+    embeddings, emb_codes, n_encoded = cache.embed(
+        [r["Title"] for r in rows], lambda texts: encode_fn(cfg["encoder"], texts)
+    )
+    results = compute_similar_voc(rows, embeddings, emb_codes, cfg["threshold"])
+    cache.save(cache_path)
+
+    payload = {
+        "source":          source,
+        "total_issues":    len(rows),
+        "total_groups":    len(results),
+        "threshold":       cfg["threshold"],
+        "model_name":      cfg["encoder"],
+        "generated_at":    time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "analytics_mtime": analytics_mtime,
+        "new_titles_encoded": n_encoded,
+        "results":         results,
+    }
+
+    out_path = artifact_path(base_dir, source)
+    tmp = out_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp, out_path)
+    return payload
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+bench_rag.py
+Load-testing and latency benchmark harness for the RAG server's /search route.
+
+Drives the FastAPI app either in-process (httpx ASGI transport — no sockets,
+no uvicorn) or over localhost against a running rag_server.py, sweeping a
+grid of concurrency × batch size, and reports per cell:
+  latency p50 / p95 / p99 / mean / max (ms per request), requests/s,
+  queries/s, errors and CPU use (process CPU seconds / wall seconds).
+
+Query sets:
+  synthetic (default) — VOC-like texts with a log-normal length distribution
+                        and a configurable duplicate ratio
+  --queries FILE      — replay: .json (list of strings, or of objects with a
+                        Title/Problem), .txt (one query per line) or .xlsx
+                        (Title + Problem columns)
+
+--stub-encoder (in-process only) replaces every registered encoder with a
+deterministic hash-seeded random projection of the right dimension, so the
+numbers isolate FAISS search, serialisation and scheduling overhead from model
+cost. --synthetic-index N additionally serves an in-memory index of N random
+vectors instead of RAG/vector_db.
+
+Results are written as JSON (--output, default stdout) so runs can be diffed.
+
+Usage:
+  python RAG/bench_rag.py --stub-encoder --synthetic-index 50000
+  python RAG/bench_rag.py --mode http --url http://127.0.0.1:5000 \\
+      --concurrency 1,4,16 --batch-size 1,8,32 --queries queries.json
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# ── Config ────────────────────────────────────────────────────────────────────
+
+DEFAULT_CONCURRENCY = [1, 4, 16]
+DEFAULT_BATCH_SIZES = [1, 8, 32]
+DEFAULT_REQUESTS    = 200          # timed requests per grid cell
+DEFAULT_WARMUP      = 10           # untimed requests per grid cell
+
+# Synthetic query length distribution (characters): log-normal around a
+# ~60-char median, clipped — close to cleaned Samsung Members titles.
+LENGTH_MEDIAN = 60
+LENGTH_SIGMA  = 0.7
+LENGTH_MIN    = 5
+LENGTH_MAX    = 600
+
+_VOCAB = (
+    "battery drain heating camera crash wifi disconnect bluetooth pairing screen "
+    "flicker touch unresponsive charging slow update failed app freeze notification "
+    "delay call drop network signal lag restart boot loop overheating fingerprint "
+    "sensor not working gallery black photo blurry video stutter sound speaker low "
+    "volume keyboard samsung members one ui after latest patch sometimes always"
+).split()
+
+# ── Query sets ────────────────────────────────────────────────────────────────
+
+
+def synthetic_queries(n: int, dup_ratio: float, seed: int = 0) -> list:
+    """n VOC-like queries; `dup_ratio` of them repeat an earlier query verbatim."""
+    rng = random.Random(seed)
+    lengths = np.clip(
+        np.random.default_rng(seed).lognormal(np.log(LENGTH_MEDIAN), LENGTH_SIGMA, n),
+        LENGTH_MIN, LENGTH_MAX,
+    ).astype(int)
+
+    queries = []
+    for target in lengths:
+        if queries and rng.random() < dup_ratio:
+            queries.append(rng.choice(queries))
+            continue
+        words, size = [], 0
+        while size < target:
+            w = rng.choice(_VOCAB)
+            words.append(w)
+            size += len(w) + 1
+        queries.append(" ".join(words)[:target])
+    return queries
+
+
+def load_queries(path: str) -> list:
+    """Replay set from .json / .txt / .xlsx (see module docstring)."""
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("queries") or data.get("rows") or []
+        out = []
+        for item in data:
+            if isinstance(item, str):
+                out.append(item)
+            elif isinstance(item, dict):
+                out.append(f"{item.get('Title', '')} {item.get('Problem', '')}".strip())
+        return [q for q in out if q]
+
+    if path.endswith((".xlsx", ".xls")):
+        sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server", "analytics"))
+        from excel_reader import read_excel
+        df = read_excel(path)
+        cols = [c for c in ("Title", "Problem") if c in df.columns]
+        if not cols:
+            raise ValueError(f"{path} has no Title/Problem column")
+        text = df[cols].fillna("").astype(str).agg(" ".join, axis=1).str.strip()
+        return [q for q in text.tolist() if q]
+
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def describe_queries(queries: list) -> dict:
+    lengths = np.array([len(q) for q in queries])
+    return {
+        "count":          len(queries),
+        "unique":         len(set(queries)),
+        "duplicate_ratio": round(1 - len(set(queries)) / max(len(queries), 1), 4),
+        "length_p50":     int(np.percentile(lengths, 50)) if len(lengths) else 0,
+        "length_p95":     int(np.percentile(lengths, 95)) if len(lengths) else 0,
+        "length_max":     int(lengths.max()) if len(lengths) else 0,
+    }
+
+# ── Stub encoder / synthetic index (in-process only) ──────────────────────────
+
+
+class StubEncoder:
+    """Deterministic stand-in for a SentenceTransformer: hash-seeded unit vectors."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts, normalize_embeddings=True, **kwargs):
+        out = np.empty((len(texts), self.dim), dtype="float32")
+        for i, t in enumerate(texts):
+            seed = int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "little")
+            out[i] = np.random.default_rng(seed).standard_normal(self.dim)
+        if normalize_embeddings:
+            out /= np.linalg.norm(out, axis=1, keepdims=True)
+        return out
+
+
+def install_stubs(rs, synthetic_index: int, seed: int = 0) -> None:
+    for name, dim in rs.MODEL_DIMS.items():
+        rs.register_model(name, StubEncoder(dim))
+
+    if synthetic_index:
+        import faiss
+        for name, spec in rs.INDEX_SPECS.items():
+            vecs = np.random.default_rng(seed).standard_normal((synthetic_index, spec["dim"])).astype("float32")
+            faiss.normalize_L2(vecs)
+            index = faiss.IndexFlatIP(spec["dim"])
+            index.add(vecs)
+            metadata = [{"Title": f"synthetic {i}", "Module": "Bench"} for i in range(synthetic_index)]
+            rs.INDEX_REGISTRY[name] = {"index": index, "metadata": metadata, "spec": spec}
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+
+
+def _cpu_seconds(proc) -> float:
+    if proc is not None:
+        t = proc.cpu_times()
+        return t.user + t.system
+    t = os.times()
+    return t.user + t.system
+
+
+async def run_cell(client, queries: list, concurrency: int, batch_size: int,
+                   n_requests: int, warmup: int, server_proc) -> dict:
+    """Fire n_requests POST /search batches from `concurrency` workers."""
+    batches = [
+        [queries[(r * batch_size + j) % len(queries)] for j in range(batch_size)]
+        for r in range(n_requests + warmup)
+    ]
+    latencies = []
+    errors = 0
+    next_req = 0
+
+    async def worker(timed: bool, stop: int):
+        nonlocal next_req, errors
+        while True:
+            i = next_req
+            if i >= stop:
+                return
+            next_req += 1
+            start = time.perf_counter()
+            try:
+                resp = await client.post("/search", json={"queries": batches[i]})
+                ok = resp.status_code == 200 and len(resp.json()) == batch_size
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - start
+            if timed:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    await asyncio.gather(*(worker(False, warmup) for _ in range(min(concurrency, max(warmup, 1)))))
+
+    cpu0, wall0 = _cpu_seconds(server_proc), time.perf_counter()
+    await asyncio.gather(*(worker(True, warmup + n_requests) for _ in range(concurrency)))
+    wall = time.perf_counter() - wall0
+    cpu = _cpu_seconds(server_proc) - cpu0
+
+    lat_ms = np.array(latencies) * 1000.0
+    done = len(latencies)
+    return {
+        "concurrency":  concurrency,
+        "batch_size":   batch_size,
+        "requests":     done,
+        "errors":       errors,
+        "wall_s":       round(wall, 4),
+        "rps":          round(done / wall, 2) if wall else 0.0,
+        "qps":          round(done * batch_size / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "p50":  round(float(np.percentile(lat_ms, 50)), 3) if done else None,
+            "p95":  round(float(np.percentile(lat_ms, 95)), 3) if done else None,
+            "p99":  round(float(np.percentile(lat_ms, 99)), 3) if done else None,
+            "mean": round(float(lat_ms.mean()), 3) if done else None,
+            "max":  round(float(lat_ms.max()), 3) if done else None,
+        },
+        "cpu_s":           round(cpu, 4),
+        "cpu_utilisation": round(cpu / wall, 3) if wall else 0.0,   # 1.0 == one core busy
+    }
+
+
+async def run_benchmark(args, queries: list) -> dict:
+    server_proc = None
+    if args.mode == "inprocess":
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import rag_server as rs
+        if args.stub_encoder:
+            install_stubs(rs, args.synthetic_index, args.seed)
+        # Load models/indexes before timing so the first cell isn't a cold start
+        for name in rs.INDEX_SPECS:
+            rs.get_index(name)
+        transport = httpx.ASGITransport(app=rs.app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None)
+        if PSUTIL_AVAILABLE:
+            server_proc = psutil.Process()
+        cpu_scope = "process (client + server)"
+    else:
+        limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+        client = httpx.AsyncClient(base_url=args.url, timeout=None, limits=limits)
+        if args.server_pid and PSUTIL_AVAILABLE:
+            server_proc = psutil.Process(args.server_pid)
+            cpu_scope = f"server pid {args.server_pid}"
+        else:
+            cpu_scope = "client process only"
+
+    cells = []
+    async with client:
+        for batch_size in args.batch_size:
+            for concurrency in args.concurrency:
+                cell = await run_cell(client, queries, concurrency, batch_size,
+                                      args.requests, args.warmup, server_proc)
+                lat = cell["latency_ms"]
+                print(f"[BENCH] c={concurrency:<3} b={batch_size:<3} "
+                      f"p50={lat['p50']}ms p95={lat['p95']}ms p99={lat['p99']}ms "
+                      f"qps={cell['qps']} cpu={cell['cpu_utilisation']}", file=sys.stderr)
+                cells.append(cell)
+
+    return {"cpu_scope": cpu_scope, "cells": cells}
+
+
+def _parse_int_list(value: str) -> list:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the RAG server /search route")
+    parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="target for --mode http")
+    parser.add_argument("--server-pid", type=int, help="measure this PID's CPU in --mode http (needs psutil)")
+    parser.add_argument("--concurrency", type=_parse_int_list, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--batch-size", type=_parse_int_list, default=DEFAULT_BATCH_SIZES)
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--queries", help="replay query file (.json/.txt/.xlsx)")
+    parser.add_argument("--num-queries", type=int, default=5000, help="synthetic query pool size")
+    parser.add_argument("--dup-ratio", type=float, default=0.3, help="synthetic duplicate ratio")
+    parser.add_argument("--stub-encoder", action="store_true", help="deterministic stub encoders (in-process)")
+    parser.add_argument("--synthetic-index", type=int, default=0, help="serve N random vectors (in-process)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="", help="free-form run label stored in the output")
+    parser.add_argument("--output", help="write JSON results here (default stdout)")
+    args = parser.parse_args(argv)
+
+    if not HTTPX_AVAILABLE:
+        print("[ERROR] httpx is required: pip install httpx", file=sys.stderr)
+        return 1
+    if args.mode == "http" and (args.stub_encoder or args.synthetic_index):
+        print("[ERROR] --stub-encoder / --synthetic-index only apply to --mode inprocess", file=sys.stderr)
+        return 1
+
+    if args.queries:
+        queries = load_queries(args.queries)
+        source = args.queries
+    else:
+        queries = synthetic_queries(args.num_queries, args.dup_ratio, args.seed)
+        source = "synthetic"
+    if not queries:
+        print("[ERROR] Query set is empty", file=sys.stderr)
+        return 1
+
+    started = time.strftime("%Y-%m-%dT%H:%M:%S")
+    outcome = asyncio.run(run_benchmark(args, queries))
+
+    report = {
+        "label":      args.label,
+        "started_at": started,
+        "config": {
+            "mode":            args.mode,
+            "url":             args.url if args.mode == "http" else None,
+            "stub_encoder":    args.stub_encoder,
+            "synthetic_index": args.synthetic_index,
+            "requests":        args.requests,
+            "warmup":          args.warmup,
+            "seed":            args.seed,
+        },
+        "queries": {"source": source, **describe_queries(queries)},
+        "environment": {
+            "python":    platform.python_version(),
+            "platform":  platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy":     np.__version__,
+        },
+        **outcome,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"[OK] Benchmark results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,15 @@
 import os
 import re
+import sys
 import json
 import numpy as np
 import faiss
 from sentence_transformers import SentenceTransformer
 
+# Excel reads go through the shared reader in server/analytics (calamine when installed)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server", "analytics"))
+from excel_reader import read_excel
+
 # ==============================
 # CONFIG
 # ==============================
@@ -73,7 +78,7 @@ def load_all_files(folder):
             try:
                 import pandas as pd
                 # Read excel and convert to list of dicts
-                df = pd.read_excel(file)
+                df = read_excel(file)
                 # Convert NaNs to None for compatibility with .get() logic
                 df = df.where(pd.notnull(df), None)
                 records = df.to_dict('records')
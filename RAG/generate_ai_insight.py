@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+generate_ai_insight.py
+Offline batch job: precompute the AI Insight artifact for each source.
+
+Runs right after analytics generation (run_server.py / server.js) and writes
+downloads/<source>/ai_insight.json, which the RAG server's /ai-insight route
+serves as-is — dashboard requests never encode titles.
+
+Title embeddings are persisted in downloads/<source>/__ai_insight_cache__/,
+so after an upload only the new titles are encoded.
+
+Usage:
+  python RAG/generate_ai_insight.py                       # every source
+  python RAG/generate_ai_insight.py samsung_members_voc   # selected sources
+"""
+
+import os
+import sys
+import time
+
+# Prevent HuggingFace Hub from pinging the network for updates, avoiding timeouts
+os.environ["HF_HUB_OFFLINE"] = "1"
+
+from ai_insight import AI_INSIGHT_SOURCES, generate_artifact
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_models: dict = {}
+
+
+def _encode(encoder: str, texts: list):
+    model = _models.get(encoder)
+    if model is None:
+        from sentence_transformers import SentenceTransformer
+        print(f"[AI] Loading embedding model: {encoder} ...")
+        model = _models[encoder] = SentenceTransformer(encoder, local_files_only=True)
+    return model.encode(
+        texts,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+        batch_size=32,
+    )
+
+
+def main(argv: list) -> int:
+    sources = argv or list(AI_INSIGHT_SOURCES)
+    unknown = [s for s in sources if s not in AI_INSIGHT_SOURCES]
+    if unknown:
+        print(f"[ERROR] Unknown source(s): {', '.join(unknown)} "
+              f"(expected one of {', '.join(AI_INSIGHT_SOURCES)})")
+        return 1
+
+    failed = 0
+    for source in sources:
+        start = time.time()
+        try:
+            payload = generate_artifact(BASE_DIR, source, _encode)
+            print(f"[OK] AI insight for {source}: {payload['total_groups']} groups, "
+                  f"{payload['new_titles_encoded']} new titles encoded "
+                  f"({time.time() - start:.1f}s)")
+        except FileNotFoundError:
+            print(f"[WARN] No analytics.json for {source} — skipped")
+        except Exception as e:
+            print(f"[ERROR] AI insight generation failed for {source}: {e}")
+            failed += 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
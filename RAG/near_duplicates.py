@@ -0,0 +1,239 @@
+"""
+near_duplicates.py
+Near-duplicate collapse for upload batches using MinHash + LSH.
+
+No neural model is involved — rows are compared on character shingles of
+the cleaned text (Title + Problem, already passed through
+excel_cleaner.clean_problem), so 100k rows cluster in a few seconds on CPU.
+
+Pipeline:
+  1. Normalise text (lowercase, collapse whitespace, truncate) and collapse
+     exact duplicates first — they are the bulk of repeated VOC complaints.
+  2. Hash every character k-gram of the remaining unique texts with a
+     vectorised rolling hash over one concatenated code-point array.
+  3. MinHash signature per text (NUM_PERM universal hash permutations,
+     min-reduced per document with np.minimum.reduceat).
+  4. LSH banding: texts sharing a band bucket become candidate pairs, each
+     candidate is verified by its estimated Jaccard similarity.
+  5. Verified pairs are merged into clusters (vectorised union-find).
+
+The representative of a cluster is its lowest row index, so the caller can
+process that row once and copy the results to every member.
+"""
+
+import re
+
+import numpy as np
+
+# ── Config ────────────────────────────────────────────────────────────────────
+
+# Estimated Jaccard similarity (on character shingles) above which two rows
+# are treated as the same complaint.
+NEAR_DUP_THRESHOLD = 0.8
+
+SHINGLE_SIZE = 5
+NUM_PERM     = 64
+
+# Long problem texts add little signal for "same complaint" and dominate the
+# hashing cost, so only the first MAX_TEXT_CHARS characters are shingled.
+MAX_TEXT_CHARS = 400
+
+# Shingles hashed per chunk (rows are never split across chunks) — bounds the
+# temporary (chunk-size) uint32 arrays built per permutation.
+_CHUNK_SHINGLES = 4_000_000
+
+_MERSENNE_SEED = 1_000_003
+_WS_RE = re.compile(r"\s+")
+
+
+def _normalise(title: str, problem: str) -> str:
+    text = f"{title or ''} {problem or ''}".lower()
+    text = _WS_RE.sub(" ", text).strip()
+    return text[:MAX_TEXT_CHARS]
+
+
+def _lsh_params(threshold: float, num_perm: int) -> tuple:
+    """
+    Pick (bands, rows) with bands * rows <= num_perm minimising the weighted
+    false-positive + false-negative area of the LSH S-curve.
+    """
+    grid = np.linspace(0.0, 1.0, 201)
+    below = grid < threshold
+    best, best_err = (1, num_perm), float("inf")
+    for b in range(1, num_perm + 1):
+        for r in range(1, num_perm // b + 1):
+            p = 1.0 - (1.0 - grid ** r) ** b
+            fp = p[below].sum()
+            fn = (1.0 - p[~below]).sum()
+            err = fp + fn
+            if err < best_err:
+                best, best_err = (b, r), err
+    return best
+
+
+def _shingle_hashes(texts: list) -> tuple:
+    """
+    Returns (hashes, starts): uint32 hash of every character k-gram of every
+    text, and the offset of each text's first k-gram in `hashes`.
+    Texts shorter than SHINGLE_SIZE are zero-padded so each yields one k-gram.
+    """
+    k = SHINGLE_SIZE
+    padded = [t if len(t) >= k else t + "\0" * (k - len(t)) for t in texts]
+    lengths = np.fromiter((len(t) for t in padded), dtype=np.int64, count=len(padded))
+    # surrogatepass: a lone surrogate (broken export text) stays one code point
+    codes = np.frombuffer("".join(padded).encode("utf-32-le", errors="surrogatepass"),
+                          dtype=np.uint32).astype(np.uint64)
+
+    # Polynomial rolling hash over k consecutive code points (wraps mod 2**64)
+    n_grams_total = len(codes) - k + 1
+    h = np.zeros(n_grams_total, dtype=np.uint64)
+    base = np.uint64(_MERSENNE_SEED)
+    for j in range(k):
+        h = h * base + codes[j:j + n_grams_total]
+
+    # Keep only k-grams that start and end inside the same text
+    text_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    grams_per_text = lengths - k + 1
+    offset_in_text = np.arange(len(codes)) - np.repeat(text_starts, lengths)
+    valid = (offset_in_text < np.repeat(grams_per_text, lengths))[:n_grams_total]
+    h = h[valid]
+
+    # Fold to 32 bits (xor-shift mix keeps high-bit entropy)
+    h ^= h >> np.uint64(29)
+    h *= np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(32)
+    hashes = h.astype(np.uint32)
+
+    starts = np.concatenate(([0], np.cumsum(grams_per_text)[:-1])).astype(np.int64)
+    return hashes, starts
+
+
+def _minhash_signatures(hashes: np.ndarray, starts: np.ndarray, num_perm: int) -> np.ndarray:
+    """MinHash signature matrix, shape (n_texts, num_perm), dtype uint32."""
+    n = len(starts)
+    rng = np.random.RandomState(42)
+    a = (rng.randint(1, 2 ** 31, size=num_perm, dtype=np.int64) * 2 + 1).astype(np.uint32)
+    b = rng.randint(0, 2 ** 31, size=num_perm, dtype=np.int64).astype(np.uint32)
+
+    sig = np.empty((n, num_perm), dtype=np.uint32)
+    ends = np.append(starts[1:], len(hashes))
+
+    # Chunk on text boundaries so temporaries stay at most _CHUNK_SHINGLES long
+    lo = 0
+    while lo < n:
+        hi = int(np.searchsorted(starts, starts[lo] + _CHUNK_SHINGLES, side="left"))
+        hi = max(hi, lo + 1)
+        seg = hashes[starts[lo]:ends[hi - 1]]
+        seg_starts = starts[lo:hi] - starts[lo]
+        for p in range(num_perm):
+            sig[lo:hi, p] = np.minimum.reduceat(seg * a[p] + b[p], seg_starts)
+        lo = hi
+    return sig
+
+
+def _union_find(n: int, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Vectorised connected components: returns the min node id per component."""
+    labels = np.arange(n, dtype=np.int64)
+    if len(u) == 0:
+        return labels
+    while True:
+        lo = np.minimum(labels[u], labels[v])
+        new = labels.copy()
+        np.minimum.at(new, u, lo)
+        np.minimum.at(new, v, lo)
+        new = new[new]                                   # pointer jumping
+        if np.array_equal(new, labels):
+            return labels
+        labels = new
+
+
+def find_near_duplicates(
+    titles: list,
+    problems: list = None,
+    threshold: float = NEAR_DUP_THRESHOLD,
+    num_perm: int = NUM_PERM,
+) -> dict:
+    """
+    Cluster near-duplicate rows of an upload batch.
+
+    Returns
+    -------
+    dict:
+        total_rows      → number of input rows
+        total_clusters  → number of clusters (= rows to actually process)
+        representatives → row index of each cluster representative, ascending
+        member_of       → for every row, the row index of its representative
+        clusters        → [{representative, members}] for clusters with >1 row
+        threshold       → Jaccard threshold applied
+    """
+    n = len(titles)
+    problems = problems if problems is not None else [""] * n
+    if len(problems) != n:
+        raise ValueError("titles and problems must have the same length")
+
+    if n == 0:
+        return {"total_rows": 0, "total_clusters": 0, "representatives": [],
+                "member_of": [], "clusters": [], "threshold": threshold}
+
+    # ── 1. Exact duplicates collapse first ────────────────────────────────────
+    texts = [_normalise(t, p) for t, p in zip(titles, problems)]
+    unique_idx: dict = {}
+    row_to_unique = np.empty(n, dtype=np.int64)
+    for i, t in enumerate(texts):
+        row_to_unique[i] = unique_idx.setdefault(t, len(unique_idx))
+    unique_texts = list(unique_idx)
+    m = len(unique_texts)
+
+    # ── 2-3. Shingle + MinHash the unique texts ───────────────────────────────
+    u_edges = np.empty(0, dtype=np.int64)
+    v_edges = np.empty(0, dtype=np.int64)
+    if m > 1:
+        hashes, starts = _shingle_hashes(unique_texts)
+        sig = _minhash_signatures(hashes, starts, num_perm)
+
+        # ── 4. LSH banding + candidate verification ───────────────────────────
+        bands, rows = _lsh_params(threshold, num_perm)
+        us, vs = [], []
+        for band in range(bands):
+            block = np.ascontiguousarray(sig[:, band * rows:(band + 1) * rows])
+            keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows))).ravel()
+            _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+            head = first[inverse.ravel()]
+            cand = np.nonzero(head != np.arange(m))[0]
+            if len(cand):
+                us.append(cand)
+                vs.append(head[cand])
+        if us:
+            u_all = np.concatenate(us)
+            v_all = np.concatenate(vs)
+            pairs = np.unique(np.stack([u_all, v_all], axis=1), axis=0)
+            agree = (sig[pairs[:, 0]] == sig[pairs[:, 1]]).mean(axis=1)
+            keep = agree >= threshold
+            u_edges, v_edges = pairs[keep, 0], pairs[keep, 1]
+
+    # ── 5. Clusters over unique texts, mapped back to rows ────────────────────
+    unique_label = _union_find(m, u_edges, v_edges)
+    row_label = unique_label[row_to_unique]
+
+    # Representative = lowest row index of each cluster
+    _, first_row, inverse = np.unique(row_label, return_index=True, return_inverse=True)
+    member_of = first_row[inverse.ravel()]
+    representatives = np.sort(first_row)
+
+    order = np.argsort(member_of, kind="stable")
+    reps_sorted = member_of[order]
+    bounds = np.flatnonzero(np.diff(reps_sorted)) + 1
+    clusters = [
+        {"representative": int(grp[0]), "members": grp.tolist()}
+        for grp in np.split(order, bounds)
+        if len(grp) > 1
+    ]
+
+    return {
+        "total_rows":      n,
+        "total_clusters":  int(len(representatives)),
+        "representatives": representatives.tolist(),
+        "member_of":       member_of.tolist(),
+        "clusters":        clusters,
+        "threshold":       threshold,
+    }
@@ -1,80 +1,236 @@
 """
 rag_server.py
-FastAPI async RAG server using BAAI/bge-m3 for multilingual retrieval.
+Unified FastAPI RAG service — the single process serving every retrieval
+workload (KB classification, AI Insight, near-duplicate collapse).
 
-BGE-M3 advantages over all-MiniLM-L6-v2:
-  - Supports 100+ languages including Korean, Hindi, Hinglish
-  - 1024-dim embeddings (vs 384) — richer semantic representation
-  - Significantly better retrieval accuracy on mixed-language Samsung VOC data
-  - Same sentence-transformers API — drop-in replacement
+Replaces the two divergent servers (rag_api.py on port 8000 and the old
+rag_server.py on port 5000). Each model and each FAISS index is held in RAM
+exactly once, whichever route uses it.
+
+Model registry:
+  MODEL_REGISTRY maps an encoder name to a lazily loaded SentenceTransformer.
+  get_model(name) loads it on first use; register_model(name, obj) installs a
+  pre-built encoder (anything with a sentence-transformers style .encode()).
+
+Index registry:
+  INDEX_SPECS declares, per index, its files, the encoder its vectors were
+  built with and their dimension. An index is only served if the FAISS file,
+  the declared dimension and the encoder's output dimension all agree — a
+  query encoded with the wrong model (the old MiniLM-vs-BGE-M3 mismatch in
+  rag_api.py) fails loudly at load time instead of returning garbage scores.
 
 Endpoints:
-  POST /search   { "queries": ["text1", "text2", ...] }
-                 returns a bare JSON array-of-arrays
+  POST /search     { "queries": ["text1", ...], "index": "voc_kb" }
+                   returns a bare JSON array-of-arrays (ragClient.js)
+
+  POST /retrieve   same body, returns { "results": [...] }
+                   (compatibility route for former rag_api.py clients —
+                   keeps its 0.60 similarity cut-off)
+
+  POST /reload     hot-reloads the FAISS index(es) and metadata from disk;
+                   the response carries both former shapes (success/entries
+                   and status/message/records)
 
-  POST /reload   hot-reloads the FAISS index and metadata from disk
+  GET  /health     returns status, record count, loaded models and indexes
 
-  GET  /health   returns status and record count
+  GET  /ai-insight?source=samsung_members_voc|global_voc_plm
+                   &model=&module=&limit=&offset=
+                   precomputed "Similar VOC" counts per (Model No. + Module),
+                   served from downloads/<source>/ai_insight.json with an ETag
+
+  POST /near-duplicates  { "titles": [...], "problems": [...], "threshold": 0.8 }
+                   MinHash LSH clustering of an upload batch (no model involved)
 
 Start:
   pip install fastapi uvicorn sentence-transformers faiss-cpu
-  python rag_server.py
+  python RAG/rag_server.py
 """
 
 import asyncio
+import hashlib
 import json
 import re
 import os
+import threading
+
 import numpy as np
 
 # Prevent HuggingFace Hub from pinging the network for updates, avoiding timeouts
 os.environ["HF_HUB_OFFLINE"] = "1"
 
 import faiss
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Query, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
 import uvicorn
 
-# ── Config ────────────────────────────────────────────────────────────────────
-
-INDEX_FILE    = "RAG/vector_db/index.faiss"
-METADATA_FILE = "RAG/vector_db/metadata.json"
+from ai_insight import AI_INSIGHT_SOURCES, DEFAULT_AI_INSIGHT_SOURCE, artifact_path
+from near_duplicates import NEAR_DUP_THRESHOLD, find_near_duplicates
 
-# TOP_K=3: retrieve 3 candidates per query.
-# More candidates = lower miss rate on borderline matches with minimal overhead.
-TOP_K = 3
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
 
-# Threshold raised from 0.35 → 0.38 because BGE-M3 produces higher similarity
-# scores than MiniLM, so genuinely irrelevant matches score lower.
-# Raise further (0.40–0.45) after observing your score distribution in logs.
-SIMILARITY_THRESHOLD = 0.38
+# ── Config ────────────────────────────────────────────────────────────────────
 
-# ── Load model and index once at startup ──────────────────────────────────────
+RAG_DIR  = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(RAG_DIR)
+
+# Output dimension of every known encoder — checked against the loaded model
+MODEL_DIMS = {
+    "BAAI/bge-m3":      1024,
+    "all-MiniLM-L6-v2": 384,
+}
+
+# Every FAISS index served by this process, with the encoder that built it.
+#   top_k / threshold  → retrieval defaults for that index
+# Threshold for voc_kb raised from 0.35 → 0.38 because BGE-M3 produces higher
+# similarity scores than MiniLM, so genuinely irrelevant matches score lower.
+INDEX_SPECS = {
+    "voc_kb": {
+        "index_file":    os.path.join(RAG_DIR, "vector_db", "index.faiss"),
+        "metadata_file": os.path.join(RAG_DIR, "vector_db", "metadata.json"),
+        "encoder":       "BAAI/bge-m3",
+        "dim":           1024,
+        "top_k":         3,
+        "threshold":     0.38,
+    },
+}
+DEFAULT_INDEX = "voc_kb"
+
+# /retrieve keeps rag_api.py's similarity cut-off so its clients get the same
+# (stricter) match lists; /search uses the per-index threshold above.
+RETRIEVE_THRESHOLD = 0.60
+
+# Encoders loaded at startup so /health only reports ready once they are in RAM.
+# AI Insight encoders are not needed here — generate_ai_insight.py runs offline.
+PRELOAD_MODELS = ["BAAI/bge-m3"]
+
+# ── Model registry ────────────────────────────────────────────────────────────
+
+MODEL_REGISTRY: dict = {}
+_registry_lock = threading.Lock()
+
+
+def register_model(name: str, model) -> None:
+    """Install an already constructed encoder under `name`."""
+    with _registry_lock:
+        MODEL_REGISTRY[name] = model
+
+
+def _model_dim(model):
+    get_dim = getattr(model, "get_sentence_embedding_dimension", None)
+    return get_dim() if callable(get_dim) else None
+
+
+def get_model(name: str):
+    """Return the single in-RAM copy of encoder `name`, loading it on first use."""
+    model = MODEL_REGISTRY.get(name)
+    if model is not None:
+        return model
+
+    with _registry_lock:
+        model = MODEL_REGISTRY.get(name)
+        if model is None:
+            if not SENTENCE_TRANSFORMERS_AVAILABLE:
+                raise RuntimeError("sentence-transformers is not installed")
+            print(f"Loading embedding model: {name} ...")
+            model = SentenceTransformer(name, local_files_only=True)
+            expected = MODEL_DIMS.get(name)
+            actual = _model_dim(model)
+            if expected and actual and expected != actual:
+                raise RuntimeError(f"Encoder {name} produces {actual}-dim vectors, expected {expected}")
+            MODEL_REGISTRY[name] = model
+    return model
+
+
+def encode(model_name: str, texts: list, batch_size: int = 32) -> np.ndarray:
+    """L2-normalised float32 embeddings of `texts` (cosine via inner product)."""
+    embeddings = get_model(model_name).encode(
+        texts,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+        batch_size=batch_size,
+    )
+    return np.asarray(embeddings, dtype="float32")
 
-print("Loading RAG model: BAAI/bge-m3 ...")
-embed_model_rag = SentenceTransformer("BAAI/bge-m3", local_files_only=True)
+# ── Index registry ────────────────────────────────────────────────────────────
 
-print("Loading AI Insight model: all-MiniLM-L6-v2 ...")
-embed_model_insight = SentenceTransformer("all-MiniLM-L6-v2", local_files_only=True)
+# name → {"index": faiss.Index, "metadata": list, "spec": dict}
+INDEX_REGISTRY: dict = {}
 
-print("Loading FAISS index...")
-faiss_index = faiss.read_index(INDEX_FILE)
 
-with open(METADATA_FILE, "r", encoding="utf-8") as f:
-    metadata = json.load(f)
-    print(f"Metadata size: {len(metadata)}")
+def load_index(name: str) -> dict:
+    """
+    Read index `name` from disk and validate it against its declared encoder.
+    Raises on any dimension mismatch; does not touch INDEX_REGISTRY.
+    """
+    spec = INDEX_SPECS[name]
+    index = faiss.read_index(spec["index_file"])
+    with open(spec["metadata_file"], "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+
+    if index.d != spec["dim"]:
+        raise RuntimeError(
+            f"Index {name}: FAISS dimension {index.d} != declared {spec['dim']} "
+            f"for encoder {spec['encoder']} — rebuild with build_vector.py"
+        )
+    model_dim = _model_dim(get_model(spec["encoder"]))
+    if model_dim and model_dim != spec["dim"]:
+        raise RuntimeError(
+            f"Index {name}: encoder {spec['encoder']} produces {model_dim}-dim vectors, "
+            f"index expects {spec['dim']}"
+        )
+    if index.ntotal != len(metadata):
+        print(f"[WARN] Index {name}: {index.ntotal} vectors but {len(metadata)} metadata entries")
+
+    return {"index": index, "metadata": metadata, "spec": spec}
+
+
+def get_index(name: str) -> dict:
+    entry = INDEX_REGISTRY.get(name)
+    if entry is None:
+        entry = load_index(name)
+        INDEX_REGISTRY[name] = entry
+    return entry
+
+# ── Load models and indexes once at startup ───────────────────────────────────
+
+def _startup():
+    for model_name in PRELOAD_MODELS:
+        get_model(model_name)
+    for name in INDEX_SPECS:
+        entry = get_index(name)
+        print(f"Index {name}: {len(entry['metadata'])} entries ({entry['spec']['encoder']})")
+    print("RAG server ready")
 
-print("RAG server ready")
 
 # ── FastAPI app ───────────────────────────────────────────────────────────────
 
-app = FastAPI()
+app = FastAPI(title="MarketPulse RAG API")
+
+# Allow browser requests from the Node.js frontend (port 3001)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
 
 
 class SearchRequest(BaseModel):
     queries: list[str]
+    index: str = DEFAULT_INDEX
+
+
+class NearDuplicateRequest(BaseModel):
+    titles: list[str]
+    problems: list[str] | None = None
+    threshold: float = NEAR_DUP_THRESHOLD
 
 
 def _normalise_query(text: str) -> str:
@@ -94,25 +250,26 @@ def _normalise_query(text: str) -> str:
     return text.strip()
 
 
-def _run_search(queries: list[str]) -> list[list[dict]]:
+def _run_search(queries: list[str], index_name: str = DEFAULT_INDEX,
+                threshold: float | None = None) -> list[list[dict]]:
     """
-    Blocking function: normalise queries, encode with BGE-M3, search FAISS.
-    Called via asyncio.to_thread() so it doesn't block the event loop.
+    Blocking function: normalise queries, encode with the index's own encoder,
+    search FAISS. Called via asyncio.to_thread() so it doesn't block the event loop.
+    threshold overrides the index's own cut-off (the /retrieve compat route).
     """
     if not queries:
         return []
 
+    entry    = get_index(index_name)
+    spec     = entry["spec"]
+    metadata = entry["metadata"]
+
     # Normalise queries to match document encoding in build_vector.py
     normalised = [_normalise_query(q) for q in queries]
+    embeddings = encode(spec["encoder"], normalised)
 
-    embeddings = embed_model_rag.encode(
-        normalised,
-        normalize_embeddings=True,   # cosine similarity via IndexFlatIP
-        convert_to_numpy=True,
-        batch_size=32,
-    ).astype("float32")
-
-    D, I = faiss_index.search(embeddings, TOP_K)
+    D, I = entry["index"].search(embeddings, spec["top_k"])
+    min_score = spec["threshold"] if threshold is None else threshold
 
     all_results = []
 
@@ -122,10 +279,10 @@ def _run_search(queries: list[str]) -> list[list[dict]]:
         for pos, idx in enumerate(I[q_idx]):
             score = float(D[q_idx][pos])
 
-            if score < SIMILARITY_THRESHOLD:
+            if score < min_score:
                 continue
 
-            if idx >= len(metadata):
+            if idx < 0 or idx >= len(metadata):
                 continue
 
             meta = metadata[idx]
@@ -148,199 +305,208 @@ def _run_search(queries: list[str]) -> list[list[dict]]:
     return all_results
 
 
+def _unknown_index(name: str):
+    return JSONResponse(status_code=404, content={"error": f"Unknown index '{name}'"})
+
+
 @app.post("/search")
 async def search(req: SearchRequest):
     """
     Accepts { queries: [...] }, returns a bare array-of-arrays.
-    Offloads blocking FAISS+BGE-M3 work to a thread.
+    Offloads blocking FAISS + encoder work to a thread.
     """
-    results = await asyncio.to_thread(_run_search, req.queries)
+    if req.index not in INDEX_SPECS:
+        return _unknown_index(req.index)
+    results = await asyncio.to_thread(_run_search, req.queries, req.index)
     return JSONResponse(content=results)
 
 
+@app.post("/retrieve")
+async def retrieve(req: SearchRequest):
+    """
+    Compatibility route for former rag_api.py clients.
+    Same search as /search with rag_api.py's RETRIEVE_THRESHOLD, wrapped as
+    { "results": [...] }.
+    """
+    if req.index not in INDEX_SPECS:
+        return _unknown_index(req.index)
+    results = await asyncio.to_thread(_run_search, req.queries, req.index, RETRIEVE_THRESHOLD)
+    return {"results": results}
+
+
 @app.post("/reload")
-async def reload_index():
+async def reload_index(index: str | None = None):
     """
-    Hot-reload the FAISS index and metadata from disk.
+    Hot-reload FAISS index(es) and metadata from disk (all of them by default).
     Called by server.js after build_vector.py completes a KB update.
+    The previous copy keeps serving until the new one has been validated.
+    Answers with the old rag_server.py keys (success / entries) and the
+    rag_api.py ones (status / message / records).
     """
-    global faiss_index, metadata
+    names = [index] if index else list(INDEX_SPECS)
+    if index and index not in INDEX_SPECS:
+        return _unknown_index(index)
 
     try:
-        new_index = await asyncio.to_thread(faiss.read_index, INDEX_FILE)
-        with open(METADATA_FILE, "r", encoding="utf-8") as f:
-            new_metadata = json.load(f)
-
-        faiss_index = new_index
-        metadata    = new_metadata
-
-        print(f"[reload] Index reloaded — {len(metadata)} entries")
-        return {"success": True, "entries": len(metadata)}
+        loaded = {}
+        for name in names:
+            loaded[name] = await asyncio.to_thread(load_index, name)
+        INDEX_REGISTRY.update(loaded)
+
+        entries = {name: len(e["metadata"]) for name, e in loaded.items()}
+        print(f"[reload] Index reloaded — {entries}")
+        count = entries.get(DEFAULT_INDEX, sum(entries.values()))
+        return {
+            "success": True,
+            "entries": count,
+            "indexes": entries,
+            "status":  "ok",                 # keys used by former rag_api.py clients
+            "message": "Index and metadata reloaded successfully",
+            "records": count,
+        }
 
     except Exception as e:
         print(f"[reload] Failed: {e}")
-        return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
+        return JSONResponse(status_code=500, content={
+            "success": False,
+            "error":   str(e),
+            "status":  "error",
+            "message": str(e),
+        })
+
+
+@app.post("/near-duplicates")
+async def near_duplicates(req: NearDuplicateRequest):
+    """
+    Cluster near-identical rows of an upload batch (titles/problems already
+    cleaned by excel_cleaner.clean_problem). The caller processes one row per
+    cluster and copies the result to every row in member_of.
+    """
+    if not 0.0 < req.threshold <= 1.0:
+        return JSONResponse(status_code=400, content={"error": "threshold must be in (0, 1]"})
+    try:
+        result = await asyncio.to_thread(
+            find_near_duplicates, req.titles, req.problems, req.threshold
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    return result
 
 
 @app.get("/health")
 async def health():
-    return {"status": "ok", "entries": len(metadata)}
+    default = INDEX_REGISTRY.get(DEFAULT_INDEX)
+    entries = len(default["metadata"]) if default else 0
+    return {
+        "status":  "ok",
+        "entries": entries,
+        "records": entries,          # key used by former rag_api.py clients
+        "models":  sorted(MODEL_REGISTRY),
+        "indexes": {
+            name: {
+                "entries": len(e["metadata"]),
+                "encoder": e["spec"]["encoder"],
+                "dim":     e["spec"]["dim"],
+            }
+            for name, e in INDEX_REGISTRY.items()
+        },
+    }
 
 
 # ─── /ai-insight endpoint ─────────────────────────────────────────────────────
+# Serves the artifact written offline by generate_ai_insight.py — no encoding
+# happens in the request path, so latency is a (cached) file read.
 
-import os
-from pathlib import Path
+# source → {"stamp": (mtime_ns, size), "etag": str, "payload": dict}
+_ai_insight_cache: dict = {}
+
+
+def _load_ai_insight_artifact(source: str) -> dict:
+    path = artifact_path(BASE_DIR, source)
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    cached = _ai_insight_cache.get(source)
+    if cached is not None and cached["stamp"] == stamp:
+        return cached
 
-AI_INSIGHT_THRESHOLD = 0.78   # cosine similarity threshold for MiniLM
+    with open(path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    etag = '"' + hashlib.sha1(f"{source}:{stamp[0]}:{stamp[1]}".encode()).hexdigest()[:20] + '"'
+    cached = {"stamp": stamp, "etag": etag, "payload": payload}
+    _ai_insight_cache[source] = cached
+    return cached
 
-_ai_insight_cache = None
-_ai_insight_mtime = 0
 
 @app.get("/ai-insight")
-async def ai_insight():
-    global _ai_insight_cache, _ai_insight_mtime
+async def ai_insight(
+    request: Request,
+    source: str = DEFAULT_AI_INSIGHT_SOURCE,
+    model: str | None = None,
+    module: str | None = None,
+    limit: int | None = Query(None, ge=0),
+    offset: int = Query(0, ge=0),
+):
     """
-    Runs BERT semantic similarity on analytics.json using the
-    already-loaded BAAI/bge-m3 model.
+    Precomputed Similar VOC (Count) per (Model No. + Module) group.
 
-    For each unique (Model No. + Module) group:
-      - Picks the most-reported issue title as the representative VOC
-      - Computes cosine similarity between that VOC and every other title
-      - Counts how many exceed AI_INSIGHT_THRESHOLD => Similar VOC (Count)
-
-    Returns a JSON list sorted by count descending.
+    model / module  → case-insensitive exact filters on the group
+    limit / offset  → paging over the (count-descending) results
+    ETag / If-None-Match → 304 while the artifact is unchanged
     """
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    analytics_path = Path(BASE_DIR) / "downloads" / "samsung_members_voc" / "analytics.json"
+    if source not in AI_INSIGHT_SOURCES:
+        return JSONResponse(status_code=404, content={
+            "error": f"Unknown source '{source}'",
+            "sources": sorted(AI_INSIGHT_SOURCES),
+        })
 
-    # 1. Load analytics data
     try:
-        mtime = os.path.getmtime(analytics_path)
-        if _ai_insight_cache is not None and mtime == _ai_insight_mtime:
-            return JSONResponse(content=_ai_insight_cache)
-            
-        with open(analytics_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        artifact = await asyncio.to_thread(_load_ai_insight_artifact, source)
     except FileNotFoundError:
-        return JSONResponse(status_code=404, content={"error": f"analytics.json not found at {analytics_path}"})
+        return JSONResponse(status_code=404, content={
+            "error": f"AI insight for {source} has not been generated yet "
+                     f"(run RAG/generate_ai_insight.py {source})"
+        })
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
-    rows = []
-    for r in data.get("rows", []):
-        title = r.get("Title") or r.get("content") or r.get("Content") or ""
-        model = r.get("Model No.") or r.get("model") or ""
-        module = r.get("Module") or r.get("module") or ""
-        
-        if title and model and module:
-            mapped_row = r.copy()
-            mapped_row["Title"] = title
-            mapped_row["Model No."] = model
-            mapped_row["Module"] = module
-            rows.append(mapped_row)
-
-    if not rows:
-        return JSONResponse(status_code=400, content={"error": "No valid rows found in analytics.json"})
-
-    titles = [r["Title"] for r in rows]
-
-    # 2. Encode all titles using the in-RAM MiniLM model
-    # Offload encoding to a thread so we don't block the async loop
-    embeddings = await asyncio.to_thread(
-        embed_model_insight.encode,
-        titles,
-        normalize_embeddings=True,
-        show_progress_bar=False,
-        batch_size=32
-    )
-    embeddings = np.array(embeddings, dtype="float32")
-
-    # 3. Group by Model No. + Module
-    groups: dict[str, dict] = {}
-    for idx, row in enumerate(rows):
-        key = f"{row['Model No.']}|||{row['Module']}"
-        if key not in groups:
-            groups[key] = {
-                "model":      row["Model No."],
-                "module":     row["Module"],
-                "title_freq": {},
-                "title_idx":  {},
-            }
-        t = row["Title"].strip().lower()
-        groups[key]["title_freq"][t] = groups[key]["title_freq"].get(t, 0) + 1
-        groups[key]["title_idx"].setdefault(t, idx)
-
-    # 4. For each group pick rep VOC and count similarities
-    results = []
-
-    for g in groups.values():
-        # Representative VOC = most frequent title in the group
-        rep_title = max(g["title_freq"], key=g["title_freq"].get)
-        rep_idx   = g["title_idx"][rep_title]
-        rep_vec   = embeddings[rep_idx]                        # shape (1024,)
-
-        # Cosine similarity against all titles (embeddings already normalised)
-        scores = embeddings @ rep_vec                          # shape (n,)
-
-        # Find similar titles (excluding self)
-        similar_indices = np.where(scores >= AI_INSIGHT_THRESHOLD)[0]
-        similar_items = []
-        for i in similar_indices:
-            if i != rep_idx:
-                m = rows[i]["Model No."].strip()
-                mod = rows[i]["Module"].strip()
-                # Restrict matches to ONLY the exact same Model and Module
-                if m == g["model"] and mod == g["module"]:
-                    similar_items.append((m, rows[i]["Title"].strip()))
-
-        similar_count = len(similar_items)
-
-        # Deduplicate and count occurrences of each (model, title) pair
-        item_counts = {}
-        for m, t in similar_items:
-            key = f"{m.lower()}|||{t.lower()}"
-            if key not in item_counts:
-                item_counts[key] = {"model": m, "display": t, "count": 1}
-            else:
-                item_counts[key]["count"] += 1
-
-        # Format as list of objects for the table modal
-        unique_similar_titles = []
-        for t_info in sorted(item_counts.values(), key=lambda x: x["count"], reverse=True):
-            unique_similar_titles.append({
-                "model": t_info['model'],
-                "voc": t_info['display'],
-                "count": t_info['count']
-            })
-
-        voc_display = rep_title.capitalize()
+    etag = artifact["etag"]
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
 
-        results.append({
-            "model":  g["model"],
-            "module": g["module"],
-            "voc":    voc_display,
-            "count":  similar_count,
-            "similar_titles": unique_similar_titles
-        })
+    payload = artifact["payload"]
+    results = payload.get("results", [])
+    if model:
+        want = model.strip().lower()
+        results = [r for r in results if str(r.get("model", "")).strip().lower() == want]
+    if module:
+        want = module.strip().lower()
+        results = [r for r in results if str(r.get("module", "")).strip().lower() == want]
 
-    results.sort(key=lambda x: x["count"], reverse=True)
+    total_results = len(results)
+    end = None if limit is None else offset + limit
 
-    return {
-        "total_issues": len(rows),
-        "total_groups": len(results),
-        "threshold":    AI_INSIGHT_THRESHOLD,
-        "model_name":   "BAAI/bge-m3",
-        "results":      results,
-    }
+    body = {k: v for k, v in payload.items() if k != "results"}
+    body.update({
+        "total_results": total_results,
+        "offset":        offset,
+        "limit":         limit,
+        "results":       results[offset:end],
+    })
+    return JSONResponse(content=body, headers={"ETag": etag})
 
 
 # ── Entry point ───────────────────────────────────────────────────────────────
 
-if __name__ == "__main__":
+def main(host: str = "127.0.0.1", port: int = 5000):
+    _startup()
     uvicorn.run(
         app,
-        host="127.0.0.1",
-        port=5000,
+        host=host,
+        port=port,
         log_level="warning",   # change to "info" to see per-request logs
-    )
\ No newline at end of file
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -141,23 +141,35 @@ def generate_analytics_and_cache():
     print("[BUSY] Generating analytics and cache data...")
 
     try:
-        # Generate analytics for all modules
+        # Generate analytics for all modules — one aggregator run, folders
+        # processed in parallel (one worker per module, capped at CPU count)
         modules = ['employee_ut', 'global_voc_plm', 'beta_ut', 'beta_ut_voc', 'samsung_members_voc']
-
+        project_dir = os.path.dirname(os.path.abspath(__file__))
+        present = [m for m in modules if os.path.isdir(os.path.join(project_dir, 'downloads', m))]
         for module in modules:
-            print(f"[DATA] Generating analytics for {module}...")
+            if module not in present:
+                print(f"[WARN] No downloads/{module}/ folder — analytics skipped")
+
+        if present:
+            jobs = min(len(present), os.cpu_count() or 1)
+            print(f"[DATA] Generating analytics for {', '.join(present)} (jobs={jobs})...")
             try:
                 result = subprocess.run([
                     sys.executable, 'server/analytics/pandas_aggregator.py',
-                    module, '--save-json'
-                ], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+                    *present, '--jobs', str(jobs)
+                ], capture_output=True, text=True, cwd=project_dir)
+
+                # Per-folder status + timings reported by the aggregator
+                for line in result.stderr.splitlines():
+                    if line.strip().startswith('[TIME]'):
+                        print(f"[DATA] {line.strip()[len('[TIME]'):].strip()}")
 
                 if result.returncode == 0:
-                    print(f"[OK] Analytics generated for {module}")
+                    print("[OK] Analytics generated")
                 else:
-                    print(f"[WARN] Analytics generation failed for {module}: {result.stderr}")
+                    print(f"[WARN] Analytics generation failed: {result.stderr}")
             except Exception as e:
-                print(f"[ERROR] Error generating analytics for {module}: {e}")
+                print(f"[ERROR] Error generating analytics: {e}")
 
         # Generate central cache
         print("[BUSY] Generating central dashboard cache...")
@@ -173,6 +185,20 @@ def generate_analytics_and_cache():
         except Exception as e:
             print(f"[ERROR] Error generating central cache: {e}")
 
+        # Precompute AI insight artifacts (served as-is by the RAG server)
+        print("[AI] Generating AI insight artifacts...")
+        try:
+            result = subprocess.run([
+                sys.executable, 'RAG/generate_ai_insight.py'
+            ], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+            if result.returncode == 0:
+                print("[OK] AI insight artifacts generated")
+            else:
+                print(f"[WARN] AI insight generation failed: {result.stdout}{result.stderr}")
+        except Exception as e:
+            print(f"[ERROR] Error generating AI insight: {e}")
+
         print("[DONE] Analytics and cache generation completed")
 
         # Generate Semantic Matches
@@ -116,6 +116,13 @@ app.get('/modelName.json', (req, res) => {
 
 // serve frontend static files (adjust folder if your frontend is in 'public')
 app.use(express.static(path.join(__dirname, 'public')));
+// analytics.json is a summary + row store now; dashboards fetching the static
+// file still get the full document with "rows" (see readAnalyticsDocument)
+app.get('/downloads/:module/analytics.json', (req, res, next) => {
+  const doc = readAnalyticsDocument(req.params.module);
+  if (!doc || !doc.rowStore) return next();
+  res.type('application/json').send(composeLegacyAnalytics(doc));
+});
 app.use('/downloads', express.static('downloads'));
 
 // Configure multer for file uploads with security
@@ -905,7 +912,9 @@ function sendProgress(sessionId, data) {
 async function precomputeAnalytics(module, processedPath) {
   return new Promise((resolve, reject) => {
     const { spawn } = require('child_process');
-    const pythonProcess = spawn('python', ['server/analytics/pandas_aggregator.py', module, '--save-json']);
+    // --progressive: large uploads publish analytics.approx.json within
+    // seconds, served until the exact analytics.json is written
+    const pythonProcess = spawn('python', ['server/analytics/pandas_aggregator.py', module, '--save-json', '--progressive']);
 
     let stdout = '';
     let stderr = '';
@@ -927,6 +936,13 @@ async function precomputeAnalytics(module, processedPath) {
           console.warn('[WARNING] Central cache generation failed:', err.message)
         );
 
+        // Refresh the precomputed AI insight artifact for its sources
+        if (AI_INSIGHT_SOURCES.includes(module)) {
+          generateAiInsight(module).catch(err =>
+            console.warn('[WARNING] AI insight generation failed:', err.message)
+          );
+        }
+
         resolve();
       } else {
         console.warn(`[WARNING] Analytics precomputation failed for ${module}:`, stderr);
@@ -965,6 +981,32 @@ async function generateCentralCache() {
   });
 }
 
+// Sources with a precomputed AI insight artifact (downloads/<source>/ai_insight.json)
+const AI_INSIGHT_SOURCES = ['samsung_members_voc', 'global_voc_plm'];
+
+// Regenerate the AI insight artifact for one source
+async function generateAiInsight(source) {
+  return new Promise((resolve, reject) => {
+    const { spawn } = require('child_process');
+    const pythonProcess = spawn('python', ['RAG/generate_ai_insight.py', source]);
+
+    let stderr = '';
+
+    pythonProcess.stderr.on('data', (data) => {
+      stderr += data.toString();
+    });
+
+    pythonProcess.on('close', (code) => {
+      if (code === 0) {
+        console.log(`[SUCCESS] AI insight updated for ${source}`);
+      } else {
+        console.warn(`[WARNING] AI insight generation failed for ${source}:`, stderr);
+      }
+      resolve(); // Don't fail the whole process
+    });
+  });
+}
+
 // POST /api/cancel/:sessionId -> marks a session as cancelled and aborts active requests
 app.post('/api/cancel/:sessionId', (req, res) => {
   const sessionId = req.params.sessionId;
@@ -2282,28 +2324,387 @@ app.get('/api/central/source-model-summary', async (req, res) => {
   }
 });
 
+// ── Analytics row store ──────────────────────────────────────────────────────
+// pandas_aggregator --save-json writes downloads/<module>/analytics.json as a
+// small summary (kpis, top_models, categories, time_series, row_store) and the
+// raw rows to rows.ndjson (one JSON object per line) + rows.idx (little-endian
+// uint64 byte offsets, count + 1 entries). See server/analytics/row_store.py.
+const ROW_STORE_VERSION = 1;
+const ROWS_PAGE_DEFAULT = 100;
+const ROWS_PAGE_MAX = 5000;
+
+// Returns { dir, summaryText, summary, rowStore } or null if there is no analytics.json
+function readAnalyticsDocument(module) {
+  if (!/^[\w-]+$/.test(module)) return null;
+  const dir = path.join(__dirname, 'downloads', module);
+  const summaryPath = path.join(dir, 'analytics.json');
+  if (!fs.existsSync(summaryPath)) return null;
+
+  const summaryText = fs.readFileSync(summaryPath, 'utf8');
+  const summary = JSON.parse(summaryText);
+  const store = summary.row_store;
+  const rowStore = store && store.version === ROW_STORE_VERSION &&
+    fs.existsSync(path.join(dir, store.file)) ? store : null;
+  return { dir, summaryText, summary, rowStore };
+}
+
+// Full legacy document (summary + "rows": [...]) as JSON text, spliced from
+// the files without re-encoding the rows
+function composeLegacyAnalytics(doc) {
+  if (!doc.rowStore) return doc.summaryText;
+  const lines = fs.readFileSync(path.join(doc.dir, doc.rowStore.file), 'utf8');
+  const rows = lines.endsWith('\n') ? lines.slice(0, -1) : lines;
+  const head = doc.summaryText.trimEnd().slice(0, -1);   // drop the closing }
+  const sep = head.trim() === '{' ? '' : ',';
+  return `${head}${sep}"rows":[${rows.split('\n').join(',')}]}`;
+}
+
+function projectRow(row, fields) {
+  if (!fields) return row;
+  const out = {};
+  for (const f of fields) {
+    if (f in row) out[f] = row[f];
+  }
+  return out;
+}
+
+// where[Field]=value or where[Field][]=a&where[Field][]=b (values compared as strings)
+function rowMatches(row, where) {
+  for (const [field, accepted] of Object.entries(where)) {
+    const value = row[field] === null || row[field] === undefined ? '' : String(row[field]);
+    if (Array.isArray(accepted) ? !accepted.map(String).includes(value) : value !== String(accepted)) {
+      return false;
+    }
+  }
+  return true;
+}
+
+async function readRowsPage(doc, offset, limit, fields, where) {
+  const rowsPath = path.join(doc.dir, doc.rowStore.file);
+
+  if (!where) {
+    // Unfiltered: one byte range located through the offset index
+    const total = doc.rowStore.count;
+    const end = Math.min(total, offset + limit);
+    if (offset >= end) return { total, rows: [] };
+
+    const idx = await fs.promises.open(path.join(doc.dir, doc.rowStore.index), 'r');
+    const bounds = Buffer.alloc(8);
+    let start, stop;
+    try {
+      await idx.read(bounds, 0, 8, offset * 8);
+      start = Number(bounds.readBigUInt64LE(0));
+      await idx.read(bounds, 0, 8, end * 8);
+      stop = Number(bounds.readBigUInt64LE(0));
+    } finally {
+      await idx.close();
+    }
+
+    const fh = await fs.promises.open(rowsPath, 'r');
+    const blob = Buffer.alloc(stop - start);
+    try {
+      await fh.read(blob, 0, blob.length, start);
+    } finally {
+      await fh.close();
+    }
+    const rows = blob.toString('utf8').split('\n').slice(0, -1)
+      .map(line => projectRow(JSON.parse(line), fields));
+    return { total, rows };
+  }
+
+  // Filtered: stream the store, page over the matches, count all of them
+  const readline = require('readline');
+  const rl = readline.createInterface({ input: fs.createReadStream(rowsPath), crlfDelay: Infinity });
+  const rows = [];
+  let total = 0;
+  for await (const line of rl) {
+    if (!line) continue;
+    const row = JSON.parse(line);
+    if (!rowMatches(row, where)) continue;
+    if (total >= offset && rows.length < limit) rows.push(projectRow(row, fields));
+    total += 1;
+  }
+  return { total, rows };
+}
+
+// GET /api/analytics/:module/rows?offset=0&limit=100&fields=a,b&where[Field]=value
+//   -> { module, total, offset, limit, count, rows } (total = matching rows)
+app.get('/api/analytics/:module/rows', async (req, res) => {
+  try {
+    const module = req.params.module;
+    const doc = readAnalyticsDocument(module);
+    if (!doc) return res.status(404).json({ error: 'Analytics not found' });
+
+    const offset = Math.max(0, parseInt(req.query.offset, 10) || 0);
+    const requested = parseInt(req.query.limit, 10);
+    const limit = Math.min(ROWS_PAGE_MAX, Math.max(1, Number.isNaN(requested) ? ROWS_PAGE_DEFAULT : requested));
+    const fields = typeof req.query.fields === 'string' && req.query.fields
+      ? req.query.fields.split(',').map(f => f.trim()).filter(Boolean)
+      : null;
+    const where = req.query.where && typeof req.query.where === 'object' &&
+      Object.keys(req.query.where).length ? req.query.where : null;
+
+    let page;
+    if (doc.rowStore) {
+      page = await readRowsPage(doc, offset, limit, fields, where);
+    } else {
+      // Legacy analytics.json with embedded rows
+      const matching = (doc.summary.rows || []).filter(r => !where || rowMatches(r, where));
+      page = {
+        total: matching.length,
+        rows: matching.slice(offset, offset + limit).map(r => projectRow(r, fields))
+      };
+    }
+
+    res.json({ module, total: page.total, offset, limit, count: page.rows.length, rows: page.rows });
+  } catch (error) {
+    console.error('Analytics rows error:', error);
+    res.status(500).json({ error: error.message });
+  }
+});
+
+// ── Tier drill-down index ────────────────────────────────────────────────────
+// pandas_aggregator also writes drill.json (buckets: [tier, severity, status,
+// module, start, count]) and drill.bin (packed little-endian records: uint32
+// row id + float64 criticality_score, each bucket sorted by score desc, rows
+// without a score last). See server/analytics/drill_index.py.
+const DRILL_INDEX_VERSION = 1;
+const DRILL_RECORD_BYTES = 12;
+const DRILL_KEYS = ['tier', 'severity', 'status', 'module'];
+
+function drillAccepts(value, accepted) {
+  if (accepted === undefined) return true;
+  return Array.isArray(accepted) ? accepted.map(String).includes(value) : value === String(accepted);
+}
+
+async function readRowsAt(doc, ids, fields) {
+  const idx = await fs.promises.open(path.join(doc.dir, doc.rowStore.index), 'r');
+  const fh = await fs.promises.open(path.join(doc.dir, doc.rowStore.file), 'r');
+  const bounds = Buffer.alloc(16);
+  const rows = [];
+  try {
+    for (const id of ids) {
+      await idx.read(bounds, 0, 16, id * 8);
+      const start = Number(bounds.readBigUInt64LE(0));
+      const blob = Buffer.alloc(Number(bounds.readBigUInt64LE(8)) - start);
+      await fh.read(blob, 0, blob.length, start);
+      rows.push(projectRow(JSON.parse(blob.toString('utf8')), fields));
+    }
+  } finally {
+    await idx.close();
+    await fh.close();
+  }
+  return rows;
+}
+
+// Drill order: criticality_score desc, rows without a score last, then row id
+function compareDrillRecords(a, b) {
+  return (Number.isNaN(a.score) - Number.isNaN(b.score)) ||
+    ((Number.isNaN(b.score) ? 0 : b.score) - (Number.isNaN(a.score) ? 0 : a.score)) ||
+    (a.row - b.row);
+}
+
+// q: keep rows with q in one of their (projected) field values, case-insensitive.
+// Unlike a plain page this has to look at every row of the selected buckets,
+// so the row store is streamed once.
+async function searchDrillPage(doc, buckets, q, offset, limit, fields) {
+  const statusAt = DRILL_KEYS.indexOf('status');
+  const statusCounts = { open: 0, resolve: 0, close: 0, other: 0 };
+  const bucketOf = new Int32Array(doc.rowStore.count).fill(-1);
+  const scoreOf = new Float64Array(doc.rowStore.count);
+  const fh = await fs.promises.open(path.join(doc.dir, doc.summary.drill_index.records), 'r');
+  try {
+    for (let b = 0; b < buckets.length; b++) {
+      const [start, count] = buckets[b].slice(-2);
+      const buf = Buffer.alloc(count * DRILL_RECORD_BYTES);
+      await fh.read(buf, 0, buf.length, start * DRILL_RECORD_BYTES);
+      for (let o = 0; o < buf.length; o += DRILL_RECORD_BYTES) {
+        const row = buf.readUInt32LE(o);
+        bucketOf[row] = b;
+        scoreOf[row] = buf.readDoubleLE(o + 4);
+      }
+    }
+  } finally {
+    await fh.close();
+  }
+
+  const needle = q.toLowerCase();
+  const matches = [];
+  const readline = require('readline');
+  const rl = readline.createInterface({
+    input: fs.createReadStream(path.join(doc.dir, doc.rowStore.file)), crlfDelay: Infinity
+  });
+  let id = 0;
+  for await (const line of rl) {
+    const b = id < bucketOf.length ? bucketOf[id] : -1;
+    if (b >= 0) {
+      const data = projectRow(JSON.parse(line), fields);
+      const haystack = Object.values(data).map(v => (v === null || v === undefined ? '' : String(v)))
+        .join('\n').toLowerCase();
+      if (haystack.includes(needle)) {
+        statusCounts[buckets[b][statusAt]] += 1;
+        matches.push({ row: id, score: scoreOf[id], data });
+      }
+    }
+    id += 1;
+  }
+  matches.sort(compareDrillRecords);
+  return { total: matches.length, statusCounts, rows: matches.slice(offset, offset + limit).map(m => m.data) };
+}
+
+async function readDrillPage(doc, directory, filters, offset, limit, fields, q) {
+  const buckets = directory.buckets.filter(bucket => DRILL_KEYS.every((k, i) => drillAccepts(bucket[i], filters[k])));
+  if (q) return searchDrillPage(doc, buckets, q, offset, limit, fields);
+
+  const statusAt = DRILL_KEYS.indexOf('status');
+  const statusCounts = { open: 0, resolve: 0, close: 0, other: 0 };
+  const records = [];
+  const fh = await fs.promises.open(path.join(doc.dir, doc.summary.drill_index.records), 'r');
+  try {
+    for (const bucket of buckets) {
+      const [start, count] = bucket.slice(-2);
+      statusCounts[bucket[statusAt]] += count;
+      // each bucket is sorted: its first offset + limit records are enough
+      const take = Math.min(count, offset + limit);
+      const buf = Buffer.alloc(take * DRILL_RECORD_BYTES);
+      await fh.read(buf, 0, buf.length, start * DRILL_RECORD_BYTES);
+      for (let o = 0; o < buf.length; o += DRILL_RECORD_BYTES) {
+        records.push({ row: buf.readUInt32LE(o), score: buf.readDoubleLE(o + 4) });
+      }
+    }
+  } finally {
+    await fh.close();
+  }
+  records.sort(compareDrillRecords);
+  const ids = records.slice(offset, offset + limit).map(r => r.row);
+  const total = Object.values(statusCounts).reduce((a, b) => a + b, 0);
+  return { total, statusCounts, rows: await readRowsAt(doc, ids, fields) };
+}
+
+// GET /api/analytics/:module/drill?tier=Severe&severity=High&status=open&module=Camera
+//       &offset=0&limit=100&fields=a,b   (each key repeatable: tier=Severe&tier=Moderate)
+//       &q=text   (optional: rows containing text in a returned field)
+//   -> { module, total, status_counts, offset, limit, count, rows } sorted by
+//      criticality_score; without q only the page's rows are read.
+app.get('/api/analytics/:module/drill', async (req, res) => {
+  try {
+    const module = req.params.module;
+    const doc = readAnalyticsDocument(module);
+    if (!doc) return res.status(404).json({ error: 'Analytics not found' });
+
+    const offset = Math.max(0, parseInt(req.query.offset, 10) || 0);
+    const requested = parseInt(req.query.limit, 10);
+    const limit = Math.min(ROWS_PAGE_MAX, Math.max(1, Number.isNaN(requested) ? ROWS_PAGE_DEFAULT : requested));
+    const fields = typeof req.query.fields === 'string' && req.query.fields
+      ? req.query.fields.split(',').map(f => f.trim()).filter(Boolean)
+      : null;
+    const filters = {};
+    for (const k of DRILL_KEYS) {
+      if (req.query[k] !== undefined) filters[k] = req.query[k];
+    }
+    const q = typeof req.query.q === 'string' ? req.query.q.trim() : '';
+
+    const desc = doc.summary.drill_index;
+    const dirPath = desc ? path.join(doc.dir, desc.file) : null;
+    if (doc.rowStore && desc && desc.version === DRILL_INDEX_VERSION && fs.existsSync(dirPath)) {
+      const directory = JSON.parse(fs.readFileSync(dirPath, 'utf8'));
+      if (directory.count === doc.rowStore.count) {
+        const page = await readDrillPage(doc, directory, filters, offset, limit, fields, q);
+        return res.json({ module, total: page.total, status_counts: page.statusCounts, offset, limit,
+                          count: page.rows.length, rows: page.rows });
+      }
+    }
+
+    // No (current) index: drill_index.py builds the buckets from the rows
+    const args = ['server/analytics/drill_index.py', doc.dir, '--offset', String(offset), '--limit', String(limit)];
+    for (const [k, v] of Object.entries(filters)) {
+      for (const value of [].concat(v)) args.push(`--${k}`, String(value));
+    }
+    if (fields) args.push('--fields', fields.join(','));
+    if (q) args.push('--q', q);
+    const { spawn } = require('child_process');
+    const pythonProcess = spawn('python', args);
+    let stdout = '';
+    let stderr = '';
+    pythonProcess.stdout.on('data', (data) => { stdout += data.toString(); });
+    pythonProcess.stderr.on('data', (data) => { stderr += data.toString(); });
+    pythonProcess.on('close', () => {
+      try {
+        const page = JSON.parse(stdout);
+        if (page.error) return res.status(500).json({ error: page.error });
+        res.json({ module, total: page.total, status_counts: page.status_counts, offset, limit,
+                   count: page.rows.length, rows: page.rows });
+      } catch (e) {
+        console.error('Drill-down error:', stderr);
+        res.status(500).json({ error: 'Drill-down query failed' });
+      }
+    });
+  } catch (error) {
+    console.error('Analytics drill-down error:', error);
+    res.status(500).json({ error: error.message });
+  }
+});
+
+// pandas_aggregator --progressive writes downloads/<module>/analytics.approx.json
+// (summary with an "approximate" block: estimated tier KPIs and their error
+// bounds) before scoring a large upload, and removes it once analytics.json
+// is written. See server/analytics/approx_kpis.py.
+const APPROX_VERSION = 1;
+
+// The approximate summary if one is published for the current inputs, else null
+function readApproximateAnalytics(module) {
+  const approxPath = path.join(__dirname, 'downloads', module, 'analytics.approx.json');
+  try {
+    const latestInput = getLatestInputMtime(module);
+    if (!latestInput || fs.statSync(approxPath).mtime < latestInput) return null;
+    const summary = JSON.parse(fs.readFileSync(approxPath, 'utf8'));
+    return summary.approximate && summary.approximate.version === APPROX_VERSION ? summary : null;
+  } catch (err) {
+    return null;
+  }
+}
+
 // GET /api/analytics/:module -> returns pre-aggregated analytics for dashboards
+//   ?summary=1 -> summary only (no rows); use /api/analytics/:module/rows to page rows
+//   While a progressive run is scoring, the approximate summary is returned
+//   (no rows, "approximate" set); poll until "approximate" is gone.
 app.get('/api/analytics/:module', async (req, res) => {
   const module = req.params.module;
+  if (!/^[\w-]+$/.test(module)) {
+    return res.status(400).json({ error: 'Invalid module' });
+  }
   const analyticsPath = path.join(__dirname, 'downloads', module, 'analytics.json');
+  const summaryOnly = req.query.summary === '1' || req.query.summary === 'true';
 
   // Check if analytics.json exists and is newer than latest Excel
   if (fs.existsSync(analyticsPath)) {
     try {
       const analyticsStat = fs.statSync(analyticsPath);
-      const latestExcel = getLatestExcelFile(module);
+      const latestInput = getLatestInputMtime(module);
 
-      if (latestExcel && analyticsStat.mtime >= fs.statSync(latestExcel).mtime) {
+      if (latestInput && analyticsStat.mtime >= latestInput) {
         // Cache is fresh, return it directly
         console.log(`Serving cached analytics for ${module}`);
-        const cachedData = JSON.parse(fs.readFileSync(analyticsPath, 'utf8'));
-        return res.json(cachedData);
+        const doc = readAnalyticsDocument(module);
+        if (summaryOnly) {
+          const { rows, ...summary } = doc.summary;
+          return res.json(summary);
+        }
+        return res.type('application/json').send(composeLegacyAnalytics(doc));
       }
     } catch (err) {
       console.warn('Cache read failed, falling back to computation:', err.message);
     }
   }
 
+  // A progressive run is still scoring the new inputs: serve its estimate
+  // instead of starting a second full run
+  const approx = readApproximateAnalytics(module);
+  if (approx) {
+    console.log(`Serving approximate analytics for ${module}`);
+    return res.json(summaryOnly ? approx : { ...approx, rows: [] });
+  }
+
   // Fallback to on-demand computation
   console.log(`Computing analytics for ${module}`);
   const { spawn } = require('child_process');
@@ -2336,6 +2737,7 @@ app.get('/api/analytics/:module', async (req, res) => {
           return res.status(500).json({ error: result.error });
         }
       }
+      if (summaryOnly) delete result.rows;
       res.json(result);
     } catch (e) {
       console.error('JSON parse error from analytics:', e);
@@ -2344,25 +2746,150 @@ app.get('/api/analytics/:module', async (req, res) => {
   });
 });
 
-// Helper function to get latest Excel file for cache validation
-function getLatestExcelFile(module) {
+// POST /api/what-if/:module -> re-score a module with new weights / tier thresholds
+//   body: { schema1_weights?, schema2_weights?, tier_thresholds?, issues? }
+//   Uses the stored per-issue dimension matrices (server/analytics/what_if.py),
+//   so no workbook is parsed and no similarity is recomputed.
+app.post('/api/what-if/:module', (req, res) => {
+  const module = req.params.module;
+  if (!/^[\w-]+$/.test(module)) {
+    return res.status(400).json({ error: 'Invalid module' });
+  }
+  const moduleDir = path.join(__dirname, 'downloads', module);
+  if (!fs.existsSync(moduleDir)) {
+    return res.status(404).json({ error: 'Module not found' });
+  }
+
+  const { schema1_weights, schema2_weights, tier_thresholds, issues } = req.body || {};
+  const args = ['server/analytics/what_if.py', moduleDir];
+  if (schema1_weights) args.push('--schema1-weights', JSON.stringify(schema1_weights));
+  if (schema2_weights) args.push('--schema2-weights', JSON.stringify(schema2_weights));
+  if (tier_thresholds) args.push('--thresholds', JSON.stringify(tier_thresholds));
+  if (issues) args.push('--issues');
+
+  const { spawn } = require('child_process');
+  const pythonProcess = spawn('python', args);
+
+  let stdout = '';
+  let stderr = '';
+
+  pythonProcess.stdout.on('data', (data) => {
+    stdout += data.toString();
+  });
+
+  pythonProcess.stderr.on('data', (data) => {
+    stderr += data.toString();
+  });
+
+  pythonProcess.on('close', (code) => {
+    try {
+      const result = JSON.parse(stdout);
+      if (result.error) {
+        return res.status(code === 0 ? 500 : 400).json({ error: result.error });
+      }
+      res.json(result);
+    } catch (e) {
+      console.error('What-if re-scoring error:', stderr);
+      res.status(500).json({ error: 'What-if re-scoring failed' });
+    }
+  });
+});
+
+// GET /api/moved-issues/:module -> moved_issues_updated_file.xlsx exports of a module
+//   ?file=<input workbook> downloads that workbook's export; without it the
+//   exports of every issue-schema input are listed. Exports are written on
+//   demand and reused while the input is unchanged (server/analytics/moved_export.py).
+app.get('/api/moved-issues/:module', (req, res) => {
+  const module = req.params.module;
+  if (!/^[\w-]+$/.test(module)) {
+    return res.status(400).json({ error: 'Invalid module' });
+  }
+  const moduleDir = path.join(__dirname, 'downloads', module);
+  if (!fs.existsSync(moduleDir)) {
+    return res.status(404).json({ error: 'Module not found' });
+  }
+
+  const file = req.query.file;
+  if (file !== undefined && (typeof file !== 'string' || path.basename(file) !== file || !/\.xlsx?$/i.test(file))) {
+    return res.status(400).json({ error: 'Invalid file' });
+  }
+  const args = ['server/analytics/moved_export.py', moduleDir];
+  if (file) args.push('--file', file);
+
+  const { spawn } = require('child_process');
+  const pythonProcess = spawn('python', args);
+
+  let stdout = '';
+  let stderr = '';
+
+  pythonProcess.stdout.on('data', (data) => {
+    stdout += data.toString();
+  });
+
+  pythonProcess.stderr.on('data', (data) => {
+    stderr += data.toString();
+  });
+
+  pythonProcess.on('close', (code) => {
+    let result;
+    try {
+      result = JSON.parse(stdout);
+    } catch (e) {
+      console.error('Moved-issues export error:', stderr);
+      return res.status(500).json({ error: 'Moved-issues export failed' });
+    }
+    if (result.error) {
+      return res.status(code === 0 ? 500 : 404).json({ error: result.error });
+    }
+    if (!file) {
+      return res.json(result);
+    }
+    const entry = result[0];
+    if (!entry || !entry.output) {
+      return res.status(422).json({ error: (entry && (entry.skipped || entry.error)) || 'No export for this file' });
+    }
+    res.download(entry.output, path.basename(entry.output));
+  });
+});
+
+// Helper: mtime of the newest canonical input of a module, for cache validation.
+// Kinds come from downloads/<module>/__inputs__/manifest.json (written by
+// server/analytics/input_manifest.py); workbooks not in it yet are classified
+// by name with the same rules. Cleaned / derived workbooks are ignored — the
+// moved-issues exports are written after analytics.json, so counting them
+// made every cache look stale. Archived inputs count with their original mtime.
+function classifyWorkbook(name) {
+  if (name.startsWith('~$')) return null;
+  const lower = name.toLowerCase();
+  if (lower.endsWith('moved_issues_updated_file.xlsx')) return 'derived';
+  if (path.parse(lower).name.endsWith('_cleaned')) return 'cleaned';
+  return 'input';
+}
+
+function getLatestInputMtime(module) {
   const moduleDir = path.join(__dirname, 'downloads', module);
   if (!fs.existsSync(moduleDir)) return null;
 
   try {
-    const files = fs.readdirSync(moduleDir)
-      .filter(f => f.endsWith('.xlsx') || f.endsWith('.xls'))
-      .map(f => path.join(moduleDir, f))
-      .filter(f => fs.existsSync(f));
-
-    if (files.length === 0) return null;
-
-    // Return the most recently modified file
-    return files.reduce((latest, current) => {
-      const latestStat = fs.statSync(latest);
-      const currentStat = fs.statSync(current);
-      return currentStat.mtime > latestStat.mtime ? current : latest;
-    });
+    let manifest = { files: {}, archive: {} };
+    const manifestPath = path.join(moduleDir, '__inputs__', 'manifest.json');
+    if (fs.existsSync(manifestPath)) {
+      manifest = { ...manifest, ...JSON.parse(fs.readFileSync(manifestPath, 'utf8')) };
+    }
+
+    let latest = null;
+    for (const f of fs.readdirSync(moduleDir)) {
+      if (!(f.endsWith('.xlsx') || f.endsWith('.xls'))) continue;
+      const kind = (manifest.files[f] && manifest.files[f].kind) || classifyWorkbook(f);
+      if (kind !== 'input') continue;
+      const mtime = fs.statSync(path.join(moduleDir, f)).mtime;
+      if (!latest || mtime > latest) latest = mtime;
+    }
+    for (const entry of Object.values(manifest.archive || {})) {
+      const mtime = new Date(Number(entry.mtime_ns) / 1e6);
+      if (!latest || mtime > latest) latest = mtime;
+    }
+    return latest;
   } catch (err) {
     return null;
   }
@@ -3049,13 +3576,28 @@ async function processUpdateKB(req, res) {
 }
 
 // GET /api/ai-insight -> forwards to python RAG API
+// Serves the precomputed artifact; query params (source, model, module,
+// limit, offset) and ETag revalidation are passed through unchanged.
 app.get('/api/ai-insight', (req, res) => {
   const http = require('http');
-  const request = http.get('http://127.0.0.1:5000/ai-insight', (response) => {
+  const params = new URLSearchParams({ source: req.query.source || 'samsung_members_voc' });
+  for (const key of ['model', 'module', 'limit', 'offset']) {
+    if (req.query[key] !== undefined) params.set(key, req.query[key]);
+  }
+  const headers = {};
+  if (req.headers['if-none-match']) headers['If-None-Match'] = req.headers['if-none-match'];
+
+  const request = http.get(`http://127.0.0.1:5000/ai-insight?${params}`, { headers }, (response) => {
+    if (response.statusCode === 304) {
+      res.set('ETag', response.headers.etag);
+      return res.status(304).end();
+    }
     if (response.statusCode !== 200) {
       return res.status(response.statusCode).json({ error: `RAG API error: HTTP ${response.statusCode}` });
     }
-    res.writeHead(200, { 'Content-Type': 'application/json' });
+    const outHeaders = { 'Content-Type': 'application/json' };
+    if (response.headers.etag) outHeaders['ETag'] = response.headers.etag;
+    res.writeHead(200, outHeaders);
     response.pipe(res);
   });
 
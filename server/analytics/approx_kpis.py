@@ -0,0 +1,311 @@
+"""
+approx_kpis.py
+==============
+Approximate analytics summary published while a large upload is scored.
+
+A new workbook of a few hundred thousand issues is parsed in seconds, but
+its full pandas_aggregator run (TF-IDF similar-bug counting, per-file
+partials, row store) takes minutes, and until now the dashboard had nothing
+to show meanwhile. With --progressive, _process_folder first writes
+
+    downloads/<module>/analytics.approx.json
+
+— the analytics.json summary (kpis, top_models, categories, time_series)
+plus an "approximate" block — and removes it once the exact analytics.json
+is written (or the run fails). server.js serves it while analytics.json is
+missing or older than the inputs.
+
+Only the part that needs scoring is estimated. Everything counted on the raw
+rows (total_rows, status / source distributions, open / resolved / close,
+top_models, categories, time_series) is computed exactly on the parsed
+frame, as the full run does. The tier-scaled severity_distribution (and
+high_issues) is estimated from a stratified sample of the files that are
+not covered by stored partials; files whose partials are reused contribute
+their exact tier cells.
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+SAMPLE AND ESTIMATOR
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    strata      file × Severity × Progr.Stat. group (open / resolve /
+                close / other), proportional allocation of SAMPLE_ROWS,
+                at least 2 rows per stratum, random rows within a stratum
+    scoring     score_criticality_frame() on each file's sample; the
+                similar-bug dimension is scaled by (N - 1) / (n - 1) of the
+                file before the weights are applied (a title's neighbours
+                in a uniform sample scale with the sampling fraction), then
+                tiers / updated_tier as in the full run
+    estimate    Σ N_h · p_h per severity cell, p_h the stratum's sample share
+    bounds      ± Z · sqrt(Σ N_h² (1 - n_h/N_h) p̃_h (1 - p̃_h) / (n_h - 1)),
+                p̃_h = (c_h + 1) / (n_h + 2), clipped to [0, rows]
+
+The bounds cover the sampling error only, not the error of the scaled
+similar-bug counts, nor rows moved by the full run's cross-file Case Code
+join (files sharing Case Codes: the tier of the last file wins for all).
+
+Unscoreable and VOC files are counted exactly (all rows Deferred, as the
+full run does).
+
+Usage:
+  python server/analytics/approx_kpis.py <module|folder> [--sample N] [--seed S]
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
+
+import json_io
+import schemas
+from extract_criticality import _effective_config, score_criticality_frame
+from kpi_kernel import (
+    apply_tier_lookups,
+    tier_lookups,
+    tier_severity_cells,
+    tier_severity_from_cells,
+)
+from what_if import _DIMENSIONS, _TIERS, scores, tier_codes
+
+APPROX_FILE = "analytics.approx.json"
+
+# Bump when the "approximate" block changes (checked by server.js as well)
+APPROX_VERSION = 1
+
+# Rows scored for the estimate (over all files being scored)
+SAMPLE_ROWS = 10000
+
+# --progressive publishes an estimate only when at least this many rows
+# have to be scored; smaller runs finish quickly anyway
+MIN_ROWS = 50000
+
+# Two-sided 95 % normal quantile
+CONFIDENCE = 0.95
+Z = 1.96
+
+_STATUS_KEYS = ('open', 'resolve', 'close')
+_BUCKETS     = ('High', 'Medium', 'Low')
+
+
+# ── Sampling ──────────────────────────────────────────────────────────────────
+
+
+def strata(frame: pd.DataFrame) -> np.ndarray:
+    """Stratum code per row: Severity (stripped) × Progr.Stat. group."""
+    def _col(name):
+        if name not in frame.columns:
+            return pd.Series('', index=frame.index)
+        return frame[name].astype(str)
+
+    slot = _col('Progr.Stat.').str.lower()
+    group = np.select([slot.str.startswith(s) for s in _STATUS_KEYS], list(_STATUS_KEYS), 'other')
+    keys = _col('Severity').str.strip() + '|' + group
+    return pd.factorize(keys.to_numpy(dtype=object))[0]
+
+
+def stratified_sample(codes: np.ndarray, n: int, rng) -> np.ndarray:
+    """
+    Sorted row positions of a proportional stratified sample of about n rows
+    (at least 2 per stratum, whole strata when smaller).
+    """
+    sizes = np.bincount(codes)
+    alloc = np.minimum(sizes, np.maximum(2, np.rint(n * sizes / max(len(codes), 1)).astype(np.int64)))
+    perm = rng.permutation(len(codes))
+    rank = pd.Series(codes[perm]).groupby(codes[perm]).cumcount().to_numpy()
+    return np.sort(perm[rank < alloc[codes[perm]]])
+
+
+# ── Estimation ────────────────────────────────────────────────────────────────
+
+
+def _sample_tiers(sample: pd.DataFrame, factor: float) -> pd.DataFrame:
+    """
+    sample with tier / updated_tier as the full run would assign them, the
+    similar-bug dimension scaled by `factor`. Unscoreable / VOC samples get
+    the full run's fallback (every row Deferred).
+    """
+    sample = sample.copy()
+    try:
+        if schemas.detect_schema(sample.columns) == schemas.VOC:
+            raise ValueError("VOC export")
+        scored = score_criticality_frame(sample)
+    except Exception:
+        return apply_tier_lookups(sample, {}, {})
+
+    schema = scored['schema']
+    names  = list(_DIMENSIONS[schema])
+    values = scored['dimensions'].copy()
+    sim    = names.index('similar')
+    values[:, sim] = np.minimum(values[:, sim] * factor, 1.0)
+
+    conf  = _effective_config()
+    score = scores({'schema': schema, 'weight_names': names, 'values': values}, conf[schema]['weights'])
+    tiers = np.asarray(_TIERS, dtype=object)[tier_codes(score, conf['thr'])]
+
+    active = scored['active']
+    codes  = active['Case Code'].tolist() if 'Case Code' in active.columns else [None] * len(active)
+    issues = [{'Case Code': c, 'tier': t, 'criticality_score': s}
+              for c, t, s in zip(codes, tiers.tolist(), score.tolist())]
+    return apply_tier_lookups(sample, *tier_lookups(issues))
+
+
+def _cell_counts(df: pd.DataFrame) -> np.ndarray:
+    """15 counts: the 3 × 4 updated_tier × status cells, then the 3 bucket totals."""
+    cells = tier_severity_cells(df)
+    return np.concatenate([cells.ravel(), cells.sum(axis=1)]).astype(float)
+
+
+def _file_terms(frame: pd.DataFrame, n: int, rng) -> tuple:
+    """(Σ N_h p_h, Σ variance terms) of the 15 counts of one file from a sample of ~n rows."""
+    if n >= len(frame):
+        return _cell_counts(_sample_tiers(frame, 1.0)), np.zeros(15)
+
+    codes = strata(frame)
+    rows  = stratified_sample(codes, n, rng)
+    factor = (len(frame) - 1) / max(len(rows) - 1, 1)
+    sample = _sample_tiers(frame.iloc[rows], factor)
+
+    est, var = np.zeros(15), np.zeros(15)
+    sizes = np.bincount(codes)
+    sample_codes = codes[rows]
+    for h in np.unique(sample_codes):
+        in_h = sample_codes == h
+        n_h, big_n = int(in_h.sum()), int(sizes[h])
+        counts = _cell_counts(sample[in_h])
+        est += big_n * counts / n_h
+        if n_h < big_n and n_h > 1:
+            p = (counts + 1) / (n_h + 2)
+            var += big_n ** 2 * (1 - n_h / big_n) * p * (1 - p) / (n_h - 1)
+    return est, var
+
+
+def estimate_severity_distribution(frames: dict, exact_cells: list = (), sample_rows: int = SAMPLE_ROWS,
+                                   seed: int = 0) -> dict:
+    """
+    Estimated severity_distribution of the raw frames ({path: DataFrame},
+    the files still to be scored) plus `exact_cells` (the 3 × 4 tier_cells
+    of the files already scored, as stored in their partials).
+
+    Returns {severity_distribution, bounds, sample_rows, rows}: the
+    distribution rounded like the exact one, bounds {bucket: {key: [low, high]}}.
+    """
+    rng = np.random.default_rng(seed)
+    total = sum(len(f) for f in frames.values())
+    exact = np.zeros(15)
+    for cells in exact_cells:
+        cells = np.asarray(cells, dtype=float).reshape(3, 4)
+        exact += np.concatenate([cells.ravel(), cells.sum(axis=1)])
+
+    est, var, sampled = exact.copy(), np.zeros(15), 0
+    for frame in frames.values():
+        n = int(round(sample_rows * len(frame) / total)) if total else 0
+        file_est, file_var = _file_terms(frame, n, rng)
+        est += file_est
+        var += file_var
+        sampled += min(n, len(frame))
+
+    rows = int(exact[12:].sum()) + total
+    half = Z * np.sqrt(var)
+    low  = np.clip(np.floor(est - half), 0, rows).astype(int)
+    high = np.clip(np.ceil(est + half), 0, rows).astype(int)
+
+    # integer cells that add up to the row count (largest remainder)
+    cells = np.floor(est[:12]).astype(int)
+    short = rows - int(cells.sum())
+    if short > 0:
+        cells[np.argsort(-(est[:12] - cells), kind='stable')[:short]] += 1
+
+    distribution = tier_severity_from_cells(cells)
+    bounds = {}
+    for b, bucket in enumerate(_BUCKETS):
+        bounds[bucket] = {'total': [int(low[12 + b]), int(high[12 + b])]}
+        for s, key in enumerate(_STATUS_KEYS):
+            bounds[bucket][key] = [int(low[b * 4 + s]), int(high[b * 4 + s])]
+    return {
+        'severity_distribution': distribution,
+        'bounds':                bounds,
+        'sample_rows':           sampled,
+        'rows':                  rows,
+    }
+
+
+# ── Publishing ────────────────────────────────────────────────────────────────
+
+
+def approximate_block(estimate: dict, seconds: float) -> dict:
+    """The "approximate" block of analytics.approx.json."""
+    return {
+        'version':      APPROX_VERSION,
+        'method':       'stratified sample',
+        'strata':       ['file', 'Severity', 'Progr.Stat.'],
+        'sample_rows':  estimate['sample_rows'],
+        'scored_rows':  estimate['rows'],
+        'confidence':   CONFIDENCE,
+        'estimated':    ['high_issues', 'severity_distribution'],
+        'error_bounds': {
+            'high_issues':           estimate['bounds']['High']['total'],
+            'severity_distribution': estimate['bounds'],
+        },
+        'seconds':      round(seconds, 2),
+    }
+
+
+def publish(folder, summary: dict) -> Path:
+    """Write analytics.approx.json (atomically)."""
+    path = Path(folder) / APPROX_FILE
+    json_io.dump(summary, path)
+    return path
+
+
+def clear(folder) -> None:
+    """Remove analytics.approx.json (the exact summary is written, or the run failed)."""
+    try:
+        (Path(folder) / APPROX_FILE).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def main(argv=None) -> int:
+    import argparse
+    import input_manifest
+    parser = argparse.ArgumentParser(description="Estimate a module's severity_distribution from a sample")
+    parser.add_argument("folder", help="downloads/<module> folder (or module name)")
+    parser.add_argument("--sample", type=int, default=SAMPLE_ROWS, help="rows to score")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    try:
+        folder = input_manifest._resolve_folder(args.folder)
+        frames = {p: input_manifest.read_input(p) for p in input_manifest.canonical_inputs(folder)}
+    except (OSError, ValueError) as e:
+        sys.stdout.write(json_io.dumps({'error': str(e)}, ensure_ascii=True))
+        return 1
+
+    start = time.perf_counter()
+    estimate = estimate_severity_distribution(frames, sample_rows=args.sample, seed=args.seed)
+    report = dict(estimate, seconds=round(time.perf_counter() - start, 2))
+
+    # compare with the exact figures of the last full run, if any
+    try:
+        exact = json_io.load(folder / "analytics.json")['kpis']['severity_distribution']
+    except (OSError, ValueError, KeyError):
+        exact = None
+    if exact is not None:
+        report['exact'] = exact
+        report['within_bounds'] = all(
+            lo <= exact[b][k] <= hi
+            for b, keys in estimate['bounds'].items() for k, (lo, hi) in keys.items()
+        )
+    sys.stderr.write(f"  [TIME]  {estimate['sample_rows']} of {estimate['rows']} rows "
+                     f"scored in {report['seconds']:.2f}s\n")
+    sys.stdout.write(json_io.dumps(report, ensure_ascii=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
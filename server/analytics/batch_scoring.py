@@ -0,0 +1,303 @@
+"""
+batch_scoring.py
+================
+Multi-file extract_criticality scoring with one config.
+
+Callers that need many workbooks scored (pandas_aggregator, reports) looped
+over the paths and ran extract_criticality_data() one file after another.
+score_files() takes the whole batch — paths, loaded frames, or both — with
+one set of overrides:
+
+    1. detects each file's schema (header-only read for workbooks);
+       VOC exports are skipped, unknown schemas fail like a single call
+    2. scores the issue-schema files, in a process pool when jobs > 1
+    3. returns the per-file extract_criticality_data() results (and,
+       keep_scored=True, the score_criticality_frame() dicts) together with
+       the merged severity breakdown
+
+Per-file results are exactly those of extract_criticality_data() on each
+file alone; workbook paths go through the score cache (score_cache.py).
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+SHARED VOCABULARY  (opt-in: shared_vocabulary=True)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Files of the same schema are scored as one corpus: one TF-IDF fit and one
+similar-bug pass per schema, so a title's similar_bug_count (and the
+Issue Type + Sub-Issue Type combo count) includes its matches in the
+other files. The scored rows are then split back per file (original
+index, per-file severity breakdown); config_used.similar_bug_config
+carries 'shared_vocabulary': True. A file's scores now depend on the
+other files of the batch, so this mode is not cached and not used by
+pandas_aggregator's per-file partials.
+
+Usage:
+  python server/analytics/batch_scoring.py <module|folder|workbook> [...]
+         [--jobs N] [--shared-vocabulary] [--json]
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
+
+import input_manifest
+import json_io
+import schemas
+from excel_cache import read_excel_headers
+from extract_criticality import extract_criticality_data, score_criticality_frame
+
+_SEVERITIES = ('High', 'Medium', 'Low')
+_COUNTS     = ('total', 'open', 'resolve', 'close')
+
+
+def merge_severity_breakdowns(breakdowns) -> dict:
+    """Sum of extract_criticality severity_breakdown dicts (High keeps moved_to_medium)."""
+    merged = {}
+    for breakdown in breakdowns:
+        for sev in _SEVERITIES:
+            entry = breakdown.get(sev)
+            if not entry:
+                continue
+            dest = merged.setdefault(sev, {k: 0 for k in _COUNTS})
+            for k in _COUNTS:
+                dest[k] += entry.get(k, 0)
+            if 'moved_to_medium' in entry:
+                moved = dest.setdefault('moved_to_medium', {'moderate': 0, 'deferred': 0})
+                for k in ('moderate', 'deferred'):
+                    moved[k] += entry['moved_to_medium'].get(k, 0)
+    return merged
+
+
+# ── Inputs ────────────────────────────────────────────────────────────────────
+
+
+def _items(sources) -> list:
+    """
+    [(key, path, frame)] of a list of paths / frames (key: the path, or the
+    position of a frame) or a {key: path | frame} mapping. A frame keyed by
+    a path (as load_folder_frames returns) keeps that path as its source.
+    """
+    if isinstance(sources, dict):
+        pairs = list(sources.items())
+    else:
+        pairs = [(i if isinstance(s, pd.DataFrame) else s, s) for i, s in enumerate(sources)]
+    items = []
+    for key, source in pairs:
+        if isinstance(source, pd.DataFrame):
+            path = key if isinstance(key, (str, Path)) else None
+            items.append((key, path, source))
+        else:
+            items.append((key, source, None))
+    return items
+
+
+def _schema(path, frame) -> tuple:
+    """(schema, frame) — header-only for workbooks; archives are read whole."""
+    if frame is None and input_manifest.is_archived(path):
+        frame = input_manifest.read_input(path)
+    columns = frame.columns if frame is not None else read_excel_headers(path)
+    return schemas.detect_schema(columns), frame
+
+
+# ── Per-file scoring ──────────────────────────────────────────────────────────
+
+
+def _score_one(task: tuple) -> tuple:
+    """
+    Pool worker: one file → (key, schema, result, scored, error). result is
+    None for skipped (VOC) and failed files.
+    """
+    key, path, frame, overrides, keep_scored = task
+    schema = None
+    try:
+        schema, frame = _schema(path, frame)
+        if schema == schemas.VOC:
+            return key, schema, None, None, None
+        if frame is None and not keep_scored:
+            return key, schema, extract_criticality_data(str(path), **overrides), None, None
+        if frame is None:
+            frame = input_manifest.read_input(path)
+        scored = score_criticality_frame(frame, source=path, **overrides)
+        result = extract_criticality_data(frame, scored=scored)
+        return key, schema, result, scored if keep_scored else None, None
+    except Exception as e:
+        return key, schema, None, None, str(e)
+
+
+def _score_each(items: list, overrides: dict, jobs: int, keep_scored: bool) -> list:
+    tasks = [(key, path, frame, overrides, keep_scored) for key, path, frame in items]
+    if jobs > 1 and len(tasks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+                return list(pool.map(_score_one, tasks))
+        except (OSError, RuntimeError) as e:
+            sys.stderr.write(f"Warning: scoring pool failed ({e}), scoring files serially\n")
+    return [_score_one(t) for t in tasks]
+
+
+# ── Shared vocabulary ─────────────────────────────────────────────────────────
+
+
+def _split(scored: dict, file_of: np.ndarray, offsets: np.ndarray, i: int, total_input: int) -> dict:
+    """Rows of file i of a corpus score_criticality_frame() result, original index."""
+    def _rows(df: pd.DataFrame) -> pd.DataFrame:
+        mask = file_of[df.index.to_numpy()] == i
+        return df[mask].set_axis(df.index[mask] - offsets[i])
+
+    in_file = file_of[scored['active'].index.to_numpy()] == i
+    return dict(
+        scored,
+        active=_rows(scored['active']),
+        excluded=_rows(scored['excluded']),
+        total_input=total_input,
+        dimensions=scored['dimensions'][in_file],
+        sim_cfg=dict(scored['sim_cfg'], shared_vocabulary=True),
+    )
+
+
+def _score_shared(items: list, overrides: dict, jobs: int, keep_scored: bool) -> list:
+    """Files of each schema scored as one corpus, split back per file."""
+    out, groups = [], {}
+    for key, path, frame in items:
+        try:
+            schema, frame = _schema(path, frame)
+            if schema == schemas.VOC:
+                out.append((key, schema, None, None, None))
+                continue
+            if frame is None:
+                frame = input_manifest.read_input(path)
+        except Exception as e:
+            out.append((key, None, None, None, str(e)))
+            continue
+        groups.setdefault(schema, []).append((key, frame))
+
+    for schema, group in groups.items():
+        frames  = [frame for _, frame in group]
+        lengths = np.array([len(f) for f in frames])
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        file_of = np.repeat(np.arange(len(frames)), lengths)
+        try:
+            scored = score_criticality_frame(pd.concat(frames, ignore_index=True),
+                                             similarity_jobs=jobs, **overrides)
+        except Exception as e:
+            out.extend((key, schema, None, None, str(e)) for key, _ in group)
+            continue
+        for i, (key, frame) in enumerate(group):
+            part = _split(scored, file_of, offsets, i, int(lengths[i]))
+            result = extract_criticality_data(frame, scored=part)
+            out.append((key, schema, result, part if keep_scored else None, None))
+
+    order = {key: n for n, (key, _, _) in enumerate(items)}
+    return sorted(out, key=lambda r: order[r[0]])
+
+
+# ── API ───────────────────────────────────────────────────────────────────────
+
+
+def score_files(sources, jobs: int = 1, shared_vocabulary: bool = False,
+                keep_scored: bool = False, **overrides) -> dict:
+    """
+    Score many files with one config.
+
+    sources            list of workbook paths / DataFrames, or {key: path | frame}
+    jobs               worker processes (files in parallel; with
+                       shared_vocabulary, the partitioned-similarity processes)
+    shared_vocabulary  score the files of each schema as one corpus (see module doc)
+    keep_scored        also return the score_criticality_frame() dicts
+    **overrides        extract_criticality_data() config overrides
+
+    Returns
+    -------
+    {
+        'files':   {key: extract_criticality_data() result},   input order
+        'schemas': {key: schema},      'schema1' / 'schema2' / 'voc' / ...
+        'skipped': {key: reason},      VOC exports and failed files
+        'severity_breakdown': merged High / Medium / Low counts,
+        'scored':  {key: score_criticality_frame() dict}   (keep_scored)
+    }
+    """
+    items = _items(sources)
+    jobs = max(1, jobs)
+    score = _score_shared if shared_vocabulary else _score_each
+    results = score(items, overrides, jobs, keep_scored)
+
+    batch = {'files': {}, 'schemas': {}, 'skipped': {}}
+    if keep_scored:
+        batch['scored'] = {}
+    for key, schema, result, scored, error in results:
+        batch['schemas'][key] = schema
+        if error is not None:
+            sys.stderr.write(f"Warning: extract_criticality_data failed for {key}: {error}\n")
+            batch['skipped'][key] = error
+        elif result is None:
+            batch['skipped'][key] = 'VOC export'
+        else:
+            batch['files'][key] = result
+            if keep_scored:
+                batch['scored'][key] = scored
+    batch['severity_breakdown'] = merge_severity_breakdowns(
+        r['severity_breakdown'] for r in batch['files'].values())
+    return batch
+
+
+def _inputs(args: list) -> list:
+    paths = []
+    for arg in args:
+        path = Path(arg)
+        paths.extend([path] if path.is_file()
+                     else input_manifest.canonical_inputs(input_manifest._resolve_folder(arg)))
+    return paths
+
+
+def main(argv=None) -> int:
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description="Score many workbooks with one config")
+    parser.add_argument("targets", nargs="+", help="downloads/<module> folders, module names or workbooks")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes (0 → one per CPU)")
+    parser.add_argument("--shared-vocabulary", action="store_true",
+                        help="score files of the same schema as one corpus (cross-file similar bugs)")
+    parser.add_argument("--json", action="store_true", help="write the per-file summaries as JSON to stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        paths = _inputs(args.targets)
+    except OSError as e:
+        sys.stderr.write(f"ERROR: {e}\n")
+        return 1
+
+    start = time.perf_counter()
+    batch = score_files(paths, jobs=args.jobs if args.jobs > 0 else (os.cpu_count() or 1),
+                        shared_vocabulary=args.shared_vocabulary)
+    elapsed = time.perf_counter() - start
+
+    report = {'files': {}, 'skipped': {}, 'severity_breakdown': batch['severity_breakdown']}
+    for path, result in batch['files'].items():
+        tiers = pd.Series([i['tier'] for i in result['issues']], dtype=object).value_counts()
+        report['files'][input_manifest.source_name(path)] = {
+            'schema':   result['schema'],
+            'active':   result['active'],
+            'excluded': result['excluded'],
+            'tiers':    {t: int(tiers.get(t, 0)) for t in ('Severe', 'Moderate', 'Low')},
+        }
+        sys.stderr.write(f"  [OK]    {input_manifest.source_name(path):<32} {result['schema']}  "
+                         f"{result['active']} scored, {result['excluded']} excluded\n")
+    for path, reason in batch['skipped'].items():
+        report['skipped'][input_manifest.source_name(path)] = reason
+        sys.stderr.write(f"  [SKIP]  {input_manifest.source_name(path):<32} {reason}\n")
+    sys.stderr.write(f"  [TIME]  {len(paths)} files in {elapsed:.2f}s\n")
+
+    if args.json:
+        sys.stdout.write(json_io.dumps(report, ensure_ascii=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
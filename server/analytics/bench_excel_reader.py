@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+bench_excel_reader.py
+Wall-time and memory benchmark of the Excel reader engines (excel_reader.py).
+
+Every (workbook × engine) read runs in a fresh subprocess, so each
+measurement starts cold and its peak RSS (VmHWM / ru_maxrss, minus the
+peak after imports) covers native allocations — calamine parses in Rust, outside
+tracemalloc's view. The excel_cache sidecars are bypassed.
+
+Per cell it reports wall time (min / median over --repeat runs), peak extra
+RSS in MB, rows × columns and whether the frame equals the first engine's.
+
+Workbooks:
+  synthetic (default) — issue-schema and VOC workbooks shaped like the
+                        downloads/ inputs, at --rows sizes (written to a
+                        temp dir, or --keep DIR)
+  PATH ...            — .xlsx/.xls files or folders of them (real exports)
+
+Results are written as JSON (--output, default stdout) so runs can be diffed.
+
+Usage:
+  python server/analytics/bench_excel_reader.py --rows 5000,50000
+  python server/analytics/bench_excel_reader.py downloads/global_voc_plm --repeat 3
+  python server/analytics/bench_excel_reader.py report.xlsx --header 2
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import excel_reader
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:             # Windows
+    RESOURCE_AVAILABLE = False
+
+# ── Config ────────────────────────────────────────────────────────────────────
+
+DEFAULT_ROWS   = [5000, 50000]
+DEFAULT_REPEAT = 3
+
+
+# ── Workbooks ─────────────────────────────────────────────────────────────────
+
+
+def synthetic_frame(kind: str, n: int, seed: int = 0) -> pd.DataFrame:
+    """Issue-schema ('issue') or VOC ('voc') frame with realistic column mix."""
+    rng = np.random.default_rng(seed)
+    words = np.array(["camera", "battery", "wifi", "display", "crash", "drain",
+                      "lag", "flicker", "bluetooth", "update", "heat", "noise"])
+    titles = [" ".join(rng.choice(words, size=rng.integers(3, 9))) for _ in range(n)]
+    dates = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D")
+
+    if kind == "voc":
+        return pd.DataFrame({
+            "Model No.":  rng.choice(["SM-S931B", "SM-A556E", "SM-F966N"], n),
+            "Module":     rng.choice(["Camera", "Battery", "Network", "Display"], n),
+            "Title":      titles,
+            "content":    [t + " since last update, please check" for t in titles],
+            "Status":     rng.choice(["OPENED", "PROCESSING", "RESOLVED", "CLOSED"], n),
+            "Category":   rng.choice(["Camera", "Battery", "Network"], n),
+            "CSC":        rng.choice(["INS", "XSA", "BTU", "DBT"], n),
+            "Issue Type": rng.choice(["Crash", "UI", "Performance", None], n),
+            "Date":       dates,
+        })
+
+    return pd.DataFrame({
+        "Case Code":      [f"P{240000 + i}" for i in range(n)],
+        "Model No.":      rng.choice(["SM-S931B", "[OS Beta]SM-S936B", "SM-A556E"], n),
+        "S/W Ver.":       rng.choice(["S931BXXU1AYA1", "A556EXXU2AYB3"], n),
+        "Title":          titles,
+        "Problem":        [t + " — steps: open app, wait 5 min" for t in titles],
+        "Severity":       rng.choice(["High", "Medium", "Low"], n),
+        "Priority":       rng.choice(["A", "B", "C"], n),
+        "Occurr. Freq.":  rng.choice(["Always", "Sometimes", "Once"], n),
+        "Issue Type":     rng.choice(["System", "Crash", "UI", "Heat"], n),
+        "Sub-Issue Type": rng.choice(["App Crash", "Restart", "UI Issue", "Other"], n),
+        "Module":         rng.choice(["Camera", "Battery", "Wifi", "Audio"], n),
+        "Progr.Stat.":    rng.choice(["Open", "Resolve - Released", "Close"], n),
+        "Resolve":        rng.choice(["Issue Fixed(Source changes)", "Not problem", None], n),
+        "Source":         rng.choice(["Members", "Beta", "Market Issue"], n),
+        "Days Open":      rng.integers(0, 400, n),
+        "Score":          np.round(rng.random(n) * 100, 2),
+        "Date":           dates,
+        "AI Insight":     rng.choice(["Likely driver regression", None], n),
+    })
+
+
+def write_synthetic(directory: Path, rows: list, seed: int = 0) -> list:
+    paths = []
+    for n in rows:
+        for kind in ("issue", "voc"):
+            path = directory / f"{kind}_{n}.xlsx"
+            if not path.exists():
+                sys.stderr.write(f"  writing {path.name} ...\n")
+                synthetic_frame(kind, n, seed).to_excel(path, index=False)
+            paths.append(path)
+    return paths
+
+
+def collect_workbooks(targets: list) -> list:
+    paths = []
+    for target in targets:
+        p = Path(target)
+        if p.is_dir():
+            paths.extend(sorted(
+                f for f in p.iterdir()
+                if f.suffix.lower() in (".xlsx", ".xls") and not f.name.startswith("~$")
+            ))
+        elif p.exists():
+            paths.append(p)
+        else:
+            raise FileNotFoundError(target)
+    return paths
+
+
+# ── Measurement ───────────────────────────────────────────────────────────────
+
+
+def _rss_mb() -> float:
+    """Peak RSS of this process in MB."""
+    # Linux: VmHWM is per address space; ru_maxrss survives exec and would
+    # start the worker at the parent's peak
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024 / 1e6
+    except OSError:
+        pass
+    # ru_maxrss: kilobytes on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6
+
+
+def _frame_digest(df: pd.DataFrame) -> str:
+    try:
+        h = pd.util.hash_pandas_object(df, index=False).to_numpy().sum()
+    except TypeError:           # unhashable cells
+        h = hash(df.astype(str).to_csv(index=False))
+    return f"{list(map(str, df.columns))}|{list(map(str, df.dtypes))}|{int(h) & (2**63 - 1)}"
+
+
+def worker(path: str, engine: str, header: int) -> dict:
+    """One cold read (runs in its own process)."""
+    base = _rss_mb() if RESOURCE_AVAILABLE else None
+    start = time.perf_counter()
+    df = excel_reader.read_excel(path, engine=engine, header=header)
+    seconds = time.perf_counter() - start
+    peak = _rss_mb() if RESOURCE_AVAILABLE else None
+    return {
+        "seconds":   seconds,
+        "rss_mb":    round(peak - base, 1) if base is not None else None,
+        "rows":      len(df),
+        "columns":   len(df.columns),
+        "digest":    _frame_digest(df),
+    }
+
+
+def measure(path: Path, engine: str, header: int, repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", str(path),
+             "--engine", engine, "--header", str(header)],
+            capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            return {"engine": engine, "error": out.stderr.strip().splitlines()[-1:]}
+        runs.append(json.loads(out.stdout))
+
+    seconds = [r["seconds"] for r in runs]
+    rss = [r["rss_mb"] for r in runs if r["rss_mb"] is not None]
+    return {
+        "engine":         engine,
+        "seconds_min":    round(min(seconds), 4),
+        "seconds_median": round(statistics.median(seconds), 4),
+        "peak_rss_mb":    max(rss) if rss else None,
+        "rows":           runs[0]["rows"],
+        "columns":        runs[0]["columns"],
+        "digest":         runs[0]["digest"],
+    }
+
+
+def _parse_int_list(value: str) -> list:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Excel reader engines")
+    parser.add_argument("paths", nargs="*", help="workbooks or folders (default: synthetic)")
+    parser.add_argument("--engines", default=",".join(excel_reader.available_engines()),
+                        help="comma-separated engines (default: all installed)")
+    parser.add_argument("--rows", type=_parse_int_list, default=DEFAULT_ROWS, help="synthetic sizes")
+    parser.add_argument("--header", type=int, default=0, help="header row offset (read_excel header=)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--keep", help="write / reuse synthetic workbooks in this folder")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="", help="free-form run label stored in the output")
+    parser.add_argument("--output", help="write JSON results here (default stdout)")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--engine", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.engine, args.header)))
+        return 0
+
+    engines = [e for e in args.engines.split(",") if e]
+    if not engines:
+        sys.stderr.write("ERROR: no Excel engine installed (pip install python-calamine openpyxl)\n")
+        return 1
+
+    tmp = None
+    if args.paths:
+        workbooks = collect_workbooks(args.paths)
+    else:
+        if args.keep:
+            directory = Path(args.keep)
+            directory.mkdir(parents=True, exist_ok=True)
+        else:
+            tmp = tempfile.TemporaryDirectory(prefix="bench_excel_")
+            directory = Path(tmp.name)
+        workbooks = write_synthetic(directory, args.rows, args.seed)
+
+    results = []
+    try:
+        for path in workbooks:
+            size_mb = path.stat().st_size / 1e6
+            cells = [measure(path, engine, args.header, args.repeat) for engine in engines]
+            reference = next((c["digest"] for c in cells if "digest" in c), None)
+            for c in cells:
+                if "digest" in c:
+                    c["same_frame"] = c.pop("digest") == reference
+            results.append({"workbook": str(path), "size_mb": round(size_mb, 2), "engines": cells})
+
+            sys.stderr.write(f"\n{path.name}  ({size_mb:.1f} MB)\n")
+            for c in cells:
+                if "error" in c:
+                    sys.stderr.write(f"  {c['engine']:<10} ERROR {c['error']}\n")
+                    continue
+                rss = f"{c['peak_rss_mb']:8.1f} MB" if c["peak_rss_mb"] is not None else "       n/a"
+                sys.stderr.write(
+                    f"  {c['engine']:<10} {c['seconds_median']:8.3f}s median  {c['seconds_min']:8.3f}s min"
+                    f"  {rss}  {c['rows']}x{c['columns']}"
+                    f"  {'same' if c['same_frame'] else 'DIFFERENT'}\n"
+                )
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    report = {
+        "label":    args.label,
+        "python":   platform.python_version(),
+        "pandas":   pd.__version__,
+        "platform": platform.platform(),
+        "engines":  engines,
+        "header":   args.header,
+        "repeat":   args.repeat,
+        "results":  results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,6 @@
 import pandas as pd
 import os
 import json
-import math
 import numpy as np
 from pathlib import Path
 from typing import Optional
@@ -19,6 +18,10 @@ except ImportError:
 # (_detect_schema, _rel, _assign_tier, _compute_similar_bug_counts, etc.) live
 # exclusively in extract_criticality.py and are imported here.
 from extract_criticality import extract_criticality_data
+import input_manifest
+import json_io
+import row_store
+import schemas
 
 
 # Load model name mapping from modelName.json
@@ -89,17 +92,6 @@ def apply_model_name_mapping(model_number):
     return model_number
 
 
-def sanitize_nan(obj):
-    """Recursively replace NaN values with None for JSON serialization."""
-    if isinstance(obj, float) and math.isnan(obj):
-        return None
-    elif isinstance(obj, dict):
-        return {k: sanitize_nan(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [sanitize_nan(item) for item in obj]
-    return obj
-
-
 def derive_model_name_from_sw_ver(sw_ver):
     """
     Derive model name from S/W Ver. for OS Beta entries.
@@ -179,8 +171,10 @@ def get_high_severity_breakdown(filepath: str) -> dict:
 
 def load_all_excels(base_path: str) -> dict:
     """
-    Load all Excel files from subfolders under base_path, grouped by folder.
-    Apply model name transformation for OS Beta entries.
+    Load the canonical inputs (input_manifest.py) of every subfolder under
+    base_path, grouped by folder — cleaned / derived workbooks are skipped.
+    Frames are typed by the schema registry (schemas.py) and get the model
+    name transformation for OS Beta entries.
     Returns dict: {folder_name: [df1, df2, ...]}
     """
     base = Path(base_path)
@@ -190,14 +184,12 @@ def load_all_excels(base_path: str) -> dict:
     data = {}
     for folder in base.iterdir():
         if folder.is_dir():
-            excels = list(folder.glob("*.xlsx"))
+            excels = input_manifest.canonical_inputs(folder)
             if excels:
                 dfs = []
                 for excel in excels:
-                    if excel.name.startswith('~$'):
-                        continue
                     try:
-                        df = pd.read_excel(excel)
+                        df = schemas.apply_schema(input_manifest.read_input(excel))
                         df = transform_model_names(df)
                         dfs.append(df)
                     except Exception as e:
@@ -208,11 +200,44 @@ def load_all_excels(base_path: str) -> dict:
     return data
 
 
+# Combined frame per folder list: every compute_* step re-combines the same
+# folder, so the concat runs once per folder (callers never modify it in place)
+_COMBINED = {}
+
+
 def combine_dataframes(dfs: list) -> pd.DataFrame:
-    """Combine list of DataFrames, handling different columns."""
+    """Combine list of DataFrames, handling different columns (categoricals kept)."""
     if not dfs:
         return pd.DataFrame()
-    return pd.concat(dfs, ignore_index=True, sort=False)
+    cached = _COMBINED.get(id(dfs))
+    if cached is None or cached[0] is not dfs or cached[1] != len(dfs):
+        cached = _COMBINED[id(dfs)] = (dfs, len(dfs), schemas.concat_frames(dfs))
+    return cached[2]
+
+
+def _cell_text(value) -> str:
+    """str(value), with missing text cells rendered 'nan' as for object columns."""
+    return 'nan' if value is pd.NA else str(value)
+
+
+def _label_mask(series: pd.Series, predicate) -> pd.Series:
+    """
+    Boolean Series of predicate(str(cell)); evaluated once per category
+    (missing cells as 'nan') for categorical columns.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        labels = [predicate(str(c)) for c in series.cat.categories] + [predicate('nan')]
+        hits = np.asarray(labels, dtype=bool)
+        return pd.Series(hits[series.cat.codes.to_numpy()], index=series.index)
+    return series.astype(str).apply(predicate)
+
+
+def _status_bucket(x: str) -> str:
+    return (
+        "Resolve" if x.startswith("Resolve") else
+        "Close"   if x.startswith("Close")   else
+        "Open"    if x.startswith("Open")     else x
+    )
 
 
 def filter_allowed_severity(df: pd.DataFrame) -> pd.DataFrame:
@@ -228,7 +253,7 @@ def normalize_status(df: pd.DataFrame, source_folder: str = None) -> pd.DataFram
     Normalize 'Progr.Stat.' to standard Open / Resolve / Close values.
     Handles Employee UT where the 'Resolve' column overrides 'Progr.Stat.'.
     """
-    df = df.copy()
+    df = df.copy(deep=False)          # columns are replaced, never modified
 
     if source_folder == 'employee_ut' and "Resolve" in df.columns:
         resolve_mapping = {
@@ -237,17 +262,19 @@ def normalize_status(df: pd.DataFrame, source_folder: str = None) -> pd.DataFram
             'Not Resolve':'Open',
             'Reviewed':   'Open',
         }
+        resolved = df["Resolve"].astype(object).map(resolve_mapping)
         if "Progr.Stat." not in df.columns:
-            df["Progr.Stat."] = df["Resolve"].map(resolve_mapping)
+            df["Progr.Stat."] = resolved
         else:
-            df["Progr.Stat."] = df["Resolve"].map(resolve_mapping).fillna(df["Progr.Stat."])
+            df["Progr.Stat."] = resolved.fillna(df["Progr.Stat."].astype(object))
 
     if "Progr.Stat." in df.columns:
-        df["Progr.Stat."] = df["Progr.Stat."].astype(str).apply(lambda x:
-            "Resolve" if x.startswith("Resolve") else
-            "Close"   if x.startswith("Close")   else
-            "Open"    if x.startswith("Open")     else x
-        )
+        status = df["Progr.Stat."]
+        if isinstance(status.dtype, pd.CategoricalDtype):
+            # astype(str) semantics: missing cells become the label 'nan'
+            df["Progr.Stat."] = schemas.map_labels(status, _status_bucket, missing='nan')
+        else:
+            df["Progr.Stat."] = status.astype(str).apply(_status_bucket)
 
     return df
 
@@ -256,8 +283,8 @@ def filter_open_resolve(df: pd.DataFrame) -> pd.DataFrame:
     """Keep only Open and Resolve rows (exclude Close and other statuses)."""
     if "Progr.Stat." not in df.columns:
         return df
-    return df[df["Progr.Stat."].astype(str).apply(
-        lambda x: x.startswith("Open") or x.startswith("Resolve")
+    return df[_label_mask(
+        df["Progr.Stat."], lambda x: x.startswith("Open") or x.startswith("Resolve")
     )]
 
 
@@ -265,23 +292,23 @@ def filter_open_resolve(df: pd.DataFrame) -> pd.DataFrame:
 #  KPI COMPUTATION
 # ===========================================================================
 
-def _load_analytics_json(base_path: str, folder_name: str) -> dict:
+def _load_analytics_rows(base_path: str, folder_name: str, fields: list = None) -> list:
     """
-    Load analytics.json generated by pandas_aggregator for a given source folder.
-    Returns the parsed dict, or {} if not found.
+    Load the rows written by pandas_aggregator for a given source folder
+    (rows.ndjson row store, or rows embedded in a legacy analytics.json),
+    projected to `fields`. Returns [] if not found.
     """
     candidates = [
-        Path(base_path) / folder_name / 'analytics.json',
-        Path('./downloads') / folder_name / 'analytics.json',
+        Path(base_path) / folder_name,
+        Path('./downloads') / folder_name,
     ]
-    for path in candidates:
-        if path.exists():
+    for folder in candidates:
+        if (folder / row_store.SUMMARY_FILE).exists():
             try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return row_store.load_rows(folder, fields=fields)
             except Exception:
                 pass
-    return {}
+    return []
 
 
 def _severity_dist_from_updated_tier(rows: list) -> dict:
@@ -352,8 +379,7 @@ def compute_central_kpis(data: dict) -> tuple:
             continue
 
         # ── Try reading analytics.json (has updated_tier on every row) ───
-        analytics = _load_analytics_json(base_path, folder)
-        rows      = analytics.get('rows', [])
+        rows = _load_analytics_rows(base_path, folder, fields=['updated_tier', 'Progr.Stat.'])
 
         if rows and any('updated_tier' in r for r in rows[:10]):
             # ── PRIMARY: build from updated_tier on analytics.json rows ──
@@ -395,14 +421,15 @@ def compute_central_kpis(data: dict) -> tuple:
 
             severity_counts = {'High': 0, 'Medium': 0, 'Low': 0}
             if 'Severity' in combined_open_resolve.columns:
-                severity_series = combined_open_resolve['Severity'].value_counts()
+                severity_series = schemas.value_counts(combined_open_resolve['Severity'])
                 for sev in severity_counts:
                     severity_counts[sev] = int(severity_series.get(sev, 0))
 
                 if severity_counts['High'] > 0:
                     # Use first Excel file in folder for scoring fallback
                     folder_path = Path(base_path) / folder
-                    excel_files = list(folder_path.glob('*.xlsx'))
+                    excel_files = [p for p in input_manifest.canonical_inputs(folder_path)
+                                   if not input_manifest.is_archived(p)]
                     if excel_files:
                         high_breakdown = get_high_severity_breakdown(str(excel_files[0]))
                     else:
@@ -428,7 +455,7 @@ def compute_central_kpis(data: dict) -> tuple:
             status_counts = {'Open': 0, 'Close': 0, 'Resolve': 0}
             if "Progr.Stat." in combine_dataframes(dfs).columns:
                 combined_all = normalize_status(combine_dataframes(dfs), folder)
-                vc = combined_all["Progr.Stat."].value_counts()
+                vc = schemas.value_counts(combined_all["Progr.Stat."])
                 status_counts["Open"]    = int(vc.get("Open",    0))
                 status_counts["Close"]   = int(vc.get("Close",   0))
                 status_counts["Resolve"] = int(vc.get("Resolve", 0))
@@ -508,7 +535,7 @@ def compute_top_modules(data: dict) -> list:
         combined = normalize_status(combined, folder)
         combined = filter_open_resolve(combined)
         if 'Module' in combined.columns:
-            for module, count in combined['Module'].value_counts().items():
+            for module, count in schemas.value_counts(combined['Module']).items():
                 if pd.notna(module) and str(module).strip():
                     key = str(module).strip()
                     all_modules[key] = all_modules.get(key, 0) + count
@@ -528,7 +555,7 @@ def compute_top_models(data: dict) -> list:
         combined = normalize_status(combined, folder)
         combined = filter_open_resolve(combined)
         if 'Model No.' in combined.columns:
-            for model, count in combined['Model No.'].value_counts().items():
+            for model, count in schemas.value_counts(combined['Model No.']).items():
                 if pd.notna(model) and str(model).strip():
                     friendly = apply_model_name_mapping(str(model).strip())
                     all_models[friendly] = all_models.get(friendly, 0) + count
@@ -546,7 +573,7 @@ def compute_top_models_by_source(data: dict, source_folder: str) -> list:
         combined = normalize_status(combined, source_folder)
         combined = filter_open_resolve(combined)
         if 'Model No.' in combined.columns:
-            for model, count in combined['Model No.'].value_counts().items():
+            for model, count in schemas.value_counts(combined['Model No.']).items():
                 if pd.notna(model) and str(model).strip():
                     friendly = apply_model_name_mapping(str(model).strip())
                     new_models[friendly] = new_models.get(friendly, 0) + count
@@ -564,7 +591,7 @@ def compute_top_modules_by_source(data: dict, source_folder: str) -> list:
         combined = normalize_status(combined, source_folder)
         combined = filter_open_resolve(combined)
         if 'Module' in combined.columns:
-            for module, count in combined['Module'].value_counts().items():
+            for module, count in schemas.value_counts(combined['Module']).items():
                 if pd.notna(module) and str(module).strip():
                     key = str(module).strip()
                     new_modules[key] = new_modules.get(key, 0) + count
@@ -591,7 +618,7 @@ def compute_high_issues(data: dict) -> list:
         combined = filter_allowed_severity(combined)
         if 'Module' in combined.columns and 'Severity' in combined.columns:
             high_issues = combined[combined['Severity'].str.lower() == 'high']
-            for module, count in high_issues['Module'].value_counts().items():
+            for module, count in schemas.value_counts(high_issues['Module']).items():
                 if pd.notna(module) and str(module).strip():
                     key = str(module).strip()
                     all_modules[key] = all_modules.get(key, 0) + count
@@ -619,10 +646,10 @@ def compute_high_issues(data: dict) -> list:
 
         for _, row in high_df.iterrows():
             module_high_issues.append({
-                "Model Number": str(row.get('Model No.', '')),
-                "Case Code":    str(row.get('Case Code', '')),
-                "Module Name":  str(row.get('Module', '')),
-                "Title":        str(row.get('Title', '')),
+                "Model Number": _cell_text(row.get('Model No.', '')),
+                "Case Code":    _cell_text(row.get('Case Code', '')),
+                "Module Name":  _cell_text(row.get('Module', '')),
+                "Title":        _cell_text(row.get('Title', '')),
                 "Processor":    source_name,
             })
 
@@ -640,25 +667,28 @@ def compute_model_module_matrix(data: dict) -> dict:
     model_names  = [item['label'] for item in top_models]
     module_names = [item['label'] for item in top_modules]
 
-    matrix = []
-    for model in model_names:
-        row = []
-        for module in module_names:
-            count = 0
-            for folder, dfs in data.items():
-                if folder not in _PLM_SOURCES:
-                    continue
-                combined = combine_dataframes(dfs)
-                combined = filter_allowed_severity(combined)
-                combined = normalize_status(combined, folder)
-                combined = filter_open_resolve(combined)
-                if 'Model No.' in combined.columns and 'Module' in combined.columns:
-                    count += len(combined[
-                        (combined['Model No.'].astype(str).str.strip() == model.strip()) &
-                        (combined['Module'].astype(str).str.strip()    == module.strip())
-                    ])
-            row.append(count)
-        matrix.append(row)
+    # One grouped count of (model, module) pairs per folder instead of a
+    # filter per matrix cell
+    pair_counts = {}
+    for folder, dfs in data.items():
+        if folder not in _PLM_SOURCES:
+            continue
+        combined = combine_dataframes(dfs)
+        combined = filter_allowed_severity(combined)
+        combined = normalize_status(combined, folder)
+        combined = filter_open_resolve(combined)
+        if 'Model No.' in combined.columns and 'Module' in combined.columns:
+            pairs = pd.DataFrame({
+                'model':  combined['Model No.'].astype(str).str.strip(),
+                'module': combined['Module'].astype(str).str.strip(),
+            })
+            for key, n in pairs.groupby(['model', 'module'], sort=False).size().items():
+                pair_counts[key] = pair_counts.get(key, 0) + int(n)
+
+    matrix = [
+        [pair_counts.get((model.strip(), module.strip()), 0) for module in module_names]
+        for model in model_names
+    ]
 
     return {'models': model_names, 'modules': module_names, 'matrix': matrix}
 
@@ -697,7 +727,7 @@ def compute_source_model_summary(data: dict) -> list:
         if 'Model No.' not in combined.columns:
             continue
 
-        for model, total_count in combined['Model No.'].value_counts().head(5).items():
+        for model, total_count in schemas.value_counts(combined['Model No.']).head(5).items():
             if not (pd.notna(model) and str(model).strip()):
                 continue
             model_str  = str(model).strip()
@@ -706,7 +736,7 @@ def compute_source_model_summary(data: dict) -> list:
             top_modules: list = []
             if 'Module' in model_data.columns:
                 top_modules = [
-                    str(m).strip() for m in model_data['Module'].value_counts().head(5).index
+                    str(m).strip() for m in schemas.value_counts(model_data['Module']).head(5).index
                     if pd.notna(m)
                 ]
 
@@ -716,10 +746,10 @@ def compute_source_model_summary(data: dict) -> list:
                     mod_issues = model_data[model_data['Module'].astype(str).str.strip() == mod]
                     if not mod_issues.empty:
                         first = mod_issues.iloc[0]
-                        case_code = str(first.get('Case Code', '')).strip()
-                        title     = str(first.get('Title', '')).strip()
+                        case_code = _cell_text(first.get('Case Code', '')).strip()
+                        title     = _cell_text(first.get('Title', '')).strip()
                         if source_name == 'VOC' and 'content' in first:
-                            title = clean_excel_text(str(first.get('content', '')))
+                            title = clean_excel_text(_cell_text(first.get('content', '')))
                         top_titles.append(
                             f"{case_code} : {title}" if (case_code and title)
                             else f"Unknown : {title or 'Unknown Title'}"
@@ -730,13 +760,13 @@ def compute_source_model_summary(data: dict) -> list:
                 if source_name == 'VOC' and 'content' in model_data.columns:
                     top_titles = [
                         clean_excel_text(str(c))
-                        for c in model_data['content'].value_counts().head(5).index
+                        for c in schemas.value_counts(model_data['content']).head(5).index
                         if pd.notna(c)
                     ]
                 elif 'Title' in model_data.columns:
                     top_titles = [
                         str(t).strip()
-                        for t in model_data['Title'].value_counts().head(5).index
+                        for t in schemas.value_counts(model_data['Title']).head(5).index
                         if pd.notna(t)
                     ]
 
@@ -772,7 +802,7 @@ if __name__ == "__main__":
             "summary":         lambda: compute_source_model_summary(data),
         }
         if command in dispatch:
-            print(json.dumps(dispatch[command]()))
+            print(json_io.dumps(dispatch[command](), ensure_ascii=True))
         else:
             print(json.dumps({"error": f"Unknown command: {command}"}))
         sys.exit(0)
@@ -817,7 +847,7 @@ if __name__ == "__main__":
             "filtered_top_models":  filtered_top_models,
         }
 
-        print(json.dumps(sanitize_nan(response)))
+        print(json_io.dumps(response, ensure_ascii=True))
 
     except Exception as e:
         print(json.dumps({"error": str(e)}))
@@ -0,0 +1,288 @@
+"""
+drill_index.py
+==============
+Precomputed drill-down index next to each source's row store.
+
+The dashboard's tier drill-down modal downloaded every row of a source and
+filtered them in the browser by updated_tier / Severity / Progr.Stat. just
+to list one bucket. _process_folder now also writes:
+
+    downloads/<module>/drill.json   buckets: [tier, severity, status, module,
+                                    start, count] per non-empty combination
+    downloads/<module>/drill.bin    (row id uint32, criticality_score float64)
+                                    records, packed, bucket after bucket,
+                                    each bucket sorted by score (desc, rows
+                                    without a score last, then row id)
+
+Row ids are positions in rows.ndjson (row_store.py). A query selects the
+matching buckets, takes at most offset + limit records from each (they are
+already in order), merges them and reads only that page of rows through
+the row store's offset index — cost depends on the bucket count and the
+page, not on the number of rows. A text filter (q) is the exception: it
+has to read every row of the selected buckets.
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+BUCKET KEYS  (same rules as the tier drill modal)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    tier      updated_tier (tier if empty), stripped; Low, Deferred and
+              unscored rows that are neither High nor Medium → Deferred
+    severity  Severity, stripped ('' if missing)
+    status    Progr.Stat. containing open / resolve / close (first match,
+              case-insensitive) → open / resolve / close, else other
+    module    Module ('' if missing)
+
+Usage:
+  python server/analytics/drill_index.py <module|folder> [--tier Severe]
+         [--severity High] [--status open] [--module Camera]
+         [--q "camera"] [--offset 0] [--limit 50] [--fields "Case Code,Title"]
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import json_io
+import row_store
+
+DIRECTORY_FILE = "drill.json"
+RECORDS_FILE   = "drill.bin"
+
+# Bump when the on-disk layout changes (checked by server.js as well)
+INDEX_VERSION = 1
+
+RECORD_DTYPE = np.dtype([("row", "<u4"), ("score", "<f8")])
+
+KEYS = ("tier", "severity", "status", "module")
+
+_STATUSES = ("open", "resolve", "close")
+
+
+# ── Building ──────────────────────────────────────────────────────────────────
+
+
+def _labels(df: pd.DataFrame, col: str, transform=str) -> tuple:
+    """(codes, labels) of df[col] with transform applied per distinct value; missing → ''."""
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=np.intp), ['']
+    codes, uniques = pd.factorize(df[col].astype(object).to_numpy())
+    labels = [transform(str(u)) for u in uniques] + ['']
+    return np.where(codes == -1, len(labels) - 1, codes), labels
+
+
+def _status_label(value: str) -> str:
+    value = value.lower()
+    return next((s for s in _STATUSES if s in value), 'other')
+
+
+def bucket_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """Drill-down keys (KEYS) of every row of df."""
+    sev_codes, sev_u = _labels(df, 'Severity', str.strip)
+    severity = np.asarray(sev_u, dtype=object)[sev_codes]
+
+    tier_col = 'updated_tier' if 'updated_tier' in df.columns else 'tier'
+    ut_codes, ut_u = _labels(df, tier_col, str.strip)
+    tier = np.asarray(ut_u, dtype=object)[ut_codes]
+    if tier_col == 'updated_tier' and 'tier' in df.columns:
+        t_codes, t_u = _labels(df, 'tier', str.strip)
+        tier = np.where(tier == '', np.asarray(t_u, dtype=object)[t_codes], tier)
+    deferred = ((tier == 'Deferred') | (tier == 'Low')
+                | ((tier == '') & (severity != 'High') & (severity != 'Medium')))
+    tier = np.where(deferred, 'Deferred', tier)
+
+    st_codes, st_u = _labels(df, 'Progr.Stat.', _status_label)
+    st_u[-1] = 'other'
+    mod_codes, mod_u = _labels(df, 'Module')
+
+    return pd.DataFrame({
+        'tier':     tier,
+        'severity': severity,
+        'status':   np.asarray(st_u, dtype=object)[st_codes],
+        'module':   np.asarray(mod_u, dtype=object)[mod_codes],
+    })
+
+
+def build(df: pd.DataFrame) -> tuple:
+    """(directory, records) of the rows of df, in row-store order."""
+    keys = bucket_keys(df)
+    if 'criticality_score' in df.columns:
+        score = pd.to_numeric(df['criticality_score'], errors='coerce').to_numpy(dtype=float)
+    else:
+        score = np.full(len(df), np.nan)
+    unscored = np.isnan(score)
+
+    bucket = keys.groupby(list(KEYS), sort=True).ngroup().to_numpy()
+    rows = np.arange(len(df), dtype=np.int64)
+    order = np.lexsort((rows, -np.nan_to_num(score), unscored, bucket))
+
+    records = np.empty(len(df), dtype=RECORD_DTYPE)
+    records["row"], records["score"] = rows[order], score[order]
+
+    sizes = np.bincount(bucket, minlength=bucket.max() + 1 if len(bucket) else 0)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+    firsts = order[starts] if len(order) else np.zeros(0, dtype=np.int64)
+    buckets = [
+        [*(keys[k].iat[first] for k in KEYS), int(start), int(size)]
+        for first, start, size in zip(firsts, starts, sizes)
+    ]
+    directory = {"version": INDEX_VERSION, "count": int(len(df)), "keys": list(KEYS), "buckets": buckets}
+    return directory, records
+
+
+def write_drill_index(folder, df) -> dict:
+    """Write drill.json + drill.bin for df (the row store's rows). Returns the descriptor."""
+    folder = Path(folder)
+    directory, records = build(df)
+    dir_path, rec_path = folder / DIRECTORY_FILE, folder / RECORDS_FILE
+    dir_tmp = dir_path.with_name(dir_path.name + f".tmp{os.getpid()}")
+    rec_tmp = rec_path.with_name(rec_path.name + f".tmp{os.getpid()}")
+    try:
+        records.tofile(rec_tmp)
+        dir_tmp.write_text(json.dumps(directory, ensure_ascii=True, separators=(",", ":")), encoding="utf-8")
+        os.replace(rec_tmp, rec_path)
+        os.replace(dir_tmp, dir_path)
+    finally:
+        for tmp in (dir_tmp, rec_tmp):
+            if tmp.exists():
+                tmp.unlink()
+    return {
+        "version": INDEX_VERSION,
+        "file":    DIRECTORY_FILE,
+        "records": RECORDS_FILE,
+        "count":   directory["count"],
+        "buckets": len(directory["buckets"]),
+    }
+
+
+# ── Querying ──────────────────────────────────────────────────────────────────
+
+
+def _load(folder, summary: dict) -> tuple:
+    """(directory, records) from disk, or built from the row store if missing / stale."""
+    folder = Path(folder)
+    try:
+        with open(folder / DIRECTORY_FILE, "r", encoding="utf-8") as f:
+            directory = json.load(f)
+        if (directory.get("version") == INDEX_VERSION
+                and directory.get("count") == row_store.row_count(folder, summary)):
+            return directory, np.memmap(folder / RECORDS_FILE, dtype=RECORD_DTYPE, mode="r")
+    except (OSError, ValueError):
+        pass
+    # folders written before the index existed: build it from the rows
+    return build(pd.DataFrame(row_store.load_rows(folder, summary=summary)))
+
+
+def _accepts(value, accepted) -> bool:
+    if accepted is None:
+        return True
+    if isinstance(accepted, (list, tuple, set, frozenset)):
+        return value in accepted
+    return value == accepted
+
+
+def _sorted(records: np.ndarray) -> np.ndarray:
+    """Positions of records in drill order (score desc, unscored last, then row id)."""
+    score = records["score"]
+    return np.lexsort((records["row"], -np.nan_to_num(score), np.isnan(score)))
+
+
+def _search(folder, summary: dict, records, buckets: list, needle: str,
+            offset: int, limit: int, fields) -> dict:
+    """query() with a text filter: reads every row of the selected buckets."""
+    status_at = KEYS.index("status")
+    status_counts = {s: 0 for s in _STATUSES + ("other",)}
+    if buckets:
+        selected = np.concatenate([records[b[-2]:b[-2] + b[-1]] for b in buckets])
+        statuses = np.repeat([b[status_at] for b in buckets], [b[-1] for b in buckets])
+        order = _sorted(selected)
+        ids, statuses = selected["row"][order].astype(np.int64), statuses[order]
+    else:
+        ids, statuses = np.zeros(0, dtype=np.int64), []
+
+    rows, matched = [], 0
+    for row, status in zip(row_store.read_rows_at(folder, ids, fields=fields, summary=summary), statuses):
+        haystack = "\n".join("" if v is None else str(v) for v in row.values()).lower()
+        if needle not in haystack:
+            continue
+        status_counts[status] += 1
+        if offset <= matched < offset + limit:
+            rows.append(row)
+        matched += 1
+    return {"total": matched, "status_counts": status_counts, "offset": offset, "limit": limit, "rows": rows}
+
+
+def query(folder, tier=None, severity=None, status=None, module=None,
+          offset: int = 0, limit: int = 100, fields: list = None, summary: dict = None,
+          q: str = None) -> dict:
+    """
+    One page of a drill-down bucket, sorted by criticality_score (desc).
+    Each key filter is a value, a list of accepted values, or None (any).
+    q keeps only rows with q in one of their (projected) field values,
+    case-insensitive.
+
+    Returns {total, status_counts: {open, resolve, close, other}, offset,
+    limit, rows}.
+    """
+    summary = row_store.load_summary(folder) if summary is None else summary
+    directory, records = _load(folder, summary)
+    wanted = dict(zip(KEYS, (tier, severity, status, module)))
+    status_at = KEYS.index("status")
+
+    offset, limit = max(0, int(offset)), max(0, int(limit))
+    buckets = [b for b in directory["buckets"] if all(_accepts(b[i], wanted[k]) for i, k in enumerate(KEYS))]
+    if q:
+        return _search(folder, summary, records, buckets, str(q).lower(), offset, limit, fields)
+
+    status_counts = {s: 0 for s in _STATUSES + ("other",)}
+    slices = []
+    for bucket in buckets:
+        start, count = bucket[-2], bucket[-1]
+        status_counts[bucket[status_at]] += count
+        slices.append(records[start:start + min(count, offset + limit)])
+
+    page = np.concatenate(slices) if slices else np.zeros(0, dtype=RECORD_DTYPE)
+    if len(slices) > 1:
+        page = page[_sorted(page)]
+    ids = page["row"][offset:offset + limit].astype(np.int64)
+
+    return {
+        "total":         sum(status_counts.values()),
+        "status_counts": status_counts,
+        "offset":        offset,
+        "limit":         limit,
+        "rows":          row_store.read_rows_at(folder, ids, fields=fields, summary=summary),
+    }
+
+
+def main(argv=None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description="Page one drill-down bucket of a module")
+    parser.add_argument("folder", help="downloads/<module> folder (or module name)")
+    for key in KEYS:
+        parser.add_argument(f"--{key}", action="append", help=f"{key} value (repeatable)")
+    parser.add_argument("--q", help="keep rows containing this text (case-insensitive)")
+    parser.add_argument("--offset", type=int, default=0)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--fields", help="comma-separated row fields to return")
+    args = parser.parse_args(argv)
+
+    import input_manifest
+    try:
+        folder = input_manifest._resolve_folder(args.folder)
+        result = query(folder, *(getattr(args, k) for k in KEYS), offset=args.offset, limit=args.limit,
+                       fields=args.fields.split(",") if args.fields else None, q=args.q)
+    except (OSError, ValueError) as e:
+        sys.stdout.write(json_io.dumps({"error": str(e)}, ensure_ascii=True))
+        return 1
+    sys.stdout.write(json_io.dumps(result, ensure_ascii=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
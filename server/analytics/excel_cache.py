@@ -0,0 +1,242 @@
+"""
+excel_cache.py
+==============
+Columnar sidecar cache for parsed Excel inputs.
+
+Every dashboard refresh used to re-parse the same .xlsx files with openpyxl
+(pandas_aggregator, central_aggregator, extract_criticality and the
+moved-issues export each call pd.read_excel on them). read_excel_cached()
+parses a workbook once and stores the resulting DataFrame next to it:
+
+    <folder>/__excel_cache__/<file name>.<kwargs key>.parquet   (data)
+    <folder>/__excel_cache__/<file name>.<kwargs key>.json      (meta)
+
+Workbooks are parsed through excel_reader (calamine when installed, else
+openpyxl); both engines give the same frame, so the engine is not part of
+the sidecar key.
+
+Parquet is used when pyarrow is installed (and the frame is Arrow-compatible),
+otherwise a pickle. Parquet reads support column projection, so each caller
+only materialises the columns it uses.
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+INVALIDATION
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    Sidecar key = source path + size + mtime + SHA-1 of the file content
+                  + the read_excel kwargs (dtype, header, sheet_name ...)
+
+    size + mtime unchanged          → sidecar used, no hashing
+    size / mtime changed, same hash → sidecar used, meta refreshed
+    content changed                 → workbook re-parsed, sidecar rewritten
+
+Set MARKET_PULSE_EXCEL_CACHE=0 to bypass the cache entirely.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from excel_reader import read_excel, read_headers
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+CACHE_DIR_NAME = "__excel_cache__"
+
+# Bump when the sidecar layout or the parse semantics change
+CACHE_VERSION = 1
+
+_HASH_CHUNK = 1 << 20
+
+
+def _cache_enabled() -> bool:
+    return os.environ.get("MARKET_PULSE_EXCEL_CACHE", "1") not in ("0", "false", "no")
+
+
+def file_sha1(path: Path) -> str:
+    """SHA-1 hex digest of a file's content (shared by the other on-disk caches)."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _kwargs_key(read_kwargs: dict) -> str:
+    """Stable short key for the read_excel kwargs that affect the parsed frame."""
+    relevant = {k: v for k, v in read_kwargs.items() if k != "engine"}
+    blob = json.dumps(relevant, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:12]
+
+
+def _sidecar_paths(path: Path, kw_key: str) -> tuple:
+    cache_dir = path.parent / CACHE_DIR_NAME
+    stem = f"{path.name}.{kw_key}"
+    return cache_dir, cache_dir / f"{stem}.json"
+
+
+def _read_meta(meta_path: Path):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return meta if meta.get("version") == CACHE_VERSION else None
+    except (OSError, ValueError):
+        return None
+
+
+def write_atomic(target: Path, write_fn) -> None:
+    """Write via write_fn(tmp path), then rename over `target` so readers never see a partial file."""
+    tmp = target.with_name(target.name + f".tmp{os.getpid()}")
+    try:
+        write_fn(tmp)
+        os.replace(tmp, target)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def _restore_missing(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parquet round-trips empty cells of object columns as None; read_excel
+    yields NaN. Restore NaN so cached and fresh frames behave identically.
+    """
+    for col in df.columns[df.dtypes == object]:
+        s = df[col]
+        missing = s.isna()
+        if missing.any():
+            df[col] = s.where(~missing, np.nan)
+    return df
+
+
+def _write_sidecar(df: pd.DataFrame, cache_dir: Path, base: str) -> str:
+    """Write df as parquet (preferred) or pickle; returns the data file name."""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    if PYARROW_AVAILABLE:
+        target = cache_dir / f"{base}.parquet"
+        try:
+            write_atomic(target, lambda p: df.to_parquet(p, engine="pyarrow"))
+            return target.name
+        except Exception:
+            pass                # mixed-type / non-string columns → pickle below
+    target = cache_dir / f"{base}.pkl"
+    write_atomic(target, lambda p: df.to_pickle(p))
+    return target.name
+
+
+def load_sidecar(data_path: Path, columns) -> pd.DataFrame:
+    """Read a sidecar written by _write_sidecar (parquet or pickle), optionally only `columns`."""
+    if data_path.suffix == ".parquet":
+        if columns is not None:
+            import pyarrow.parquet as pq
+            available = set(pq.read_schema(data_path).names)
+            columns = [c for c in columns if c in available]
+        return _restore_missing(pd.read_parquet(data_path, columns=columns, engine="pyarrow"))
+
+    df = pd.read_pickle(data_path)
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    return df
+
+
+def _project(df: pd.DataFrame, columns) -> pd.DataFrame:
+    return df if columns is None else df[[c for c in columns if c in df.columns]]
+
+
+def read_excel_cached(path, columns: list = None, **read_kwargs) -> pd.DataFrame:
+    """
+    Drop-in for pd.read_excel(path, **read_kwargs) backed by the sidecar cache
+    (misses are parsed with excel_reader.read_excel).
+
+    columns → optional projection; names missing from the file are skipped
+              (callers already guard with `if col in df.columns`).
+    """
+    path = Path(path)
+    if not _cache_enabled():
+        return _project(read_excel(path, **read_kwargs), columns)
+
+    st = path.stat()
+    kw_key = _kwargs_key(read_kwargs)
+    cache_dir, meta_path = _sidecar_paths(path, kw_key)
+    meta = _read_meta(meta_path)
+
+    if meta is not None:
+        data_path = cache_dir / meta["data_file"]
+        fresh = meta["size"] == st.st_size and meta["mtime_ns"] == st.st_mtime_ns
+        if not fresh and meta["sha1"] == file_sha1(path):
+            meta.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+            write_atomic(meta_path, lambda p: p.write_text(json.dumps(meta), encoding="utf-8"))
+            fresh = True
+        if fresh and data_path.exists():
+            try:
+                return load_sidecar(data_path, columns)
+            except Exception as e:
+                sys.stderr.write(f"Warning: Excel cache for {path.name} unreadable ({e}), re-parsing\n")
+
+    # ── Miss: parse the workbook and (re)write the sidecar ────────────────────
+    sha1 = file_sha1(path)
+    df = read_excel(path, **read_kwargs)
+
+    try:
+        base = f"{path.name}.{kw_key}"
+        data_file = _write_sidecar(df, cache_dir, base)
+        for stale in cache_dir.glob(f"{base}.*"):
+            if stale.name not in (data_file, meta_path.name) and ".tmp" not in stale.name:
+                stale.unlink()
+        new_meta = {
+            "version":  CACHE_VERSION,
+            "source":   str(path.resolve()),
+            "size":     st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha1":     sha1,
+            "kwargs":   json.loads(json.dumps(read_kwargs, sort_keys=True, default=str)),
+            "columns":  [str(c) for c in df.columns],
+            "rows":     len(df),
+            "data_file": data_file,
+        }
+        write_atomic(meta_path, lambda p: p.write_text(json.dumps(new_meta), encoding="utf-8"))
+    except OSError as e:
+        sys.stderr.write(f"Warning: Could not write Excel cache for {path.name}: {e}\n")
+
+    return _project(df, columns)
+
+
+def read_excel_headers(path) -> list:
+    """
+    Column names of a workbook. Served from any valid sidecar meta when
+    possible, otherwise falls back to a header-only read.
+    """
+    path = Path(path)
+    if _cache_enabled():
+        st = path.stat()
+        cache_dir = path.parent / CACHE_DIR_NAME
+        for meta_path in cache_dir.glob(f"{path.name}.*.json"):
+            meta = _read_meta(meta_path)
+            if (meta and meta.get("kwargs", {}).get("header", 0) == 0
+                    and meta["size"] == st.st_size and meta["mtime_ns"] == st.st_mtime_ns):
+                return meta["columns"]
+    return read_headers(path)
+
+
+def prune_excel_cache(folder) -> int:
+    """Remove sidecars whose source workbook no longer exists. Returns files removed."""
+    cache_dir = Path(folder) / CACHE_DIR_NAME
+    if not cache_dir.is_dir():
+        return 0
+    removed = 0
+    for meta_path in cache_dir.glob("*.json"):
+        meta = _read_meta(meta_path)
+        source = Path(meta["source"]) if meta else None
+        if source is None or not source.exists():
+            stem = meta_path.name[:-len(".json")]
+            for f in cache_dir.glob(f"{stem}.*"):
+                f.unlink()
+                removed += 1
+    return removed
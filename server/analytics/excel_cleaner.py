@@ -5,6 +5,12 @@ import re
 import math
 from datetime import date, datetime
 
+from excel_reader import read_excel
+import input_manifest
+
+# Rows scanned for the header row before falling back to the whole sheet
+HEADER_SCAN_ROWS = 50
+
 def clean_title(title_val):
     if pd.isna(title_val):
         return "", ""
@@ -357,22 +363,24 @@ def clean_excel(file_path, folder_type=None):
     print(f"[excel_cleaner] Processing file: {file_path} (Type: {folder_type})")
     
     try:
-        # Load the whole file
-        df = pd.read_excel(file_path, header=None)
-        
         header_row_idx = -1
-        
-        # Search for header row
         is_content_based = False
-        for idx, row in df.iterrows():
-            row_vals = [str(val).lower().strip() for val in row.values if pd.notna(val)]
-            row_str = ' | '.join(row_vals)
-            if 'title' in row_str and 'problem' in row_str:
-                header_row_idx = idx
-                break
-            elif 'content' in row_str:
-                header_row_idx = idx
-                is_content_based = True
+
+        # Search for header row — in the top rows first, the whole sheet only
+        # if it is not there (the sheet is parsed once more below anyway)
+        for nrows in (HEADER_SCAN_ROWS, None):
+            df = read_excel(file_path, header=None, nrows=nrows)
+            for idx, row in df.iterrows():
+                row_vals = [str(val).lower().strip() for val in row.values if pd.notna(val)]
+                row_str = ' | '.join(row_vals)
+                if 'title' in row_str and 'problem' in row_str:
+                    header_row_idx = idx
+                    break
+                elif 'content' in row_str:
+                    header_row_idx = idx
+                    is_content_based = True
+                    break
+            if header_row_idx != -1 or len(df) < HEADER_SCAN_ROWS:
                 break
                 
         if header_row_idx == -1:
@@ -382,7 +390,7 @@ def clean_excel(file_path, folder_type=None):
         print(f"[excel_cleaner] Header found at row {header_row_idx}")
         
         # Re-read with actual header, skipping rows above
-        df = pd.read_excel(file_path, header=header_row_idx)
+        df = read_excel(file_path, header=header_row_idx)
         
         # Clean current headers for flexible matching
         current_headers = [str(c).lower().strip() for c in df.columns]
@@ -548,6 +556,7 @@ def clean_excel(file_path, folder_type=None):
         # Overwrite file with cleaned data
         output_path = file_path.replace('.xlsx', '_cleaned.xlsx').replace('.xls', '_cleaned.xls')
         df.to_excel(output_path, index=False)
+        input_manifest.register(output_path, input_manifest.CLEANED)
         
         print(f"[excel_cleaner] SUCCESS: Cleaned data saved to {output_path}")
         
@@ -0,0 +1,102 @@
+"""
+excel_reader.py
+===============
+Pluggable Excel reader engine.
+
+Every workbook read in the project (excel_cache → pandas_aggregator /
+central_aggregator / extract_criticality, excel_cleaner, RAG/build_vector)
+goes through read_excel(), which uses the fastest engine installed:
+
+    calamine   python-calamine (Rust); .xlsx / .xlsm / .xlsb / .xls / .ods.
+               Roughly an order of magnitude faster than openpyxl on large
+               .xlsx files (peak memory is somewhat higher — it holds the
+               whole sheet before building the frame).
+    openpyxl   pandas' default .xlsx engine — the fallback.
+
+Both engines yield the same frame for this project's workbooks (values,
+dtypes, header offsets, dtype= hints), so switching engines never changes
+results; excel_cache sidecars are shared between them.
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+ENGINE SELECTION
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    engine= argument  >  MARKET_PULSE_EXCEL_ENGINE  >  auto
+
+    auto       calamine when installed, otherwise pandas' default engine
+    calamine   calamine (falls back to auto with a warning if not installed)
+    openpyxl   always openpyxl for .xlsx / .xlsm
+
+If calamine cannot parse a workbook, the read is retried once with
+openpyxl (.xlsx / .xlsm) and a warning is written to stderr.
+
+Install with:  pip install python-calamine   (pandas >= 2.2)
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import python_calamine  # noqa: F401
+    CALAMINE_AVAILABLE = True
+except ImportError:
+    CALAMINE_AVAILABLE = False
+
+ENGINE_ENV = "MARKET_PULSE_EXCEL_ENGINE"
+
+_CALAMINE_SUFFIXES = {".xlsx", ".xlsm", ".xlsb", ".xls", ".ods"}
+_OPENPYXL_SUFFIXES = {".xlsx", ".xlsm"}
+
+
+def available_engines() -> list:
+    """Reader engines usable in this environment, fastest first."""
+    engines = ["calamine"] if CALAMINE_AVAILABLE else []
+    try:
+        import openpyxl  # noqa: F401
+        engines.append("openpyxl")
+    except ImportError:
+        pass
+    return engines
+
+
+def resolve_engine(path, engine: str = None):
+    """
+    Engine name to pass to pd.read_excel for `path` (None → pandas' own
+    default for the extension).
+    """
+    requested = (engine or os.environ.get(ENGINE_ENV) or "auto").lower()
+    suffix = Path(path).suffix.lower()
+
+    if requested == "calamine" and not CALAMINE_AVAILABLE:
+        sys.stderr.write("Warning: calamine engine requested but python-calamine is not installed\n")
+        requested = "auto"
+
+    if requested in ("auto", "calamine"):
+        if CALAMINE_AVAILABLE and suffix in _CALAMINE_SUFFIXES:
+            return "calamine"
+        return "openpyxl" if suffix in _OPENPYXL_SUFFIXES else None
+    return requested
+
+
+def read_excel(path, engine: str = None, **kwargs) -> pd.DataFrame:
+    """
+    pd.read_excel(path, **kwargs) with the selected engine. All read_excel
+    options (dtype, header, sheet_name, nrows, usecols ...) pass through.
+    """
+    chosen = resolve_engine(path, engine)
+    try:
+        return pd.read_excel(path, engine=chosen, **kwargs)
+    except (FileNotFoundError, PermissionError):
+        raise
+    except Exception as e:
+        if chosen != "calamine" or Path(path).suffix.lower() not in _OPENPYXL_SUFFIXES:
+            raise
+        sys.stderr.write(f"Warning: calamine could not read {Path(path).name} ({e}), retrying with openpyxl\n")
+        return pd.read_excel(path, engine="openpyxl", **kwargs)
+
+
+def read_headers(path, header: int = 0, engine: str = None) -> list:
+    """Column names of the first sheet (no data rows parsed)."""
+    return read_excel(path, engine=engine, header=header, nrows=0).columns.tolist()
@@ -43,13 +43,23 @@ SIMILAR BUG COUNT  (new dimension, applied to both schemas)
     Two signals combined:
 
     1. combo_count — issues with identical (Issue Type + Sub-Issue Type).
-    2. title_similar_count — TF-IDF cosine similarity on titles.
+    2. title_similar_count — TF-IDF cosine similarity on titles, counted
+       in sparse row blocks (never a dense n×n matrix).
 
     similar_bug_count = max(combo_count, title_similar_count)
     Relative score = min(similar_bug_count, cap) / cap
 
     Falls back to combo_count only if sklearn is not installed.
 
+    Incremental mode (opt-in, similarity_index.py): for a file scored again
+    after new issues were appended, only the new titles are vectorised and
+    compared with the stored corpus.
+
+    Partitioned mode (opt-in, SIMILARITY_PARTITION): titles are compared
+    only within equal values of the partition columns (e.g. Module), in
+    parallel across processes — Σ partition² instead of n². Impact report:
+    python server/analytics/similarity_report.py <module> --partition Module
+
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 SCORE  (0-100)
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -64,18 +74,31 @@ TIERS  (stable regardless of weight changes)
     Low       < 45
 """
 
+import os
+import sys
 import pandas as pd
 import json
 import numpy as np
 from typing import Optional
 
+from excel_cache import read_excel_cached
+import input_manifest
+import score_cache
+import similarity_index
+
 try:
     from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
+    from sklearn.preprocessing import normalize
     SKLEARN_AVAILABLE = True
 except ImportError:
     SKLEARN_AVAILABLE = False
 
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
 
 # ===========================================================================
 #  SHARED CONFIG
@@ -130,6 +153,21 @@ SUB_ISSUE_TYPE_RANK = {
 MAX_SIMILAR_BUGS = 20
 TITLE_SIMILARITY_THRESHOLD = 0.25
 
+# Opt-in blocking: compare titles only within equal values of these columns
+# (e.g. ['Module'] or ['Issue Type', 'Sub-Issue Type']); None → whole file.
+# Overridden per call (similarity_partition=) or by
+# MARKET_PULSE_SIMILARITY_PARTITION="Issue Type,Sub-Issue Type".
+SIMILARITY_PARTITION = None
+
+# Worker processes for partitioned similarity (MARKET_PULSE_SIMILARITY_JOBS)
+SIMILARITY_JOBS = 1
+
+# Title similarity is computed in row blocks of at most this many
+# (row × issue) similarity cells, bounding memory independent of file size
+SIMILARITY_BLOCK_CELLS = 1 << 24
+
+TITLE_VECTORIZER_PARAMS = dict(stop_words='english', ngram_range=(1, 2), min_df=1)
+
 
 # ===========================================================================
 #  SCHEMA 1 CONFIG
@@ -143,6 +181,15 @@ SCHEMA1_WEIGHTS = {
     'similar':    0.15,
 }
 
+# Relative-score column of each weight, in the order _score_schema1 sums them
+SCHEMA1_DIMENSIONS = {
+    'priority':   '_p',
+    'frequency':  '_f',
+    'issue_type': '_i',
+    'status':     '_s',
+    'similar':    '_sim',
+}
+
 SCHEMA1_PRIORITY_RANK = {
     'A': 3,
     'B': 2,
@@ -184,6 +231,15 @@ SCHEMA2_WEIGHTS = {
     'similar':    0.15,
 }
 
+# Relative-score column of each weight, in the order _score_schema2 sums them
+SCHEMA2_DIMENSIONS = {
+    'severity':   '_sv',
+    'issue_type': '_i',
+    'sub_issue':  '_si',
+    'resolve':    '_r',
+    'similar':    '_sim',
+}
+
 SCHEMA2_SEVERITY_RANK = {
     'High':   3,
     'Medium': 2,
@@ -273,6 +329,46 @@ def _normalize_status(val):
         return 'Other'
 
 
+# ── Vectorised forms of the scalar helpers above ─────────────────────────────
+# Each scalar helper runs once per DISTINCT value of a column (a lookup
+# table), and the table is applied to the rows by code — same values as
+# Series.apply(helper), without a Python call per row.
+
+def _map_distinct(col: pd.Series, func) -> np.ndarray:
+    """object ndarray of func(v) for every cell of col, func evaluated once per distinct value."""
+    values = col.to_numpy(dtype=object)
+    codes, uniques = pd.factorize(values)
+    table = [func(u) for u in uniques]
+    na = codes == -1
+    table.append(func(values[na][0]) if na.any() else None)   # code -1 → missing cell
+    out = np.empty(len(table), dtype=object)
+    out[:] = table
+    return out[codes]
+
+
+def _rel_series(col: pd.Series, rank_map: dict, default_rank: int = 1) -> pd.Series:
+    """col.apply(lambda v: _rel(v, rank_map, default_rank)) from a normalised lookup table."""
+    max_rank = max(rank_map.values()) if rank_map else 1
+    rel = _map_distinct(col, lambda v: rank_map.get(v, default_rank) / max_rank)
+    return pd.Series(rel.astype(float), index=col.index)
+
+
+def _status_groups(col: pd.Series) -> pd.Series:
+    """col.apply(_normalize_status)"""
+    return pd.Series(_map_distinct(col, _normalize_status), index=col.index, dtype=object)
+
+
+def _assign_tiers(scores: pd.Series, thresholds: dict) -> pd.Series:
+    """scores.apply(lambda s: _assign_tier(s, thresholds))"""
+    values = scores.to_numpy(dtype=float)
+    tiers = np.select(
+        [values >= thresholds['Severe'], values >= thresholds['Moderate']],
+        ['Severe', 'Moderate'],
+        default='Low',
+    ).astype(object)
+    return pd.Series(tiers, index=scores.index, dtype=object)
+
+
 def _build_severity_summary(df: pd.DataFrame, excluded_df: pd.DataFrame = None) -> dict:
     """
     Flat summary keyed by severity level: High / Medium / Low.
@@ -369,11 +465,119 @@ def _build_severity_summary(df: pd.DataFrame, excluded_df: pd.DataFrame = None)
 #  SIMILAR BUG COUNT
 # ===========================================================================
 
+def _title_vectors(titles: list):
+    """L2-normalised TF-IDF rows of titles (as cosine_similarity normalises)."""
+    return normalize(TfidfVectorizer(**TITLE_VECTORIZER_PARAMS).fit_transform(titles))
+
+
+def _count_similar(mat, similarity_threshold: float) -> np.ndarray:
+    """
+    Per row of mat: how many OTHER rows have a dot product >= threshold,
+    one block of at most SIMILARITY_BLOCK_CELLS cells at a time.
+    """
+    n = mat.shape[0]
+    mat_t = mat.T.tocsr()
+    counts = np.zeros(n, dtype=int)
+    step = max(1, min(n, SIMILARITY_BLOCK_CELLS // max(n, 1)))
+    for start in range(0, n, step):
+        block = (mat[start:start + step] @ mat_t).tocsr()
+        rows  = np.repeat(np.arange(block.shape[0]), np.diff(block.indptr))
+        keep  = (block.data >= similarity_threshold) & (block.indices != rows + start)
+        counts[start:start + block.shape[0]] = np.bincount(rows[keep], minlength=block.shape[0])
+    return counts
+
+
+def _title_similarity_counts(titles: list, similarity_threshold: float) -> np.ndarray:
+    """
+    Per title: how many OTHER titles have TF-IDF cosine similarity
+    >= similarity_threshold.
+
+    Same values as thresholding cosine_similarity(mat) with a zeroed
+    diagonal: the L2-normalised rows are multiplied sparse × sparse, one
+    block of rows at a time, and only the entries at or above the threshold
+    are counted. Each row of a sparse product is computed independently, so
+    blocking does not change a single similarity value.
+    """
+    n = len(titles)
+    mat = _title_vectors(titles)
+    if similarity_threshold <= 0:               # every cell qualifies, even the zeroed diagonal
+        return np.full(n, n, dtype=int)
+    return _count_similar(mat, similarity_threshold)
+
+
+def _partition_keys(df: pd.DataFrame, partition: Optional[list]):
+    """Partition label per row ('||'-joined values of the partition columns present), or None."""
+    cols = [c for c in (partition or []) if c in df.columns]
+    if not cols:
+        return None
+    keys = df[cols[0]].astype(str)
+    for col in cols[1:]:
+        keys = keys + '||' + df[col].astype(str)
+    return keys
+
+
+def _count_partition(task: tuple) -> np.ndarray:
+    """Pool worker: _count_similar() of one partition's rows."""
+    mat, similarity_threshold = task
+    return _count_similar(mat, similarity_threshold)
+
+
+def _partitioned_similarity_counts(
+    titles: list, keys: pd.Series, similarity_threshold: float, jobs: int = 1,
+) -> np.ndarray:
+    """
+    _title_similarity_counts() restricted to pairs in the same partition
+    (equal `keys`). The vectorizer is fitted on all titles, so every
+    similarity is the one the global mode computes — a partition's count is
+    the global count minus the matches in other partitions. Costs
+    Σ partition² instead of n²; jobs > 1 scores the partitions in a process
+    pool (largest first).
+    """
+    n = len(titles)
+    mat = _title_vectors(titles)
+    codes, _ = pd.factorize(keys)
+    sizes = np.bincount(codes, minlength=1)
+    if similarity_threshold <= 0:
+        return sizes[codes].astype(int)
+
+    order = np.argsort(codes, kind='stable')
+    parts = np.split(order, np.cumsum(sizes)[:-1])
+    parts = sorted((p for p in parts if len(p) > 1), key=len, reverse=True)
+    tasks = [(mat[p], similarity_threshold) for p in parts]
+
+    results = None
+    if jobs > 1 and len(tasks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+                results = list(pool.map(_count_partition, tasks,
+                                        chunksize=max(1, len(tasks) // (jobs * 4))))
+        except (OSError, RuntimeError) as e:
+            sys.stderr.write(f"Warning: similarity pool failed ({e}), scoring partitions serially\n")
+    if results is None:
+        results = [_count_partition(t) for t in tasks]
+
+    counts = np.zeros(n, dtype=int)
+    for p, c in zip(parts, results):
+        counts[p] = c
+    return counts
+
+
 def _compute_similar_bug_counts(
     df: pd.DataFrame,
     similarity_threshold: float = TITLE_SIMILARITY_THRESHOLD,
     max_similar_bugs: int = MAX_SIMILAR_BUGS,
+    index_source=None,
+    partition: Optional[list] = None,
+    jobs: int = 1,
 ) -> pd.Series:
+    """
+    Relative similar-bug score per row. With `partition` (columns) titles
+    are only compared within equal values of those columns; otherwise, with
+    `index_source` (the input file the frame was read from), title
+    similarity is kept up to date in that file's similarity_index instead of
+    being recomputed from scratch.
+    """
     n = len(df)
     idx = df.index
 
@@ -387,14 +591,17 @@ def _compute_similar_bug_counts(
     if SKLEARN_AVAILABLE and n > 1:
         titles = df['Title'].fillna('').astype(str).tolist()
         try:
-            tfidf = TfidfVectorizer(stop_words='english', ngram_range=(1, 2), min_df=1)
-            mat = tfidf.fit_transform(titles)
-            sim_matrix = cosine_similarity(mat)
-            np.fill_diagonal(sim_matrix, 0)
-            title_sim_counts = pd.Series(
-                (sim_matrix >= similarity_threshold).sum(axis=1),
-                index=idx, dtype=int
-            )
+            keys = _partition_keys(df, partition)
+            if keys is not None:
+                counts = _partitioned_similarity_counts(titles, keys, similarity_threshold, jobs)
+            elif index_source is not None and similarity_threshold > 0:
+                counts = similarity_index.title_similarity_counts(
+                    titles, similarity_threshold,
+                    TfidfVectorizer(**TITLE_VECTORIZER_PARAMS), index_source,
+                )
+            else:
+                counts = _title_similarity_counts(titles, similarity_threshold)
+            title_sim_counts = pd.Series(counts, index=idx, dtype=int)
         except Exception:
             title_sim_counts = pd.Series(0, index=idx, dtype=int)
     else:
@@ -411,7 +618,8 @@ def _compute_similar_bug_counts(
 #  SCHEMA-SPECIFIC SCORERS
 # ===========================================================================
 
-def _score_schema1(df: pd.DataFrame, cfg: dict) -> pd.DataFrame:
+def _score_schema1(df: pd.DataFrame, cfg: dict) -> tuple:
+    """Score df in place → (df, dimension matrix: rows × SCHEMA1_DIMENSIONS)."""
     w   = cfg['weights']
     pr  = cfg['priority_rank']
     fr  = cfg['frequency_rank']
@@ -419,14 +627,17 @@ def _score_schema1(df: pd.DataFrame, cfg: dict) -> pd.DataFrame:
     sr  = cfg['status_rank']
     sim_cfg = cfg['similar_bug_config']
 
-    df['_p']   = df['Priority'].apply(lambda v: _rel(v, pr))
-    df['_f']   = df['Occurr. Freq.'].apply(lambda v: _rel(v, fr))
-    df['_i']   = df['Issue Type'].apply(lambda v: _rel(v, itr))
-    df['_s']   = df['Progr.Stat.'].apply(lambda v: _rel(v, sr, default_rank=0))
+    df['_p']   = _rel_series(df['Priority'], pr)
+    df['_f']   = _rel_series(df['Occurr. Freq.'], fr)
+    df['_i']   = _rel_series(df['Issue Type'], itr)
+    df['_s']   = _rel_series(df['Progr.Stat.'], sr, default_rank=0)
     df['_sim'] = _compute_similar_bug_counts(
         df,
         similarity_threshold=sim_cfg['title_similarity_threshold'],
         max_similar_bugs=sim_cfg['max_similar_bugs'],
+        index_source=cfg.get('similarity_source'),
+        partition=sim_cfg.get('partition'),
+        jobs=cfg.get('similarity_jobs', 1),
     )
 
     df['criticality_score'] = (
@@ -443,11 +654,13 @@ def _score_schema1(df: pd.DataFrame, cfg: dict) -> pd.DataFrame:
     df['status_contribution']     = (df['_s']   * w['status']     * 100).round(1)
     df['similar_contribution']    = (df['_sim'] * w['similar']    * 100).round(1)
 
+    dimensions = df[list(SCHEMA1_DIMENSIONS.values())].to_numpy(dtype=float)
     df.drop(columns=['_p', '_f', '_i', '_s', '_sim'], inplace=True)
-    return df
+    return df, dimensions
 
 
-def _score_schema2(df: pd.DataFrame, cfg: dict) -> pd.DataFrame:
+def _score_schema2(df: pd.DataFrame, cfg: dict) -> tuple:
+    """Score df in place → (df, dimension matrix: rows × SCHEMA2_DIMENSIONS)."""
     w   = cfg['weights']
     svr = cfg['severity_rank']
     itr = cfg['issue_type_rank']
@@ -455,14 +668,17 @@ def _score_schema2(df: pd.DataFrame, cfg: dict) -> pd.DataFrame:
     rr  = cfg['resolve_rank']
     sim_cfg = cfg['similar_bug_config']
 
-    df['_sv']  = df['Severity'].apply(lambda v: _rel(v, svr))
-    df['_i']   = df['Issue Type'].apply(lambda v: _rel(v, itr))
-    df['_si']  = df['Sub-Issue Type'].apply(lambda v: _rel(v, sir))
-    df['_r']   = df['Resolve'].fillna('').apply(lambda v: _rel(v, rr, default_rank=1))
+    df['_sv']  = _rel_series(df['Severity'], svr)
+    df['_i']   = _rel_series(df['Issue Type'], itr)
+    df['_si']  = _rel_series(df['Sub-Issue Type'], sir)
+    df['_r']   = _rel_series(df['Resolve'].fillna(''), rr, default_rank=1)
     df['_sim'] = _compute_similar_bug_counts(
         df,
         similarity_threshold=sim_cfg['title_similarity_threshold'],
         max_similar_bugs=sim_cfg['max_similar_bugs'],
+        index_source=cfg.get('similarity_source'),
+        partition=sim_cfg.get('partition'),
+        jobs=cfg.get('similarity_jobs', 1),
     )
 
     df['criticality_score'] = (
@@ -479,73 +695,149 @@ def _score_schema2(df: pd.DataFrame, cfg: dict) -> pd.DataFrame:
     df['resolve_contribution']    = (df['_r']   * w['resolve']    * 100).round(1)
     df['similar_contribution']    = (df['_sim'] * w['similar']    * 100).round(1)
 
+    dimensions = df[list(SCHEMA2_DIMENSIONS.values())].to_numpy(dtype=float)
     df.drop(columns=['_sv', '_i', '_si', '_r', '_sim'], inplace=True)
-    return df
+    return df, dimensions
 
 
 # ===========================================================================
 #  CORE EXTRACTION FUNCTION
 # ===========================================================================
 
-def extract_criticality_data(
-    filepath: str,
-    # ── CHANGE: severity_filter removed — all severities are now processed ──
-    # Similar bug config overrides
+def _load_frame(source) -> pd.DataFrame:
+    """Accept a path (read through the sidecar cache) or an already-loaded frame."""
+    if isinstance(source, pd.DataFrame):
+        return source
+    return read_excel_cached(source)
+
+
+def _effective_config(
     max_similar_bugs: Optional[int] = None,
     title_similarity_threshold: Optional[float] = None,
-    # Schema 1 overrides
     schema1_weights: Optional[dict] = None,
     schema1_priority_rank: Optional[dict] = None,
     schema1_frequency_rank: Optional[dict] = None,
     schema1_issue_type_rank: Optional[dict] = None,
     schema1_status_rank: Optional[dict] = None,
-    # Schema 2 overrides
     schema2_weights: Optional[dict] = None,
     schema2_severity_rank: Optional[dict] = None,
     schema2_issue_type_rank: Optional[dict] = None,
     schema2_sub_issue_rank: Optional[dict] = None,
     schema2_resolve_rank: Optional[dict] = None,
-    # Shared override
     tier_thresholds: Optional[dict] = None,
+    incremental_similarity: Optional[bool] = None,
+    similarity_partition: Optional[list] = None,
 ) -> dict:
     """
-    Auto-detects file schema, excludes closed/unnecessary/duplicate rows,
-    scores all remaining issues (all severities), and returns structured result.
+    Overrides with the module defaults filled in: the config scoring
+    actually runs with (weights not yet normalised). Also the score_cache key.
+    """
+    sim_cfg = {
+        'max_similar_bugs':           max_similar_bugs or MAX_SIMILAR_BUGS,
+        'title_similarity_threshold': title_similarity_threshold or TITLE_SIMILARITY_THRESHOLD,
+    }
+    if incremental_similarity is None:
+        incremental_similarity = similarity_index.enabled()
+    if incremental_similarity:
+        sim_cfg['incremental'] = True           # only listed when on: default keys unchanged
+    if similarity_partition is None:
+        env = os.environ.get('MARKET_PULSE_SIMILARITY_PARTITION', '')
+        similarity_partition = [c.strip() for c in env.split(',') if c.strip()] or SIMILARITY_PARTITION
+    if similarity_partition:
+        sim_cfg['partition'] = list(similarity_partition)
+    return {
+        'thr':     tier_thresholds or TIER_THRESHOLDS,
+        'sim_cfg': sim_cfg,
+        'schema1': {
+            'weights':          schema1_weights         or SCHEMA1_WEIGHTS,
+            'priority_rank':    schema1_priority_rank   or SCHEMA1_PRIORITY_RANK,
+            'frequency_rank':   schema1_frequency_rank  or SCHEMA1_FREQUENCY_RANK,
+            'issue_type_rank':  schema1_issue_type_rank or ISSUE_TYPE_RANK,
+            'status_rank':      schema1_status_rank     or SCHEMA1_STATUS_RANK,
+            'similar_bug_config': sim_cfg,
+        },
+        'schema2': {
+            'weights':          schema2_weights         or SCHEMA2_WEIGHTS,
+            'severity_rank':    schema2_severity_rank   or SCHEMA2_SEVERITY_RANK,
+            'issue_type_rank':  schema2_issue_type_rank or ISSUE_TYPE_RANK,
+            'sub_issue_rank':   schema2_sub_issue_rank  or SUB_ISSUE_TYPE_RANK,
+            'resolve_rank':     schema2_resolve_rank    or SCHEMA2_RESOLVE_RANK,
+            'similar_bug_config': sim_cfg,
+        },
+        'sklearn_available': SKLEARN_AVAILABLE,
+    }
 
-    ── KEY CHANGE FROM PREVIOUS VERSION ────────────────────────────────────
-    severity_filter parameter removed.
-    All severities (High / Medium / Low) are now scored together.
 
-    Exclusion rules (applied before scoring):
-        Schema 1 Progr.Stat. :  Resolve-Unnecessary, Resolve-Duplicated,
-                                 Close, Closed
-        Schema 2 Progr.Stat. :  Resolve-Unnecessary, Maintain current status,
-                                 Not problem, Close, Closed
-        Schema 2 Resolve     :  Duplicated issue(Cause side),
-                                 Maintain current status, Not problem
-    ────────────────────────────────────────────────────────────────────────
+def score_criticality_frame(
+    df: pd.DataFrame,
+    max_similar_bugs: Optional[int] = None,
+    title_similarity_threshold: Optional[float] = None,
+    schema1_weights: Optional[dict] = None,
+    schema1_priority_rank: Optional[dict] = None,
+    schema1_frequency_rank: Optional[dict] = None,
+    schema1_issue_type_rank: Optional[dict] = None,
+    schema1_status_rank: Optional[dict] = None,
+    schema2_weights: Optional[dict] = None,
+    schema2_severity_rank: Optional[dict] = None,
+    schema2_issue_type_rank: Optional[dict] = None,
+    schema2_sub_issue_rank: Optional[dict] = None,
+    schema2_resolve_rank: Optional[dict] = None,
+    tier_thresholds: Optional[dict] = None,
+    incremental_similarity: Optional[bool] = None,
+    similarity_partition: Optional[list] = None,
+    similarity_jobs: Optional[int] = None,
+    source=None,
+) -> dict:
+    """
+    Core of extract_criticality_data(): detect schema on the loaded frame,
+    split active / excluded rows and score the active ones. The input frame
+    is not modified. `source` is the input file the frame was read from; it
+    locates the similarity index when incremental similarity is on (without
+    it the similarity is always computed in full). `similarity_jobs` is the
+    process count of partitioned similarity (does not change results).
 
     Returns
     -------
     dict:
-        schema          → 'schema1' or 'schema2'
-        issues          → list of scored dicts, sorted by score desc
-        severity_breakdown → High/Medium/Low counts with scale-down applied
-        total_input     → total rows in file
-        excluded        → rows removed before scoring
-        active          → rows that were scored
-        config_used     → weights, thresholds, similar config applied
+        schema       → 'schema1' or 'schema2'
+        active       → scored active rows, ORIGINAL order and index,
+                       with status_group, criticality_score (rounded), tier
+                       and the *_contribution columns
+        excluded     → excluded rows (original index) with status_group
+        total_input  → rows in the frame
+        dimensions   → float ndarray, one row per active row (same order),
+                       one column per weight of the schema's *_DIMENSIONS:
+                       the relative scores before weighting (what_if.py)
+        cfg / thr / sim_cfg → configuration applied
+        score_cols / base_cols → output columns for the issues list
+
+    extract_criticality_data() and export_moved_issues_updated_file() both
+    accept this dict, so one parse + one scoring pass serves both.
     """
+    conf = _effective_config(
+        max_similar_bugs=max_similar_bugs,
+        title_similarity_threshold=title_similarity_threshold,
+        schema1_weights=schema1_weights,
+        schema1_priority_rank=schema1_priority_rank,
+        schema1_frequency_rank=schema1_frequency_rank,
+        schema1_issue_type_rank=schema1_issue_type_rank,
+        schema1_status_rank=schema1_status_rank,
+        schema2_weights=schema2_weights,
+        schema2_severity_rank=schema2_severity_rank,
+        schema2_issue_type_rank=schema2_issue_type_rank,
+        schema2_sub_issue_rank=schema2_sub_issue_rank,
+        schema2_resolve_rank=schema2_resolve_rank,
+        tier_thresholds=tier_thresholds,
+        incremental_similarity=incremental_similarity,
+        similarity_partition=similarity_partition,
+    )
+    thr     = conf['thr']
+    sim_cfg = conf['sim_cfg']
+    similarity_source = source if sim_cfg.get('incremental') else None
+    if similarity_jobs is None:
+        similarity_jobs = int(os.environ.get('MARKET_PULSE_SIMILARITY_JOBS', SIMILARITY_JOBS))
 
-    thr = tier_thresholds or TIER_THRESHOLDS
-
-    sim_cfg = {
-        'max_similar_bugs':           max_similar_bugs or MAX_SIMILAR_BUGS,
-        'title_similarity_threshold': title_similarity_threshold or TITLE_SIMILARITY_THRESHOLD,
-    }
-
-    # ── 1. Load and detect schema ──────────────────────────────────────────
-    df = pd.read_excel(filepath)
+    # ── 1. Detect schema ───────────────────────────────────────────────────
     total_input = len(df)
     schema = _detect_schema(df)
 
@@ -554,23 +846,16 @@ def extract_criticality_data(
 
         excl_mask = df['Progr.Stat.'].isin(SCHEMA1_EXCLUDED_STATUSES)
         excluded_df = df[excl_mask].copy()
-        excluded_count = len(excluded_df)
         df = df[~excl_mask].copy()
 
         # Normalize status for both sets
-        df['status_group'] = df['Progr.Stat.'].apply(_normalize_status)
-        excluded_df['status_group'] = excluded_df['Progr.Stat.'].apply(_normalize_status)
+        df['status_group'] = _status_groups(df['Progr.Stat.'])
+        excluded_df['status_group'] = _status_groups(excluded_df['Progr.Stat.'])
 
-        cfg = {
-            'weights':          _normalise_weights(schema1_weights or SCHEMA1_WEIGHTS),
-            'priority_rank':    schema1_priority_rank   or SCHEMA1_PRIORITY_RANK,
-            'frequency_rank':   schema1_frequency_rank  or SCHEMA1_FREQUENCY_RANK,
-            'issue_type_rank':  schema1_issue_type_rank or ISSUE_TYPE_RANK,
-            'status_rank':      schema1_status_rank     or SCHEMA1_STATUS_RANK,
-            'similar_bug_config': sim_cfg,
-        }
+        cfg = dict(conf['schema1'], weights=_normalise_weights(conf['schema1']['weights']),
+                   similarity_source=similarity_source, similarity_jobs=similarity_jobs)
 
-        df = _score_schema1(df, cfg)
+        df, dimensions = _score_schema1(df, cfg)
 
         score_cols = [
             'criticality_score', 'tier',
@@ -591,23 +876,16 @@ def extract_criticality_data(
             df['Resolve'].isin(SCHEMA2_EXCLUDED_RESOLVE)
         )
         excluded_df = df[excl_mask].copy()
-        excluded_count = len(excluded_df)
         df = df[~excl_mask].copy()
 
         # Normalize status for both sets
-        df['status_group'] = df['Progr.Stat.'].apply(_normalize_status)
-        excluded_df['status_group'] = excluded_df['Progr.Stat.'].apply(_normalize_status)
+        df['status_group'] = _status_groups(df['Progr.Stat.'])
+        excluded_df['status_group'] = _status_groups(excluded_df['Progr.Stat.'])
 
-        cfg = {
-            'weights':          _normalise_weights(schema2_weights or SCHEMA2_WEIGHTS),
-            'severity_rank':    schema2_severity_rank   or SCHEMA2_SEVERITY_RANK,
-            'issue_type_rank':  schema2_issue_type_rank or ISSUE_TYPE_RANK,
-            'sub_issue_rank':   schema2_sub_issue_rank  or SUB_ISSUE_TYPE_RANK,
-            'resolve_rank':     schema2_resolve_rank    or SCHEMA2_RESOLVE_RANK,
-            'similar_bug_config': sim_cfg,
-        }
+        cfg = dict(conf['schema2'], weights=_normalise_weights(conf['schema2']['weights']),
+                   similarity_source=similarity_source, similarity_jobs=similarity_jobs)
 
-        df = _score_schema2(df, cfg)
+        df, dimensions = _score_schema2(df, cfg)
 
         score_cols = [
             'criticality_score', 'tier',
@@ -620,36 +898,151 @@ def extract_criticality_data(
             'Sub-Issue Type', 'Module', 'Resolve', 'Progr.Stat.', 'AI Insight',
         ]
 
-    active_count = len(df)
-
-    # ── 3. Round, assign tier, sort ────────────────────────────────────────
+    # ── 3. Round, assign tier ──────────────────────────────────────────────
     df['criticality_score'] = df['criticality_score'].round(1)
-    df['tier'] = df['criticality_score'].apply(lambda s: _assign_tier(s, thr))
+    df['tier'] = _assign_tiers(df['criticality_score'], thr)
+
+    return {
+        'schema':      schema,
+        'active':      df,
+        'excluded':    excluded_df,
+        'total_input': total_input,
+        'dimensions':  dimensions,
+        'cfg':         cfg,
+        'thr':         thr,
+        'sim_cfg':     sim_cfg,
+        'score_cols':  score_cols,
+        'base_cols':   base_cols,
+    }
+
+
+def extract_criticality_data(
+    filepath,
+    # ── CHANGE: severity_filter removed — all severities are processed ──
+    # Similar bug config overrides
+    max_similar_bugs: Optional[int] = None,
+    title_similarity_threshold: Optional[float] = None,
+    # Schema 1 overrides
+    schema1_weights: Optional[dict] = None,
+    schema1_priority_rank: Optional[dict] = None,
+    schema1_frequency_rank: Optional[dict] = None,
+    schema1_issue_type_rank: Optional[dict] = None,
+    schema1_status_rank: Optional[dict] = None,
+    # Schema 2 overrides
+    schema2_weights: Optional[dict] = None,
+    schema2_severity_rank: Optional[dict] = None,
+    schema2_issue_type_rank: Optional[dict] = None,
+    schema2_sub_issue_rank: Optional[dict] = None,
+    schema2_resolve_rank: Optional[dict] = None,
+    # Shared override
+    tier_thresholds: Optional[dict] = None,
+    # Incremental similar-bug counting (None → MARKET_PULSE_INCREMENTAL_SIMILARITY)
+    incremental_similarity: Optional[bool] = None,
+    # Partitioned similarity: columns (None → SIMILARITY_PARTITION) and processes
+    similarity_partition: Optional[list] = None,
+    similarity_jobs: Optional[int] = None,
+    # Pre-computed score_criticality_frame() result (skips load + scoring)
+    scored: Optional[dict] = None,
+) -> dict:
+    """
+    Auto-detects file schema, excludes closed/unnecessary/duplicate rows,
+    scores all remaining issues (all severities), and returns structured result.
+
+    `filepath` may be a path or an already-loaded DataFrame (schema is
+    detected on the frame, so a caller that has parsed the file once can
+    reuse it). Pass `scored` to reuse a score_criticality_frame() result.
+
+    Results for a path are cached by file content + effective config
+    (score_cache.py): an unchanged file is not parsed or scored again.
+    Treat the returned dict as read-only.
+
+    ── KEY CHANGE FROM PREVIOUS VERSION ────────────────────────────────────
+    severity_filter parameter removed.
+    All severities (High / Medium / Low) are now scored together.
+
+    Exclusion rules (applied before scoring):
+        Schema 1 Progr.Stat. :  Resolve-Unnecessary, Resolve-Duplicated,
+                                 Close, Closed
+        Schema 2 Progr.Stat. :  Resolve-Unnecessary, Maintain current status,
+                                 Not problem, Close, Closed
+        Schema 2 Resolve     :  Duplicated issue(Cause side),
+                                 Maintain current status, Not problem
+    ────────────────────────────────────────────────────────────────────────
+
+    Returns
+    -------
+    dict:
+        schema          → 'schema1' or 'schema2'
+        issues          → list of scored dicts, sorted by score desc
+        severity_breakdown → High/Medium/Low counts with scale-down applied
+        total_input     → total rows in file
+        excluded        → rows removed before scoring
+        active          → rows that were scored
+        config_used     → weights, thresholds, similar config applied
+    """
+    overrides = dict(
+        max_similar_bugs=max_similar_bugs,
+        title_similarity_threshold=title_similarity_threshold,
+        schema1_weights=schema1_weights,
+        schema1_priority_rank=schema1_priority_rank,
+        schema1_frequency_rank=schema1_frequency_rank,
+        schema1_issue_type_rank=schema1_issue_type_rank,
+        schema1_status_rank=schema1_status_rank,
+        schema2_weights=schema2_weights,
+        schema2_severity_rank=schema2_severity_rank,
+        schema2_issue_type_rank=schema2_issue_type_rank,
+        schema2_sub_issue_rank=schema2_sub_issue_rank,
+        schema2_resolve_rank=schema2_resolve_rank,
+        tier_thresholds=tier_thresholds,
+        incremental_similarity=incremental_similarity,
+        similarity_partition=similarity_partition,
+    )
+
+    cache_key = None
+    if scored is None and not isinstance(filepath, pd.DataFrame) and score_cache.enabled():
+        cache_key = score_cache.config_key(_effective_config(**overrides))
+        cached = score_cache.get(filepath, cache_key)
+        if cached is not None:
+            return cached
+
+    if scored is None:
+        source = None if isinstance(filepath, pd.DataFrame) else filepath
+        scored = score_criticality_frame(_load_frame(filepath), source=source,
+                                         similarity_jobs=similarity_jobs, **overrides)
+
+    schema      = scored['schema']
+    excluded_df = scored['excluded']
+    df          = scored['active'].copy()
+
+    # ── 4. Sort ────────────────────────────────────────────────────────────
     df['AI Insight'] = df['AI Insight'].fillna('')
     df = df.sort_values('criticality_score', ascending=False).reset_index(drop=True)
 
-    # ── 4. Build output ────────────────────────────────────────────────────
-    existing_base = [c for c in base_cols if c in df.columns]
-    issues = df[existing_base + score_cols].to_dict(orient='records')
+    # ── 5. Build output ────────────────────────────────────────────────────
+    existing_base = [c for c in scored['base_cols'] if c in df.columns]
+    issues = df[existing_base + scored['score_cols']].to_dict(orient='records')
 
-    # ── 5. Build per-severity breakdown (with High scale-down applied) ────
+    # ── 6. Build per-severity breakdown (with High scale-down applied) ────
     severity_breakdown = _build_severity_summary(df, excluded_df)
 
-    return {
+    result = {
         'schema':             schema,
         'issues':             issues,
         'severity_breakdown': severity_breakdown,
-        'total_input':        total_input,
-        'excluded':           excluded_count,
-        'active':             active_count,
+        'total_input':        scored['total_input'],
+        'excluded':           len(excluded_df),
+        'active':             len(df),
         'config_used': {
             'schema':             schema,
-            'weights':            cfg['weights'],
-            'tier_thresholds':    thr,
-            'similar_bug_config': sim_cfg,
+            'weights':            scored['cfg']['weights'],
+            'tier_thresholds':    scored['thr'],
+            'similar_bug_config': scored['sim_cfg'],
             'sklearn_available':  SKLEARN_AVAILABLE,
         },
     }
+    if cache_key is not None:
+        score_cache.put(filepath, cache_key, result)
+    return result
 
 
 # ===========================================================================
@@ -710,98 +1103,134 @@ def export_to_excel(filepath: str, output_path: str, **kwargs) -> None:
 #  MOVED ISSUES EXPORT — ALL rows with tier + updated_tier columns
 # ===========================================================================
 
-def export_moved_issues_updated_file(filepath: str, output_path: str = None, **kwargs) -> str:
+# Row colours by Remark value ('No Change' rows stay unfilled / white)
+MOVED_REMARK_COLOURS = {
+    'Severe - No Change':                          'FDECEA',   # light red   (High kept)
+    'Moved to Moderate from High':                 'FFF3CD',   # light amber (moved)
+    'Moved to Deferred from High':                 'FCE4EC',   # light pink  (moved)
+    'Moved to Moderate from Medium (scored Severe)': 'E8F4FD', # light blue  (Medium scaled)
+}
+_MOVED_SHEET  = 'All Issues'
+_HEADER_FILL  = '1E293B'
+_MAX_COL_WIDTH = 48
+
+
+def _column_widths(combined: pd.DataFrame) -> list:
+    """Auto column widths (header or longest value + 4, max 48)."""
+    widths = []
+    for col_name in combined.columns:
+        vals    = combined[col_name].drop_duplicates().astype(str)
+        max_len = max(len(str(col_name)),
+                      vals.str.len().max() if not vals.empty else 0)
+        widths.append(min(int(max_len) + 4, _MAX_COL_WIDTH))
+    return widths
+
+
+def _cell_rows(combined: pd.DataFrame):
+    """Rows as tuples of plain Python values, NaN / NaT → None (empty cell)."""
+    values = combined.astype(object).where(combined.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+def _remark_rules(combined: pd.DataFrame) -> tuple:
+    """(cell range, [(formula, colour)]) — row colours as conditional formats."""
+    from openpyxl.utils import get_column_letter
+    last   = get_column_letter(len(combined.columns))
+    remark = get_column_letter(combined.columns.get_loc('Remark') + 1)
+    rng    = f"A2:{last}{max(len(combined), 1) + 1}"
+    rules  = [(f'${remark}2="{value}"', colour)
+              for value, colour in MOVED_REMARK_COLOURS.items()]
+    return rng, rules
+
+
+def _write_moved_issues_xlsxwriter(combined: pd.DataFrame, output_path: str) -> None:
+    wb = xlsxwriter.Workbook(output_path, {
+        'constant_memory':     True,
+        'strings_to_formulas': False,
+        'strings_to_urls':     False,
+        'nan_inf_to_errors':   True,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+    })
+    ws = wb.add_worksheet(_MOVED_SHEET)
+    for col_idx, width in enumerate(_column_widths(combined)):
+        ws.set_column(col_idx, col_idx, width)
+
+    header = wb.add_format({'bold': True, 'font_color': '#FFFFFF', 'bg_color': f'#{_HEADER_FILL}',
+                            'border': 1, 'align': 'center', 'valign': 'top'})
+    ws.write_row(0, 0, [str(c) for c in combined.columns], header)
+    for row_idx, row in enumerate(_cell_rows(combined), start=1):
+        ws.write_row(row_idx, 0, row)
+
+    rng, rules = _remark_rules(combined)
+    for formula, colour in rules:
+        ws.conditional_format(rng, {'type': 'formula', 'criteria': f'={formula}',
+                                    'format': wb.add_format({'bg_color': f'#{colour}'})})
+    wb.close()
+
+
+def _write_moved_issues_openpyxl(combined: pd.DataFrame, output_path: str) -> None:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.formatting.rule import FormulaRule
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(_MOVED_SHEET)
+    for col_idx, width in enumerate(_column_widths(combined), start=1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = width
+
+    thin = Side(style='thin')
+    header = []
+    for col_name in combined.columns:
+        cell = WriteOnlyCell(ws, value=str(col_name))
+        cell.fill      = PatternFill(fill_type='solid', fgColor=_HEADER_FILL)
+        cell.font      = Font(bold=True, color='FFFFFF')
+        cell.border    = Border(left=thin, right=thin, top=thin, bottom=thin)
+        cell.alignment = Alignment(horizontal='center', vertical='top')
+        header.append(cell)
+    ws.append(header)
+    for row in _cell_rows(combined):
+        ws.append(row)
+
+    rng, rules = _remark_rules(combined)
+    for formula, colour in rules:
+        ws.conditional_formatting.add(rng, FormulaRule(
+            formula=[formula], fill=PatternFill(fill_type='solid', bgColor=colour)))
+    wb.save(output_path)
+
+
+def _write_moved_issues(combined: pd.DataFrame, output_path: str) -> None:
     """
-    Save ALL rows from the original Excel file to 'moved_issues_updated_file.xlsx'.
-
-    Two new columns added:
-        tier         = raw criticality tier scored by engine
-                       (Severe / Moderate / Low / Excluded)
-
-        updated_tier = tier after High-severity scale-down:
-                       Severity=High, tier=Severe   → updated_tier=Severe   (kept)
-                       Severity=High, tier=Moderate → updated_tier=Moderate (moved)
-                       Severity=High, tier=Low      → updated_tier=Deferred (moved)
-                       Severity=High, tier=Excluded → updated_tier=Deferred (moved)
-                       Any other Severity row        → updated_tier=tier     (unchanged)
-
-    A Remark column shows what happened:
-        "Severe - No Change"
-        "Moved to Moderate from High"
-        "Moved to Deferred from High"
-        "No Change"  (for all Medium / Low / Excluded non-High rows)
-
-    Output: moved_issues_updated_file.xlsx  in same folder as input.
-
-    Excel colour coding:
-        Red    = Severity=High, updated_tier=Severe   (most critical, kept)
-        Amber  = Severity=High, updated_tier=Moderate (moved down)
-        Pink   = Severity=High, updated_tier=Deferred (moved down)
-        White  = all other rows (Medium / Low)
+    Stream `combined` to a single-sheet workbook: rows are written once, in
+    order (xlsxwriter constant_memory, or an openpyxl write-only workbook
+    when xlsxwriter is not installed), and the row colours are a handful of
+    conditional formats on the Remark column instead of one fill per cell.
     """
-    import os
-
-    # ── Output path ────────────────────────────────────────────────────
-    if output_path is None:
-        src_dir     = os.path.dirname(os.path.abspath(str(filepath)))
-        output_path = os.path.join(src_dir, 'moved_issues_updated_file.xlsx')
-    print(f"  [INFO] Saving to: {output_path}")
-
-    thr     = kwargs.get('tier_thresholds') or TIER_THRESHOLDS
-    sim_cfg = {
-        'max_similar_bugs':           kwargs.get('max_similar_bugs')           or MAX_SIMILAR_BUGS,
-        'title_similarity_threshold': kwargs.get('title_similarity_threshold') or TITLE_SIMILARITY_THRESHOLD,
-    }
-
-    # ── Load ALL rows, preserve original order ─────────────────────────
-    df_all = pd.read_excel(filepath)
-    df_all['_orig_idx'] = range(len(df_all))
-    schema = _detect_schema(df_all.drop(columns=['_orig_idx']))
-
-    # ── Split active vs excluded ───────────────────────────────────────
-    if schema == 'schema1':
-        excl_mask = df_all['Progr.Stat.'].isin(SCHEMA1_EXCLUDED_STATUSES)
-        cfg = {
-            'weights':          _normalise_weights(SCHEMA1_WEIGHTS),
-            'priority_rank':    SCHEMA1_PRIORITY_RANK,
-            'frequency_rank':   SCHEMA1_FREQUENCY_RANK,
-            'issue_type_rank':  ISSUE_TYPE_RANK,
-            'status_rank':      SCHEMA1_STATUS_RANK,
-            'similar_bug_config': sim_cfg,
-        }
+    if XLSXWRITER_AVAILABLE:
+        _write_moved_issues_xlsxwriter(combined, output_path)
     else:
-        excl_mask = (
-            df_all['Progr.Stat.'].isin(SCHEMA2_EXCLUDED_STATUSES) |
-            df_all['Resolve'].isin(SCHEMA2_EXCLUDED_RESOLVE)
-        )
-        cfg = {
-            'weights':          _normalise_weights(SCHEMA2_WEIGHTS),
-            'severity_rank':    SCHEMA2_SEVERITY_RANK,
-            'issue_type_rank':  ISSUE_TYPE_RANK,
-            'sub_issue_rank':   SUB_ISSUE_TYPE_RANK,
-            'resolve_rank':     SCHEMA2_RESOLVE_RANK,
-            'similar_bug_config': sim_cfg,
-        }
+        _write_moved_issues_openpyxl(combined, output_path)
 
-    active_df   = df_all[~excl_mask].copy()
-    excluded_df = df_all[excl_mask].copy()
 
-    # ── Score active rows ──────────────────────────────────────────────
-    active_df['status_group'] = active_df['Progr.Stat.'].apply(_normalize_status)
-    if schema == 'schema1':
-        active_df = _score_schema1(active_df, cfg)
-    else:
-        active_df = _score_schema2(active_df, cfg)
-    active_df['criticality_score'] = active_df['criticality_score'].round(1)
-    active_df['tier'] = active_df['criticality_score'].apply(lambda s: _assign_tier(s, thr))
+def moved_issues_frame(scored: dict) -> pd.DataFrame:
+    """
+    All rows of a score_criticality_frame() result with Remark / tier /
+    updated_tier / criticality_score in front, in export order — the sheet
+    export_moved_issues_updated_file() writes.
+    """
+    active_df   = scored['active'].copy()
+    excluded_df = scored['excluded'].copy()
 
     # ── Mark excluded rows ─────────────────────────────────────────────
     excluded_df['tier']              = 'Excluded'
     excluded_df['criticality_score'] = None
 
     # ── Combine and restore original row order ─────────────────────────
-    combined = pd.concat([active_df, excluded_df], ignore_index=True)
-    combined.sort_values('_orig_idx', inplace=True)
+    # Both frames keep the source frame's index, so sorting on it restores
+    # the order of the original file.
+    combined = pd.concat([active_df, excluded_df])
+    combined.sort_index(kind="stable", inplace=True)
     combined.reset_index(drop=True, inplace=True)
 
     has_sev = 'Severity' in combined.columns
@@ -813,42 +1242,40 @@ def export_moved_issues_updated_file(filepath: str, output_path: str = None, **k
     #   High + tier=Low      → updated_tier=Deferred (moved down)
     #   High + tier=Excluded → updated_tier=Deferred (moved down)
     # All other rows: updated_tier = tier  (unchanged)
-    def _get_updated_tier(row):
-        sev  = str(row['Severity']).strip() if has_sev else ''
-        tier = str(row['tier']).strip()
-        if sev == 'High':
-            if tier == 'Severe':
-                return 'Severe'
-            if tier == 'Moderate':
-                return 'Moderate'
-            if tier in ('Low', 'Excluded'):
-                return 'Deferred'
-        if sev == 'Medium' and tier == 'Severe':
-            return 'Moderate'   # Medium severity cannot stay Severe → scaled to Moderate
-        return tier   # all other rows unchanged
-
-    combined['updated_tier'] = combined.apply(_get_updated_tier, axis=1)
+    # Medium + tier=Severe → Moderate (Medium severity cannot stay Severe)
+    _strip = lambda v: str(v).strip()
+    sev  = (_map_distinct(combined['Severity'], _strip) if has_sev
+            else np.full(len(combined), '', dtype=object))
+    tier = _map_distinct(combined['tier'], _strip)
+    high, medium = sev == 'High', sev == 'Medium'
+
+    updated_tier = np.select(
+        [
+            high & (tier == 'Severe'),
+            high & (tier == 'Moderate'),
+            high & ((tier == 'Low') | (tier == 'Excluded')),
+            medium & (tier == 'Severe'),
+        ],
+        ['Severe', 'Moderate', 'Deferred', 'Moderate'],
+        default=tier,
+    ).astype(object)
+    combined['updated_tier'] = updated_tier
 
     # ── Remark column ──────────────────────────────────────────────────
-    def _get_remark(row):
-        sev          = str(row['Severity']).strip() if has_sev else ''
-        tier         = str(row['tier']).strip()
-        updated_tier = str(row['updated_tier']).strip()
-        if sev == 'High':
-            if updated_tier == 'Severe':
-                return 'Severe - No Change'
-            if updated_tier == 'Moderate':
-                return 'Moved to Moderate from High'
-            if updated_tier == 'Deferred':
-                return 'Moved to Deferred from High'
-        if sev == 'Medium' and tier == 'Severe' and updated_tier == 'Moderate':
-            return 'Moved to Moderate from Medium (scored Severe)'
-        return 'No Change'
-
-    combined['Remark'] = combined.apply(_get_remark, axis=1)
+    combined['Remark'] = np.select(
+        [
+            high & (updated_tier == 'Severe'),
+            high & (updated_tier == 'Moderate'),
+            high & (updated_tier == 'Deferred'),
+            medium & (tier == 'Severe') & (updated_tier == 'Moderate'),
+        ],
+        ['Severe - No Change', 'Moved to Moderate from High',
+         'Moved to Deferred from High', 'Moved to Moderate from Medium (scored Severe)'],
+        default='No Change',
+    ).astype(object)
 
     # ── Drop internal helper columns ───────────────────────────────────
-    drop_cols = ['_orig_idx', 'status_group',
+    drop_cols = ['status_group',
                  '_p', '_f', '_i', '_s', '_sim', '_sv', '_si', '_r',
                  'priority_contribution', 'frequency_contribution',
                  'issue_type_contribution', 'status_contribution',
@@ -875,49 +1302,81 @@ def export_moved_issues_updated_file(filepath: str, output_path: str = None, **k
     combined.sort_values('_sort', inplace=True)
     combined.drop(columns=['_sort'], inplace=True)
     combined.reset_index(drop=True, inplace=True)
+    return combined
+
+
+def export_moved_issues_updated_file(
+    filepath: str,
+    output_path: str = None,
+    df: Optional[pd.DataFrame] = None,
+    scored: Optional[dict] = None,
+    **kwargs,
+) -> str:
+    """
+    Save ALL rows from the original Excel file to 'moved_issues_updated_file.xlsx'.
+
+    `df` (the already-loaded file) and `scored` (its score_criticality_frame()
+    result) are optional; pass them to skip re-reading and re-scoring.
+
+    Two new columns added:
+        tier         = raw criticality tier scored by engine
+                       (Severe / Moderate / Low / Excluded)
+
+        updated_tier = tier after High-severity scale-down:
+                       Severity=High, tier=Severe   → updated_tier=Severe   (kept)
+                       Severity=High, tier=Moderate → updated_tier=Moderate (moved)
+                       Severity=High, tier=Low      → updated_tier=Deferred (moved)
+                       Severity=High, tier=Excluded → updated_tier=Deferred (moved)
+                       Any other Severity row        → updated_tier=tier     (unchanged)
+
+    A Remark column shows what happened:
+        "Severe - No Change"
+        "Moved to Moderate from High"
+        "Moved to Deferred from High"
+        "No Change"  (for all Medium / Low / Excluded non-High rows)
+
+    Output: moved_issues_updated_file.xlsx  in same folder as input.
+
+    Excel colour coding (conditional formats on the Remark column):
+        Red    = Severity=High, updated_tier=Severe   (most critical, kept)
+        Amber  = Severity=High, updated_tier=Moderate (moved down)
+        Pink   = Severity=High, updated_tier=Deferred (moved down)
+        Blue   = Severity=Medium, scored Severe → Moderate
+        White  = all other rows (Medium / Low)
+
+    Pipeline callers go through moved_export.export(), which caches the
+    export per input content hash.
+    """
+    import os
+
+    # ── Output path ────────────────────────────────────────────────────
+    if output_path is None:
+        src_dir     = os.path.dirname(os.path.abspath(str(filepath)))
+        output_path = os.path.join(src_dir, 'moved_issues_updated_file.xlsx')
+    print(f"  [INFO] Saving to: {output_path}")
+
+    # ── Score ALL rows once (or reuse the caller's scoring) ────────────
+    # Schema overrides are not applied here (weights/ranks are the module
+    # defaults); only thresholds and the similar-bug config are honoured.
+    if scored is None:
+        scored = score_criticality_frame(
+            df if df is not None else _load_frame(filepath),
+            max_similar_bugs=kwargs.get('max_similar_bugs'),
+            title_similarity_threshold=kwargs.get('title_similarity_threshold'),
+            tier_thresholds=kwargs.get('tier_thresholds'),
+            incremental_similarity=kwargs.get('incremental_similarity'),
+            similarity_partition=kwargs.get('similarity_partition'),
+            similarity_jobs=kwargs.get('similarity_jobs'),
+            source=filepath,
+        )
+
+    combined = moved_issues_frame(scored)
 
     # ── Write to Excel ─────────────────────────────────────────────────
     try:
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            combined.to_excel(writer, index=False, sheet_name='All Issues')
-            ws = writer.sheets['All Issues']
-
-            from openpyxl.styles import PatternFill, Font
-
-            # Header row styling
-            hdr_fill = PatternFill(fill_type='solid', fgColor='1E293B')
-            hdr_font = Font(bold=True, color='FFFFFF')
-            for cell in ws[1]:
-                cell.fill = hdr_fill
-                cell.font = hdr_font
-
-            # Row colours by Remark value
-            colours = {
-                'Severe - No Change':                          'FDECEA',   # light red   (High kept)
-                'Moved to Moderate from High':                 'FFF3CD',   # light amber (moved)
-                'Moved to Deferred from High':                 'FCE4EC',   # light pink  (moved)
-                'Moved to Moderate from Medium (scored Severe)': 'E8F4FD', # light blue  (Medium scaled)
-                'No Change':                                   'FFFFFF',   # white       (other rows)
-            }
-            remark_col_idx = combined.columns.get_loc('Remark') + 1  # 1-based
-
-            for row_idx in range(2, len(combined) + 2):
-                cell_val = ws.cell(row_idx, remark_col_idx).value or ''
-                colour   = colours.get(cell_val, 'FFFFFF')
-                fill     = PatternFill(fill_type='solid', fgColor=colour)
-                for col_idx in range(1, len(combined.columns) + 1):
-                    ws.cell(row_idx, col_idx).fill = fill
-
-            # Auto column widths (max 48)
-            for col_idx, col_name in enumerate(combined.columns, start=1):
-                vals    = combined[col_name].astype(str)
-                max_len = max(len(str(col_name)),
-                              vals.str.len().max() if not vals.empty else 0)
-                ws.column_dimensions[
-                    ws.cell(1, col_idx).column_letter
-                ].width = min(int(max_len) + 4, 48)
-
+        _write_moved_issues(combined, output_path)
         print(f"  [OK] Saved successfully → {output_path}")
+        input_manifest.register(output_path, input_manifest.DERIVED)
 
     except Exception as exc:
         import traceback
@@ -13,7 +13,6 @@ Trigger conditions:
 """
 
 import os
-import json
 import subprocess
 import sys
 import hashlib
@@ -24,6 +23,9 @@ from collections import defaultdict
 # Add the directory to sys.path to allow importing sibling modules when run as a subprocess
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+import json_io
+import row_store
+
 def aggregate_analytics_data():
     """
     Read all analytics.json files and aggregate unique models and modules.
@@ -42,8 +44,7 @@ def aggregate_analytics_data():
     for file_path in analytics_files:
         try:
             if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                data = json_io.load(file_path)
 
                 # Aggregate models from top_models
                 if 'top_models' in data and data['top_models']:
@@ -92,8 +93,7 @@ def get_per_source_data():
     for file_path, source_name in analytics_files:
         try:
             if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                data = json_io.load(file_path)
 
                 # Extract and map top_models
                 top_models_raw = data.get('top_models', [])
@@ -111,7 +111,8 @@ def get_per_source_data():
 
                 # Group issues by module
                 module_issues = {}
-                rows = data.get('rows', [])
+                rows = row_store.iter_rows(os.path.dirname(file_path),
+                                           fields=['Module', 'Title', 'Case Code'], summary=data)
                 for row in rows:
                     module = row.get('Module', '')
                     title = row.get('Title', '')
@@ -205,9 +206,7 @@ def run_aggregator_directly():
             "filtered_top_modules": filtered_top_modules
         }
 
-        # Sanitize NaN values
-        response = ca.sanitize_nan(response)
-
+        # NaN / NumPy values are handled by json_io at write time
         return response
     except Exception as e:
         print(f"Exception running aggregator directly: {e}")
@@ -218,13 +217,14 @@ def compute_data_hash(data):
     Compute a hash of the data content for cache validation.
     """
     # Create a normalized JSON string for consistent hashing
-    normalized_json = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    normalized_json = json_io.dumps(data, sort_keys=True)
     return hashlib.sha256(normalized_json.encode('utf-8')).hexdigest()
 
-def generate_central_cache():
+def generate_central_cache(pretty=False):
     """
     Generate the centralized dashboard cache by aggregating all dashboard data.
     Uses single aggregator call for efficiency.
+    Written compact; pretty=True (--pretty) indents it for debugging.
     """
     print("Generating centralized dashboard cache...")
 
@@ -296,8 +296,7 @@ def generate_central_cache():
     # Write cache file
     cache_file = cache_dir / "central_dashboard.json"
     try:
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, indent=2, ensure_ascii=False)
+        json_io.dump(cache_data, cache_file, pretty=pretty)
         print(f"Cache generated successfully: {cache_file}")
         print(f"Cache size: {os.path.getsize(cache_file)} bytes")
         print(f"Data hash: {data_hash[:16]}...")
@@ -352,8 +351,7 @@ def validate_cache_freshness():
         current_hash = compute_data_hash(current_core_data)
 
         # Load cached data
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cached_data = json.load(f)
+        cached_data = json_io.load(cache_file)
 
         # Get cached hash
         cached_hash = cached_data.get("data_hash")
@@ -383,5 +381,5 @@ if __name__ == "__main__":
         sys.exit(0 if is_fresh else 1)
     else:
         # Generate cache
-        success = generate_central_cache()
+        success = generate_central_cache(pretty='--pretty' in sys.argv)
         sys.exit(0 if success else 1)
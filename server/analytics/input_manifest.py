@@ -0,0 +1,367 @@
+"""
+input_manifest.py
+=================
+Canonical input manifest of a downloads/<module> folder.
+
+The pipeline writes its own workbooks next to the uploaded inputs
+(moved_export: *_moved_issues_updated_file.xlsx, extract_criticality:
+moved_issues_updated_file.xlsx, excel_cleaner: *_cleaned.xlsx), and the
+loaders globbed *.xlsx — so refreshes parsed derived outputs again and the
+work grew with every upload. Each folder now keeps a manifest:
+
+    downloads/<module>/__inputs__/manifest.json
+    downloads/<module>/__inputs__/archive/month=YYYY-MM/<file name>.parquet
+
+classifying its workbooks as
+
+    input      canonical input                         → read by the loaders
+    cleaned    excel_cleaner output (*_cleaned.xlsx)   → never read
+    derived    pipeline export (moved issues ...)      → never read
+    archived   historical input compacted into the
+               archive (see below)                     → read from parquet
+
+New workbooks are classified by name on the next scan(); producers also
+register() what they write. A kind already recorded in the manifest wins
+over the name rules, so a file can be pinned by editing the manifest.
+Loaders use canonical_inputs() + read_input() and never glob the folder.
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+COMPACTION
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+compact() moves historical inputs (all but the newest `keep`, and / or
+those older than `older_than_days`) into one hive-partitioned parquet
+archive (partition = month of the workbook's mtime). Each workbook's parsed
+frame — the frame read_excel_cached() returns — is written, read back and
+compared before the workbook is deleted. The archive entry keeps the
+workbook's fingerprint (size, mtime, SHA-1), so partials.py reuses its
+partial: compaction does not re-score anything or change the totals.
+
+A workbook re-uploaded under an archived name replaces the archived copy.
+
+Requires pyarrow for compaction; reading a folder without an archive does not.
+
+Usage:
+  python server/analytics/input_manifest.py global_voc_plm
+  python server/analytics/input_manifest.py global_voc_plm --compact --keep 3 --dry-run
+  python server/analytics/input_manifest.py downloads/beta_ut --compact --older-than 90
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import json_io
+from excel_cache import (
+    PYARROW_AVAILABLE,
+    file_sha1,
+    load_sidecar,
+    prune_excel_cache,
+    read_excel_cached,
+    write_atomic,
+)
+from score_cache import prune_score_cache
+
+INPUTS_DIR    = "__inputs__"
+MANIFEST_FILE = "manifest.json"
+ARCHIVE_DIR   = "archive"
+
+# Bump when the manifest layout changes
+MANIFEST_VERSION = 1
+
+INPUT, CLEANED, DERIVED, ARCHIVED = "input", "cleaned", "derived", "archived"
+
+_EXCEL_PATTERNS   = ("*.xlsx", "*.xls")
+_DERIVED_SUFFIXES = ("moved_issues_updated_file.xlsx",)   # per-file and default export names
+_CLEANED_SUFFIX   = "_cleaned"
+
+
+# ── Classification ────────────────────────────────────────────────────────────
+
+
+def classify(name: str):
+    """Kind of a workbook by its name (None → Office lock file, ignored)."""
+    if name.startswith("~$"):
+        return None
+    lower = name.lower()
+    if lower.endswith(_DERIVED_SUFFIXES):
+        return DERIVED
+    if Path(lower).stem.endswith(_CLEANED_SUFFIX):
+        return CLEANED
+    return INPUT
+
+
+def _list_excels(folder: Path) -> list:
+    paths = []
+    for pattern in _EXCEL_PATTERNS:
+        paths.extend(folder.glob(pattern))
+    return [p for p in paths if classify(p.name) is not None]
+
+
+# ── Manifest storage ──────────────────────────────────────────────────────────
+
+
+def _inputs_dir(folder) -> Path:
+    return Path(folder) / INPUTS_DIR
+
+
+def archive_dir(folder) -> Path:
+    """<folder>/__inputs__/archive — the partitioned columnar copies of archived inputs."""
+    return _inputs_dir(folder) / ARCHIVE_DIR
+
+
+def load_manifest(folder) -> dict:
+    """{"files": {name: {kind}}, "archive": {name: entry}} ({} parts if none)."""
+    try:
+        doc = json_io.load(_inputs_dir(folder) / MANIFEST_FILE)
+    except (OSError, ValueError):
+        doc = {}
+    if doc.get("version") != MANIFEST_VERSION:
+        doc = {}
+    return {"files": doc.get("files", {}), "archive": doc.get("archive", {})}
+
+
+def _save_manifest(folder, manifest: dict) -> None:
+    _inputs_dir(folder).mkdir(parents=True, exist_ok=True)
+    json_io.dump(
+        {"version": MANIFEST_VERSION, "files": manifest["files"], "archive": manifest["archive"]},
+        _inputs_dir(folder) / MANIFEST_FILE, pretty=True,
+    )
+
+
+def scan(folder) -> dict:
+    """
+    Manifest of `folder` brought up to date with the workbooks on disk: new
+    workbooks are classified by name, vanished ones dropped (archive entries
+    are kept). Written back only when something changed.
+    """
+    folder   = Path(folder)
+    manifest = load_manifest(folder)
+    files    = manifest["files"]
+
+    on_disk = {p.name for p in _list_excels(folder)}
+    changed = False
+    for name in sorted(on_disk - set(files)):
+        files[name] = {"kind": classify(name)}
+        changed = True
+    for name in set(files) - on_disk:
+        del files[name]
+        changed = True
+
+    if changed:
+        _save_manifest(folder, manifest)
+    return manifest
+
+
+def register(path, kind: str) -> None:
+    """
+    Record that `path` was written by the pipeline as `kind` (CLEANED /
+    DERIVED). Only folders that already have a manifest are updated.
+    """
+    path = Path(path)
+    if not (_inputs_dir(path.parent) / MANIFEST_FILE).exists():
+        return
+    manifest = load_manifest(path.parent)
+    if manifest["files"].get(path.name, {}).get("kind") != kind:
+        manifest["files"][path.name] = {"kind": kind}
+        _save_manifest(path.parent, manifest)
+
+
+# ── Loader API ────────────────────────────────────────────────────────────────
+
+
+def is_archived(path) -> bool:
+    """True for an archive parquet file returned by canonical_inputs()."""
+    parts = Path(path).parts
+    return len(parts) >= 4 and parts[-3] == ARCHIVE_DIR and parts[-4] == INPUTS_DIR
+
+
+def source_name(path) -> str:
+    """Workbook name of an input path (archive files map back to the workbook)."""
+    path = Path(path)
+    return path.name[:-len(".parquet")] if is_archived(path) else path.name
+
+
+def canonical_inputs(folder) -> list:
+    """
+    Paths the loaders read for `folder` — archived inputs and live input
+    workbooks, ordered by workbook name so that compaction never changes the
+    row order (or which file wins a duplicate Case Code). Refreshes the
+    manifest first.
+    """
+    folder   = Path(folder)
+    manifest = scan(folder)
+    live = [
+        p for p in _list_excels(folder)
+        if manifest["files"].get(p.name, {}).get("kind") == INPUT
+    ]
+    live_names = {p.name for p in live}
+
+    archived = []
+    for name in sorted(manifest["archive"]):
+        if name in live_names:
+            continue                    # re-uploaded → the live workbook wins
+        data_path = archive_dir(folder) / manifest["archive"][name]["data_file"]
+        if data_path.exists():
+            archived.append(data_path)
+        else:
+            sys.stderr.write(f"Warning: archived input {name} missing ({data_path})\n")
+    return sorted(archived + live, key=source_name)
+
+
+def read_input(path, columns: list = None) -> pd.DataFrame:
+    """Raw frame of a canonical input (workbook via the Excel cache, or archive)."""
+    if is_archived(path):
+        return load_sidecar(Path(path), columns)
+    return read_excel_cached(path, columns=columns)
+
+
+def archived_fingerprint(path):
+    """
+    {size, mtime_ns, sha1} of the workbook an archive file was compacted
+    from (None for live workbooks) — the partials.fingerprint() of the
+    original, so stored partials stay valid after compaction.
+    """
+    if not is_archived(path):
+        return None
+    entry = load_manifest(Path(path).parents[3])["archive"].get(source_name(path))
+    if entry is None:
+        return None
+    return {k: entry[k] for k in ("size", "mtime_ns", "sha1")}
+
+
+# ── Compaction ────────────────────────────────────────────────────────────────
+
+
+def compact(folder, keep: int = None, older_than_days: float = None,
+            dry_run: bool = False) -> list:
+    """
+    Move historical inputs into the archive. Live inputs are ordered newest
+    first (mtime); everything after the newest `keep` and / or older than
+    `older_than_days` is archived. Returns the workbook names archived (or,
+    with dry_run, that would be).
+    """
+    if keep is None and older_than_days is None:
+        raise ValueError("compact() needs keep and/or older_than_days")
+    if not PYARROW_AVAILABLE and not dry_run:
+        raise RuntimeError("compaction writes parquet and needs pyarrow (pip install pyarrow)")
+
+    folder   = Path(folder)
+    manifest = scan(folder)
+    live = sorted(
+        (p for p in _list_excels(folder) if manifest["files"].get(p.name, {}).get("kind") == INPUT),
+        key=lambda p: p.stat().st_mtime_ns, reverse=True,
+    )
+    candidates = live[keep:] if keep is not None else live
+    if older_than_days is not None:
+        cutoff = time.time() - older_than_days * 86400
+        candidates = [p for p in candidates if p.stat().st_mtime < cutoff]
+
+    if dry_run:
+        return [p.name for p in candidates]
+
+    archived = []
+    for path in candidates:
+        st    = path.stat()
+        month = datetime.fromtimestamp(st.st_mtime).strftime("%Y-%m")
+        data_file = f"month={month}/{path.name}.parquet"
+        target    = archive_dir(folder) / data_file
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            df = read_excel_cached(path)
+            write_atomic(target, lambda p: df.to_parquet(p, engine="pyarrow"))
+            if not load_sidecar(target, None).equals(df):
+                raise ValueError("frame does not round-trip through parquet")
+        except Exception as e:
+            if target.exists():
+                target.unlink()
+            sys.stderr.write(f"  [WARN]  {path.name} kept live — could not archive: {e}\n")
+            continue
+
+        manifest["archive"][path.name] = {
+            "data_file":   data_file,
+            "rows":        len(df),
+            "columns":     [str(c) for c in df.columns],
+            "size":        st.st_size,
+            "mtime_ns":    st.st_mtime_ns,
+            "sha1":        file_sha1(path),
+            "archived_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        manifest["files"].pop(path.name, None)
+        _save_manifest(folder, manifest)        # record before deleting the workbook
+        path.unlink()
+        archived.append(path.name)
+
+    if archived:
+        prune_excel_cache(folder)
+        prune_score_cache(folder)
+    return archived
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+
+def _resolve_folder(arg: str) -> Path:
+    folder = Path(arg)
+    if not folder.is_dir():
+        folder = Path("downloads") / arg
+    if not folder.is_dir():
+        raise FileNotFoundError(f"folder not found: {arg}")
+    return folder
+
+
+def _report(folder: Path) -> None:
+    manifest = scan(folder)
+    sys.stderr.write(f"\n{folder}/\n")
+    for name, entry in sorted(manifest["files"].items()):
+        sys.stderr.write(f"  [{entry['kind'].upper():<8}] {name}\n")
+    for name, entry in sorted(manifest["archive"].items()):
+        sys.stderr.write(f"  [{ARCHIVED.upper():<8}] {name}  ({entry['rows']} rows, {entry['data_file']})\n")
+
+    kinds = [e["kind"] for e in manifest["files"].values()]
+    sys.stderr.write(
+        f"  {kinds.count(INPUT)} input, {kinds.count(CLEANED)} cleaned, "
+        f"{kinds.count(DERIVED)} derived, {len(manifest['archive'])} archived\n"
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Show or compact the input manifest of analytics folders")
+    parser.add_argument("folders", nargs="+", help="downloads/<module> folders (or module names)")
+    parser.add_argument("--compact", action="store_true", help="move historical inputs into the archive")
+    parser.add_argument("--keep", type=int, help="with --compact: newest inputs to keep live")
+    parser.add_argument("--older-than", type=float, metavar="DAYS",
+                        help="with --compact: only archive inputs older than DAYS")
+    parser.add_argument("--dry-run", action="store_true", help="list what --compact would archive")
+    args = parser.parse_args(argv)
+
+    if args.compact and args.keep is None and args.older_than is None:
+        parser.error("--compact needs --keep and/or --older-than")
+
+    for arg in args.folders:
+        try:
+            folder = _resolve_folder(arg)
+            if args.compact:
+                names = compact(folder, keep=args.keep, older_than_days=args.older_than,
+                                dry_run=args.dry_run)
+                verb = "would archive" if args.dry_run else "archived"
+                for name in names:
+                    sys.stderr.write(f"  [OK]    {verb} {name}\n")
+                sys.stderr.write(f"  {len(names)} input(s) {verb} in {folder.name}/\n")
+            _report(folder)
+        except (OSError, RuntimeError) as e:
+            sys.stderr.write(f"ERROR: {e}\n")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
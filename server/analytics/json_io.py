@@ -0,0 +1,257 @@
+"""
+json_io.py
+==========
+Serialisation layer for analytics.json, central_dashboard.json and the
+aggregators' --stdout-only JSON.
+
+Previously every payload was walked recursively by sanitize_nan() (one Python
+call per cell) and then written with json.dump(indent=2). Here:
+
+  • NaN / ±inf → null, date / datetime → isoformat, NumPy scalars and
+    pandas NA / Timestamp are handled by the encoder itself (orjson when
+    installed, stdlib json otherwise) — no pre-pass over the payload.
+  • DataFrame rows are streamed to disk straight from the columns: every
+    column is factorized, each UNIQUE value is encoded once, and the row
+    fragments are assembled with vectorised object-array concatenation in
+    chunks — no per-row dicts are built.
+  • Output is compact by default; pretty=True (indent=2) is a debug option.
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+ENCODING
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Files are UTF-8. Text written to stdout is ASCII-escaped (ensure_ascii) so
+the Node side, which decodes stdout chunk by chunk, never sees a multi-byte
+character split across chunks.
+"""
+
+import json
+import math
+import os
+import re
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Rows encoded per chunk when streaming a DataFrame
+ROW_CHUNK = 20000
+
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+
+
+# ── Scalar handling ───────────────────────────────────────────────────────────
+
+
+def _default(obj):
+    """Types neither encoder handles natively (orjson `default=` / json `default=`)."""
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        value = obj.item()
+        if isinstance(value, float) and not math.isfinite(value):
+            return None
+        return value
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _sanitize(obj):
+    """stdlib fallback only: NaN / inf floats → None (json.dumps would emit NaN)."""
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    if isinstance(obj, dict):
+        return {k: _sanitize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_sanitize(v) for v in obj]
+    return obj
+
+
+def _escape_non_ascii(text: str) -> str:
+    def _esc(m):
+        cp = ord(m.group())
+        if cp > 0xFFFF:
+            cp -= 0x10000
+            return '\\u%04x\\u%04x' % (0xD800 | (cp >> 10), 0xDC00 | (cp & 0x3FF))
+        return '\\u%04x' % cp
+    return _NON_ASCII.sub(_esc, text)
+
+
+# ── Documents ─────────────────────────────────────────────────────────────────
+
+
+def dumps(obj, pretty: bool = False, sort_keys: bool = False, ensure_ascii: bool = False) -> str:
+    """Encode `obj` as JSON text (compact unless pretty)."""
+    if ORJSON_AVAILABLE:
+        opts = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if pretty:
+            opts |= orjson.OPT_INDENT_2
+        if sort_keys:
+            opts |= orjson.OPT_SORT_KEYS
+        text = orjson.dumps(obj, default=_default, option=opts).decode('utf-8')
+    else:
+        text = json.dumps(
+            _sanitize(obj), default=_default, ensure_ascii=False, sort_keys=sort_keys,
+            indent=2 if pretty else None, separators=None if pretty else (',', ':'),
+        )
+    return _escape_non_ascii(text) if ensure_ascii else text
+
+
+def loads(data):
+    """Parse JSON text or bytes."""
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+
+def load(path):
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def _open_atomic(path):
+    tmp = f"{path}.tmp{os.getpid()}"
+    return tmp, open(tmp, 'w', encoding='utf-8')
+
+
+def dump(obj, path, pretty: bool = False) -> None:
+    """Write `obj` to `path` atomically (tmp file + rename)."""
+    tmp, f = _open_atomic(path)
+    try:
+        with f:
+            f.write(dumps(obj, pretty=pretty))
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# ── Columnar row encoding ─────────────────────────────────────────────────────
+
+
+def _encode_scalar(value) -> str:
+    return dumps(value)
+
+
+def _column_values(col: pd.Series) -> np.ndarray:
+    """Plain numeric columns stay native (fast factorize); everything else →
+    object, so datetimes surface as Timestamps and extension NA as NA."""
+    if isinstance(col.dtype, np.dtype) and col.dtype.kind in 'biuf':
+        return col.to_numpy()
+    return col.to_numpy(dtype=object)
+
+
+def _encode_column(values: np.ndarray) -> np.ndarray:
+    """
+    JSON text of every cell of one column (object ndarray of str).
+
+    Values are factorized and each unique is encoded once; missing cells
+    (NaN / None / NA / NaT) encode to null. Object columns whose non-str
+    uniques mix types (1 vs 1.0 vs True hash alike but encode differently)
+    fall back to per-cell encoding.
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = list(uniques)
+    if values.dtype == object and len({type(u) for u in uniques if not isinstance(u, str)}) > 1:
+        out = np.empty(len(values), dtype=object)
+        out[:] = [_encode_scalar(v) for v in values]
+        return out
+    encoded = np.empty(len(uniques) + 1, dtype=object)
+    encoded[:-1] = [_encode_scalar(u) for u in uniques]
+    encoded[-1] = 'null'                                  # code -1 → missing
+    return encoded[codes]
+
+
+def _encode_categorical(col: pd.Series) -> np.ndarray:
+    """_encode_column() of a categorical column: each category encoded once, from the codes."""
+    categories = col.cat.categories.to_numpy(object)
+    encoded = np.empty(len(categories) + 1, dtype=object)
+    encoded[:-1] = [_encode_scalar(c) for c in categories]
+    encoded[-1] = 'null'
+    return encoded[col.cat.codes.to_numpy()]
+
+
+def _encode_series(col: pd.Series) -> np.ndarray:
+    if isinstance(col.dtype, pd.CategoricalDtype) and \
+            len({type(c) for c in col.cat.categories.to_numpy(object)}) <= 1:
+        return _encode_categorical(col)
+    return _encode_column(_column_values(col))
+
+
+def iter_record_chunks(df: pd.DataFrame, chunk_rows: int = ROW_CHUNK):
+    """
+    Yield lists with the JSON object text of each row (df.to_dict('records')
+    order and keys), `chunk_rows` rows at a time.
+    """
+    keys = [dumps(str(c)) + ':' for c in df.columns]
+    for start in range(0, len(df), chunk_rows):
+        part = df.iloc[start:start + chunk_rows]
+        acc = None
+        for j, key in enumerate(keys):
+            frag = _encode_series(part.iloc[:, j])
+            piece = (('{' if j == 0 else ',') + key) + frag
+            acc = piece if acc is None else acc + piece
+        if acc is None:                                   # no columns → empty objects
+            acc = np.full(len(part), '{', dtype=object)
+        yield (acc + '}').tolist()
+
+
+def iter_records_json(df: pd.DataFrame, chunk_rows: int = ROW_CHUNK):
+    """
+    Yield the JSON text of df.to_dict('records') as a list, in chunks:
+    '[', '{...},{...}', ',', '{...}', ..., ']'.
+    """
+    yield '['
+    for i, rows in enumerate(iter_record_chunks(df, chunk_rows)):
+        if i:
+            yield ','
+        yield ','.join(rows)
+    yield ']'
+
+
+def write_payload(target, payload: dict, rows_key: str = None, rows_df: pd.DataFrame = None,
+                  pretty: bool = False, ensure_ascii: bool = False) -> None:
+    """
+    Write `payload` to `target` (a path → atomic file write, or a text
+    stream such as sys.stdout) with `rows_df` streamed in as payload[rows_key].
+
+    rows_key keeps its position in the payload's key order. pretty=True
+    materialises the rows and indents the whole document (debug only).
+    """
+    if pretty and rows_df is not None:
+        payload = {k: (rows_df.to_dict('records') if k == rows_key else v) for k, v in payload.items()}
+        rows_df = None
+
+    def _write(stream):
+        if rows_df is None:
+            stream.write(dumps(payload, pretty=pretty, ensure_ascii=ensure_ascii))
+            return
+        stream.write('{')
+        for i, (key, value) in enumerate(payload.items()):
+            if i:
+                stream.write(',')
+            stream.write(dumps(str(key), ensure_ascii=ensure_ascii) + ':')
+            if key == rows_key:
+                for chunk in iter_records_json(rows_df):
+                    stream.write(_escape_non_ascii(chunk) if ensure_ascii else chunk)
+            else:
+                stream.write(dumps(value, ensure_ascii=ensure_ascii))
+        stream.write('}')
+
+    if hasattr(target, 'write'):
+        _write(target)
+        return
+    tmp, f = _open_atomic(target)
+    try:
+        with f:
+            _write(f)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
@@ -0,0 +1,301 @@
+"""
+kpi_kernel.py
+=============
+Vectorised KPI kernel for pandas_aggregator.
+
+Replaces the per-record Python loops of _process_folder / compute_kpis
+(tier_lookup per row, updated_tier if/else chain, _sev_dist accumulation,
+per-Issue-Type groupby loop) with column operations:
+
+    apply_tier_lookups()       Case Code merge + np.select for updated_tier
+    tier_severity_breakdown()  updated_tier × Progr.Stat. crosstab (one bincount)
+    issue_type_breakdown()     VOC Issue Type × Status crosstab (one groupby)
+    value_distributions()      category / source / status counts from ONE
+                               grouped pass over the combined key columns
+
+The *_counts / *_from_counts pairs split a breakdown into per-file counts
+and the final ordering step, so partials.py can merge per-file partials into
+the same result the combined frame would give.
+
+Every function reproduces the exact values, key order and Python types of the
+loop it replaces, so analytics.json is byte-identical.
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+WHY FACTORIZE
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+The old loops applied str(v).strip() / .lower() to every record. Columns are
+low-cardinality, so each column is factorized once (C speed) and the string
+transform runs on the uniques only; comparisons then happen on codes.
+"""
+
+import numpy as np
+import pandas as pd
+
+# VOC Status → the Open / Resolve / Close buckets used by the issue schema
+# (OPENED / PROCESSING → Open, RESOLVED → Resolve, CLOSED → Close, else Other)
+_VOC_STATUS_BUCKETS = {
+    'OPENED':     'Open',
+    'PROCESSING': 'Open',
+    'RESOLVED':   'Resolve',
+    'CLOSED':     'Close',
+}
+
+_SEVERITY_BUCKETS = ('High', 'Medium', 'Low')
+_STATUS_KEYS      = ('open', 'resolve', 'close')
+
+
+def _str_column(df: pd.DataFrame, col: str, transform) -> tuple:
+    """
+    (codes, transformed_uniques) equivalent to [transform(str(v)) for v in
+    df[col]], or a single '' unique when the column is missing (rec.get → '').
+
+    Missing cells are stringified from the cell itself: factorize would
+    collapse NaN / None / pd.NA, which str() renders differently.
+    Categorical columns (schemas.py) reuse their codes: one transform per
+    category, missing cells render as 'nan'.
+    """
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=np.intp), [transform('')]
+    series = df[col]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy().astype(np.intp)
+        out = [transform(str(c)) for c in series.cat.categories]
+        if (codes == -1).any():
+            codes[codes == -1] = len(out)
+            out.append(transform('nan'))
+        return codes, out
+    values = series.astype(object).to_numpy()
+    codes, uniques = pd.factorize(values)
+    out = [transform(str(u)) for u in uniques]
+
+    na = codes == -1
+    if na.any():
+        na_codes, na_uniques = pd.factorize(np.array([str(v) for v in values[na]], dtype=object))
+        codes = codes.copy()
+        codes[na] = na_codes + len(out)
+        out += [transform(u) for u in na_uniques]
+    return codes, out
+
+
+def _lookup(codes: np.ndarray, uniques: list, table: dict, default) -> tuple:
+    """Vectorised table.get() over factorized values → (values, found_mask)."""
+    found_u  = np.fromiter((u in table for u in uniques), dtype=bool, count=len(uniques))
+    values_u = np.empty(len(uniques), dtype=object)
+    values_u[:] = [table.get(u, default) for u in uniques]
+    return values_u[codes], found_u[codes]
+
+
+# ── Issue schema: tier merge ──────────────────────────────────────────────────
+
+
+def tier_lookups(scored_rows: list) -> tuple:
+    """
+    (tier_lookup, score_lookup) keyed by str(Case Code).strip(); later scored
+    rows win on duplicate keys, rows without a Case Code are skipped.
+    """
+    tier_lookup  = {}
+    score_lookup = {}
+    for r in scored_rows:
+        if r.get('Case Code'):
+            key = str(r.get('Case Code', '')).strip()
+            tier_lookup[key]  = r.get('tier', '')
+            score_lookup[key] = r.get('criticality_score', None)
+    return tier_lookup, score_lookup
+
+
+def case_code_keys(df: pd.DataFrame) -> list:
+    """Distinct join keys of df's rows, as apply_tier_lookups derives them."""
+    return list(dict.fromkeys(_str_column(df, 'Case Code', str.strip)[1]))
+
+
+def apply_tier_lookups(df: pd.DataFrame, tier_lookup: dict, score_lookup: dict) -> pd.DataFrame:
+    """
+    Add tier / criticality_score / updated_tier columns to `df` (in place,
+    returned for chaining) from tier_lookups() (e.g. merged from partials).
+
+    Join key: str(Case Code).strip(). Rows without a score get
+    tier='Deferred', criticality_score=None.
+
+    updated_tier (scale-down, same rules as export_moved_issues_updated_file):
+        High   + Severe   → Severe
+        High   + Moderate → Moderate
+        High   + other    → Deferred
+        Medium + Severe   → Moderate
+        otherwise         → tier
+    """
+    cc_codes, cc_keys = _str_column(df, 'Case Code', str.strip)
+    tier, found = _lookup(cc_codes, cc_keys, tier_lookup, None)
+    score, _    = _lookup(cc_codes, cc_keys, score_lookup, None)
+    tier[~found] = 'Deferred'
+
+    df['tier']              = tier
+    df['criticality_score'] = score
+
+    sev_codes, sev_u = _str_column(df, 'Severity', str.strip)
+    sev = np.asarray(sev_u, dtype=object)[sev_codes]
+
+    tier_codes, tier_u = _str_column(df, 'tier', str.strip)
+    tier_s = np.asarray(tier_u, dtype=object)[tier_codes]
+
+    high = sev == 'High'
+    df['updated_tier'] = np.select(
+        [
+            high & (tier_s == 'Severe'),
+            high & (tier_s == 'Moderate'),
+            high,
+            (sev == 'Medium') & (tier_s == 'Severe'),
+        ],
+        ['Severe', 'Moderate', 'Deferred', 'Moderate'],
+        default=tier_s,
+    ).astype(object)
+    return df
+
+
+def tier_severity_cells(df: pd.DataFrame) -> np.ndarray:
+    """
+    updated_tier bucket × Progr.Stat. status counts (3 × 4 int array; status
+    slots open / resolve / close / other). Cells of several frames add up.
+    """
+    ut_codes, ut_u = _str_column(df, 'updated_tier', str.strip)
+    bucket_u = np.array(
+        [0 if u == 'Severe' else 1 if u == 'Moderate' else 2 for u in ut_u], dtype=np.intp
+    )
+
+    st_codes, st_u = _str_column(df, 'Progr.Stat.', str.lower)
+    status_u = np.array(
+        [next((i for i, p in enumerate(_STATUS_KEYS) if u.startswith(p)), 3) for u in st_u],
+        dtype=np.intp,
+    )
+
+    # One bincount over (bucket, status) cells: 3 buckets × 4 status slots
+    return np.bincount(bucket_u[ut_codes] * 4 + status_u[st_codes], minlength=12).reshape(3, 4)
+
+
+def tier_severity_breakdown(df: pd.DataFrame) -> dict:
+    """
+    severity_distribution from updated_tier × Progr.Stat.:
+        Severe → High, Moderate → Medium, anything else → Low;
+        status split by Progr.Stat. prefix (open / resolve / close).
+    """
+    return tier_severity_from_cells(tier_severity_cells(df))
+
+
+def tier_severity_from_cells(cells) -> dict:
+    cells = np.asarray(cells, dtype=np.int64).reshape(3, 4)
+    return {
+        bucket: {
+            'total':   int(cells[b].sum()),
+            'open':    int(cells[b, 0]),
+            'resolve': int(cells[b, 1]),
+            'close':   int(cells[b, 2]),
+        }
+        for b, bucket in enumerate(_SEVERITY_BUCKETS)
+    }
+
+
+# ── VOC schema ────────────────────────────────────────────────────────────────
+
+
+def normalize_voc_status(df: pd.DataFrame) -> pd.Series:
+    """df['Status'] mapped to Open / Resolve / Close / Other (case-insensitive)."""
+    codes, uniques = _str_column(df, 'Status', str.upper)
+    mapped = np.asarray([_VOC_STATUS_BUCKETS.get(u, 'Other') for u in uniques], dtype=object)
+    return pd.Series(mapped[codes], index=df.index, dtype=object)
+
+
+def issue_type_counts(df: pd.DataFrame, norm_status: pd.Series) -> list:
+    """[[Issue Type (NaN → 'Other'), normalised Status, rows], ...]"""
+    issue_type = df['Issue Type'].astype(object).fillna('Other')
+    counts = pd.DataFrame({'it': issue_type, 'st': norm_status}).groupby(['it', 'st'], sort=False).size()
+    return [[it, st, int(n)] for (it, st), n in counts.items()]
+
+
+def issue_type_breakdown(df: pd.DataFrame, norm_status: pd.Series) -> dict:
+    """
+    VOC severity_distribution: Issue Type (NaN → 'Other') × normalised
+    Status, keys in sorted Issue Type order.
+    """
+    return issue_type_breakdown_from_counts(issue_type_counts(df, norm_status))
+
+
+def issue_type_breakdown_from_counts(triples: list) -> dict:
+    """issue_type_breakdown() from issue_type_counts() triples (any number of files)."""
+    if not triples:
+        return {}
+    counts = (
+        pd.DataFrame(triples, columns=['it', 'st', 'n'])
+        .groupby(['it', 'st'], sort=True)['n']
+        .sum()
+        .unstack(fill_value=0)
+    )
+    totals = counts.sum(axis=1)
+
+    def _col(name):
+        return counts[name] if name in counts.columns else pd.Series(0, index=counts.index)
+
+    opens, resolves, closes = _col('Open'), _col('Resolve'), _col('Close')
+    return {
+        str(it): {
+            'total':   int(totals[it]),
+            'open':    int(opens[it]),
+            'resolve': int(resolves[it]),
+            'close':   int(closes[it]),
+        }
+        for it in counts.index
+    }
+
+
+# ── Distributions ─────────────────────────────────────────────────────────────
+
+
+def value_distributions(columns: dict) -> dict:
+    """
+    {name: Series} → {name: value_counts().to_dict()} for every series, from
+    one grouped pass over the combined keys.
+
+    The combos are grouped in first-appearance order, so each marginal lists
+    its values in first-appearance order too — exactly the order value_counts
+    sorts from — and the same sort_values(ascending=False) gives identical
+    tie-breaking.
+    """
+    names = [n for n, s in columns.items() if s is not None]
+    if not names:
+        return {n: {} for n in columns}
+
+    frame = pd.DataFrame({n: columns[n].astype(object) for n in names})
+    combos = frame.groupby(names, sort=False, dropna=False).size().reset_index(name='_n')
+
+    out = {n: {} for n in columns}
+    for n in names:
+        counts = combos.groupby(n, sort=False, dropna=True)['_n'].sum()
+        counts.index.name = n
+        out[n] = counts.sort_values(ascending=False).to_dict()
+    return out
+
+
+def first_seen_counts(values: pd.Series) -> list:
+    """[[value, count], ...] of the non-missing values, in first-appearance order."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        codes = codes[codes >= 0]
+        uniq, first = np.unique(codes, return_index=True)
+        order = uniq[np.argsort(first, kind='stable')]
+        counts = np.bincount(codes, minlength=len(values.cat.categories))[order]
+        labels = values.cat.categories.to_numpy(object)[order]
+        return [[k, int(n)] for k, n in zip(labels, counts)]
+    values = values.astype(object)
+    counts = values.groupby(values, sort=False, dropna=True).size()
+    return [[k, int(n)] for k, n in counts.items()]
+
+
+def counts_from_pairs(pair_lists) -> pd.Series:
+    """
+    Merge first_seen_counts() lists (files in order) into one count Series in
+    first-appearance order — the order value_counts / value_distributions sort
+    from, so .sort_values(ascending=False) ties break identically.
+    """
+    merged = {}
+    for pairs in pair_lists:
+        for value, n in pairs:
+            merged[value] = merged.get(value, 0) + n
+    return pd.Series(list(merged.values()), index=pd.Index(list(merged), dtype=object), dtype='int64')
@@ -0,0 +1,159 @@
+"""
+moved_export.py
+===============
+On-demand, cached moved_issues_updated_file.xlsx exports.
+
+export_moved_issues_updated_file() used to run for every issue-schema
+workbook on every pandas_aggregator run — often longer than the
+aggregation itself. It now runs only when asked for:
+
+    python server/analytics/moved_export.py <module|folder> [--file NAME] [--force]
+    GET /api/moved-issues/:module[?file=NAME]          (server.js)
+    python server/analytics/pandas_aggregator.py ... --export-moved
+
+and each export is remembered per input (score_cache, kind "moved"):
+
+    <folder>/__score_cache__/<file name>.<config key>.moved.pkl / .json
+
+The entry is keyed by the input's content hash (size + mtime, then SHA-1,
+as every score_cache entry) and the effective scoring config, and records
+the size and mtime of the workbook it wrote. An export is reused while the
+input and config are unchanged and the workbook on disk is the one written;
+otherwise the file is scored (or the caller's in-memory scoring is reused)
+and written again.
+
+Output: <workbook stem>_moved_issues_updated_file.xlsx next to the input,
+registered as derived in the folder's input manifest. VOC exports and
+archived inputs are skipped.
+"""
+
+import contextlib
+import os
+import sys
+from pathlib import Path
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
+
+import input_manifest
+import json_io
+import schemas
+import score_cache
+from excel_cache import read_excel_headers
+from extract_criticality import _effective_config, export_moved_issues_updated_file
+
+MOVED_KIND = "moved"
+
+# Bump when the layout of the exported workbook changes
+EXPORT_VERSION = 1
+
+# Name of the moved-issues export written next to each input (registered as
+# derived in the folder's input manifest, so it is never read back as input)
+DERIVED_SUFFIX = '_moved_issues_updated_file.xlsx'
+
+
+def export_path(path) -> Path:
+    """Export written for input workbook `path`."""
+    path = Path(path)
+    return path.with_name(path.stem + DERIVED_SUFFIX)
+
+
+def _key() -> str:
+    return score_cache.config_key({'export': EXPORT_VERSION, 'config': _effective_config()})
+
+
+def _cached(path: Path, key: str):
+    """Output path of a still-valid cached export of `path`, else None."""
+    entry = score_cache.get(path, key, kind=MOVED_KIND)
+    if entry is None:
+        return None
+    out = Path(entry['output'])
+    try:
+        st = out.stat()
+    except OSError:
+        return None
+    if st.st_size != entry['size'] or st.st_mtime_ns != entry['mtime_ns']:
+        return None
+    return out
+
+
+def export(path, df=None, scored: dict = None, force: bool = False) -> dict:
+    """
+    Export of input workbook `path` → {'file', 'output', 'cached'}
+    ('output' None and a 'skipped' reason for VOC / archived inputs).
+
+    `df` / `scored` — the already-loaded frame and its
+    score_criticality_frame() result (default config), reused on a miss.
+    force=True rewrites the export even if the cached one is valid.
+    """
+    path = Path(path)
+    result = {'file': input_manifest.source_name(path), 'output': None, 'cached': False}
+    if input_manifest.is_archived(path):
+        return dict(result, skipped='archived input')
+    if scored is None:
+        columns = df.columns if df is not None else read_excel_headers(path)
+        if schemas.detect_schema(columns) == schemas.VOC:
+            return dict(result, skipped='VOC export')
+
+    key = _key() if score_cache.enabled() else None
+    if key is not None and not force:
+        out = _cached(path, key)
+        if out is not None:
+            return dict(result, output=str(out), cached=True)
+
+    out = export_path(path)
+    # the exporter's console summary goes to stderr: stdout carries JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        export_moved_issues_updated_file(
+            str(path), str(out),
+            df=df if df is not None else input_manifest.read_input(path),
+            scored=scored,
+        )
+    if key is not None:
+        st = out.stat()
+        score_cache.put(path, key, {'output': str(out), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns},
+                        kind=MOVED_KIND)
+    return dict(result, output=str(out))
+
+
+def export_folder(folder, file_name: str = None, force: bool = False) -> list:
+    """export() of every canonical input of `folder` (or only `file_name`)."""
+    results = []
+    for path in input_manifest.canonical_inputs(Path(folder)):
+        if file_name is not None and input_manifest.source_name(path) != file_name:
+            continue
+        try:
+            results.append(export(path, force=force))
+        except Exception as e:
+            sys.stderr.write(f"  [WARN]  Could not export moved issues for {path.name}: {e}\n")
+            results.append({'file': input_manifest.source_name(path), 'output': None,
+                            'cached': False, 'error': str(e)})
+    if file_name is not None and not results:
+        raise FileNotFoundError(f"{file_name} is not an input of {Path(folder).name}")
+    return results
+
+
+def main(argv=None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description="Write (or reuse) moved_issues_updated_file.xlsx exports")
+    parser.add_argument("folder", help="downloads/<module> folder (or module name)")
+    parser.add_argument("--file", help="only this input workbook of the folder")
+    parser.add_argument("--force", action="store_true", help="rewrite even if the cached export is valid")
+    args = parser.parse_args(argv)
+
+    try:
+        folder  = input_manifest._resolve_folder(args.folder)
+        results = export_folder(folder, args.file, force=args.force)
+    except (OSError, ValueError) as e:
+        sys.stdout.write(json_io.dumps({'error': str(e)}, ensure_ascii=True))
+        return 1
+    for r in results:
+        tag = '[SKIP]' if r['output'] is None else ('[CACHE]' if r['cached'] else '[OK]')
+        sys.stderr.write(f"  {tag:<7} {r['file']}  {r.get('skipped') or r.get('error') or r['output']}\n")
+    sys.stdout.write(json_io.dumps(results, ensure_ascii=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
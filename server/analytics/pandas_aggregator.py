@@ -2,9 +2,8 @@ import pandas as pd
 import os
 import sys
 import json
-import math
+import time
 from pathlib import Path
-from datetime import date, datetime
 
 # Prevent HuggingFace Hub from pinging the network for updates, avoiding timeouts
 os.environ["HF_HUB_OFFLINE"] = "1"
@@ -15,8 +14,31 @@ _PROJECT_ROOT = _THIS_DIR.parent.parent
 if str(_THIS_DIR) not in sys.path:
     sys.path.insert(0, str(_THIS_DIR))
 
-from extract_criticality import extract_criticality_data
 from excel_cleaner import clean_model_number
+from excel_cache import prune_excel_cache
+from score_cache import prune_score_cache
+import input_manifest
+import json_io
+import schemas
+import row_store
+import drill_index
+import partials
+import what_if
+import batch_scoring
+import moved_export
+import approx_kpis
+from kpi_kernel import (
+    apply_tier_lookups,
+    tier_lookups,
+    case_code_keys,
+    tier_severity_breakdown,
+    tier_severity_cells,
+    normalize_voc_status,
+    issue_type_breakdown,
+    issue_type_counts,
+    value_distributions,
+    first_seen_counts,
+)
 
 
 def load_model_name_mappings():
@@ -35,18 +57,6 @@ def load_model_name_mappings():
 MODEL_NAME_MAPPINGS = load_model_name_mappings()
 
 
-def sanitize_nan(obj):
-    if isinstance(obj, float) and math.isnan(obj):
-        return None
-    elif isinstance(obj, (date, datetime)):
-        return obj.isoformat()
-    elif isinstance(obj, dict):
-        return {k: sanitize_nan(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [sanitize_nan(item) for item in obj]
-    return obj
-
-
 def derive_model_name_from_sw_ver(sw_ver):
     if not sw_ver or not isinstance(sw_ver, str) or len(sw_ver) < 5:
         return sw_ver
@@ -66,47 +76,82 @@ def transform_model_names(df):
             mask_to_transform = mask_os_beta | mask_global_voc
             df.loc[mask_to_transform, 'Model No.'] = df.loc[mask_to_transform, 'S/W Ver.'].apply(derive_model_name_from_sw_ver)
         
-        # Strip prefixes using centralized logic
-        df['Model No.'] = df['Model No.'].apply(clean_model_number)
+        # Strip prefixes using centralized logic (keeping the text dtype)
+        models = df['Model No.']
+        df['Model No.'] = models.apply(clean_model_number)
+        if isinstance(models.dtype, pd.StringDtype):
+            df['Model No.'] = df['Model No.'].astype(models.dtype)
     return df
 
 
-def load_all_excels(folder_path: str) -> pd.DataFrame:
+def _list_input_excels(folder: Path) -> list:
+    """
+    Canonical inputs of a folder (input_manifest.py): archived inputs plus
+    the live input workbooks — never cleaned / derived workbooks.
+    """
+    return input_manifest.canonical_inputs(folder)
+
+
+def _read_input_excel(excel_file) -> tuple:
+    """Pool worker: parse one input → (path, DataFrame | None, error | None)."""
+    try:
+        return excel_file, input_manifest.read_input(excel_file), None
+    except Exception as e:
+        return excel_file, None, str(e)
+
+
+def load_folder_frames(excel_paths: list, jobs: int = 1) -> dict:
+    """
+    Parse every Excel file exactly once (raw, no dtypes).
+    Returns {path: DataFrame} in excel_paths order; unreadable files are
+    skipped with a warning. jobs > 1 parses the files in a process pool.
+    """
+    if jobs > 1 and len(excel_paths) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(jobs, len(excel_paths))) as pool:
+            results = list(pool.map(_read_input_excel, excel_paths))
+    else:
+        results = [_read_input_excel(p) for p in excel_paths]
+
+    frames = {}
+    for excel_file, df, err in results:
+        if err is not None:
+            sys.stderr.write(f"Warning: Failed to load {input_manifest.source_name(excel_file)}: {err}\n")
+            continue
+        frames[excel_file] = df
+    return frames
+
+
+def load_all_excels(folder_path: str, frames: dict = None) -> pd.DataFrame:
+    """
+    Combined analytics frame of a folder, typed per file by the schema
+    registry (schemas.py): labels categorical, free text Arrow strings.
+    `frames` — optional load_folder_frames() result to reuse instead of reading.
+    """
     folder = Path(folder_path)
     if not folder.exists():
         raise FileNotFoundError(f"Folder {folder_path} does not exist")
 
-    excels = list(folder.glob("*.xlsx")) + list(folder.glob("*.xls"))
-    if not excels:
-        raise FileNotFoundError(f"No Excel files in {folder_path}")
-
-    dtype_spec = {
-        'Model No.': 'string',
-        'Module':    'string',
-        'Severity':  'category',
-        'Title':     'string',
-        'Case Code': 'string',
-        'S/W Ver.':  'string',
-    }
+    if frames is None:
+        excels = _list_input_excels(folder)
+        if not excels:
+            raise FileNotFoundError(f"No Excel files in {folder_path}")
+        prune_excel_cache(folder)
+        frames = load_folder_frames(excels)
 
     dfs = []
-    for excel_file in excels:
-        try:
-            df = pd.read_excel(excel_file, dtype=dtype_spec, engine='openpyxl')
-            dfs.append(df)
-            sys.stderr.write(f"Loaded {len(df)} rows from {excel_file.name}\n")
-        except Exception as e:
-            sys.stderr.write(f"Warning: Failed to load {excel_file.name}: {e}\n")
+    for excel_file, raw in frames.items():
+        dfs.append(schemas.apply_schema(raw))
+        sys.stderr.write(f"Loaded {len(raw)} rows from {input_manifest.source_name(excel_file)}\n")
 
     if not dfs:
         raise FileNotFoundError(f"Failed to load any Excel files from {folder_path}")
 
-    combined_df = pd.concat(dfs, ignore_index=True, sort=False)
+    combined_df = schemas.concat_frames(dfs)
     sys.stderr.write(f"Combined {len(dfs)} files, total {len(combined_df)} rows\n")
 
+    schemas.downcast_integers(combined_df)
     if len(combined_df) > 10000:
-        for col in combined_df.select_dtypes(include=['int64']):
-            combined_df[col] = pd.to_numeric(combined_df[col], downcast='integer')
         for col in combined_df.select_dtypes(include=['float64']):
             combined_df[col] = pd.to_numeric(combined_df[col], downcast='float')
 
@@ -121,93 +166,26 @@ def _is_voc_schema(df: pd.DataFrame) -> bool:
     return 'Status' in cols and 'Category' in cols and 'Progr.Stat.' not in cols
 
 
-# ── VOC status normalisation ──────────────────────────────────────────────────
-# VOC uses:  OPENED / PROCESSING / RESOLVED / CLOSED
-# Map to the same Open / Resolve / Close buckets used everywhere else
-def _normalize_voc_status(val: str) -> str:
-    v = str(val).upper()
-    if v in ('OPENED', 'PROCESSING'):
-        return 'Open'
-    elif v == 'RESOLVED':
-        return 'Resolve'
-    elif v == 'CLOSED':
-        return 'Close'
-    return 'Other'
-
-
-def _is_voc_file(path) -> bool:
-    """
-    Peek at column headers only (no full load) to decide if this is a VOC file.
-    Avoids passing VOC files into extract_criticality_data() which cannot handle them.
-    """
-    try:
-        headers = pd.read_excel(str(path), nrows=0).columns.tolist()
-        col_set = set(headers)
-        return 'Status' in col_set and 'Category' in col_set and 'Progr.Stat.' not in col_set
-    except Exception:
-        return False
-
-
-def _build_severity_distribution(excel_paths: list) -> tuple:
+def _score_files(frames: dict, jobs: int = 1) -> dict:
     """
-    Issue-schema files only — delegate scoring to extract_criticality.
-    VOC files are silently skipped.
-
-    Reads the new flat severity_breakdown from extract_criticality_data():
-      severity_breakdown = {
-          'High':   { total, open, resolve, close,
-                      moved_to_medium: {moderate, deferred} },
-          'Medium': { total, open, resolve, close },
-          'Low':    { total, open, resolve, close },
-      }
-
-    Merges these directly into severity_dist (same shape, accumulated
-    across all Excel files in the folder).
-
-    Returns: (severity_dist_dict, scored_rows_list)
-      severity_dist_dict : { 'High': {total,open,resolve,close},
-                              'Medium': {...}, 'Low': {...} }
-      scored_rows_list   : list of scored issue dicts (for tier merge on rows)
+    extract_criticality scoring of workbooks ({path: raw DataFrame, or None
+    to read it}) → {path: (scored, result)}, where scored is the
+    score_criticality_frame() dict and result the extract_criticality_data()
+    output. One batch (batch_scoring.py): jobs > 1 scores the files in a
+    process pool. VOC files and files that cannot be scored (warned) are
+    left out. Stores each file's dimension matrix for what_if.py.
     """
-    severity_dist   = {}
-    all_scored_rows = []
-
-    def _empty_bucket():
-        return {'total': 0, 'open': 0, 'resolve': 0, 'close': 0}
-
-    def _add(dest: dict, key: str, src: dict):
-        if key not in dest:
-            dest[key] = _empty_bucket()
-        for k in ('total', 'open', 'resolve', 'close'):
-            dest[key][k] += src.get(k, 0)
-
-    for path in excel_paths:
-        if _is_voc_file(path):
+    sources = {path: (path if frame is None else frame) for path, frame in frames.items()}
+    batch = batch_scoring.score_files(sources, jobs=jobs, keep_scored=True)
+    scored_files = {}
+    for path in frames:
+        if batch['schemas'].get(path) == schemas.VOC:
             sys.stderr.write(f"  [VOC]   Skipping VOC file: {Path(path).name}\n")
-            continue
-        try:
-            result = extract_criticality_data(str(path))
-        except Exception as e:
-            sys.stderr.write(f"Warning: extract_criticality_data failed for {path}: {e}\n")
-            continue
-
-        all_scored_rows.extend(result.get('issues', []))
-
-        # ── New flat severity_breakdown: keys are Title-case High/Medium/Low ──
-        sev_breakdown = result.get('severity_breakdown', {})
-        for sev_key in ('High', 'Medium', 'Low'):
-            entry = sev_breakdown.get(sev_key)
-            if not entry:
-                continue
-            # Entry is already flat: {total, open, resolve, close}
-            _add(severity_dist, sev_key, {
-                'total':   entry.get('total',   0),
-                'open':    entry.get('open',    0),
-                'resolve': entry.get('resolve', 0),
-                'close':   entry.get('close',   0),
-            })
-
-    return severity_dist, all_scored_rows
+        if path in batch['files']:
+            scored = batch['scored'][path]
+            what_if.store(path, scored)     # dimension matrix for what-if re-scoring
+            scored_files[path] = (scored, batch['files'][path])
+    return scored_files
 
 
 def _build_voc_status_distribution(df: pd.DataFrame) -> dict:
@@ -219,11 +197,10 @@ def _build_voc_status_distribution(df: pd.DataFrame) -> dict:
     """
     if 'Status' not in df.columns:
         return {}
-    normalised = df['Status'].astype(str).apply(_normalize_voc_status)
-    return normalised.value_counts().to_dict()
+    return value_distributions({'status': normalize_voc_status(df)})['status']
 
 
-def compute_kpis(df: pd.DataFrame, excel_paths: list = None) -> dict:
+def compute_kpis(df: pd.DataFrame) -> dict:
     """
     Build KPIs for both schemas.
 
@@ -231,70 +208,51 @@ def compute_kpis(df: pd.DataFrame, excel_paths: list = None) -> dict:
     VOC schema    → uses Status, Category, CSC
     Both produce the same output keys so the rest of the pipeline is unchanged.
 
-    SCALE-DOWN (issue schema only):
-    ────────────────────────────────
-    severity_distribution['High']   = scaled total (Severe-tier only)
-    severity_distribution['Medium'] = original Medium + High's Moderate + High's Deferred
-    severity_distribution['Low']    = unchanged
-
-    The Severe/Moderate/Deferred tier keys are also kept for backward compat.
+    Issue schema: severity_distribution holds the raw Severity counts only —
+    the tier-scaled distribution comes from the per-file partials
+    (partials.merge_partials) or, before scoring, from approx_kpis.
     """
     total_rows    = len(df)
     unique_models = df['Model No.'].nunique() if 'Model No.' in df.columns else 0
 
     voc = _is_voc_schema(df)
 
-    # ── category distribution ─────────────────────────────────────────────────
-    if voc:
-        category_dist = df['Category'].value_counts().to_dict() if 'Category' in df.columns else {}
-    else:
-        category_dist = df['Module'].value_counts().to_dict() if 'Module' in df.columns else {}
-
-    # ── source distribution ───────────────────────────────────────────────────
+    # ── category / source / status distributions — one grouped pass ─────────
+    # (VOC: Category / CSC / normalised Status; issue: Module / Source / Progr.Stat.)
+    def _col(name):
+        return df[name] if name in df.columns else None
+
+    norm_status = normalize_voc_status(df) if voc and 'Status' in df.columns else None
+    dists = value_distributions({
+        'category': _col('Category' if voc else 'Module'),
+        'source':   _col('CSC' if voc else 'Source'),
+        'status':   norm_status if voc else _col('Progr.Stat.'),
+    })
+    category_dist = dists['category']
+    source_dist   = dists['source']
+    status_dist   = dists['status']
+
+    # ── open/resolved/close counts ────────────────────────────────────────────
     if voc:
-        source_dist = df['CSC'].value_counts().to_dict() if 'CSC' in df.columns else {}
-    else:
-        source_dist = df['Source'].value_counts().to_dict() if 'Source' in df.columns else {}
-
-    # ── status distribution + open/resolved/close counts ─────────────────────
-    if voc:
-        status_dist     = _build_voc_status_distribution(df)
         open_issues     = status_dist.get('Open',    0)
         resolved_issues = status_dist.get('Resolve', 0)
         close_issues    = status_dist.get('Close',   0)
     else:
-        status_dist = df['Progr.Stat.'].value_counts().to_dict() if 'Progr.Stat.' in df.columns else {}
         open_issues     = int(df['Progr.Stat.'].eq('Open').sum())                if 'Progr.Stat.' in df.columns else 0
         resolved_issues = int(df['Progr.Stat.'].str.startswith('Resolve').sum()) if 'Progr.Stat.' in df.columns else 0
         close_issues    = int(df['Progr.Stat.'].eq('Close').sum())               if 'Progr.Stat.' in df.columns else 0
 
     # ── severity distribution ─────────────────────────────────────────────────
     if voc:
-        # VOC: group by Issue Type, map Status → open/resolve/close
-        if 'Issue Type' in df.columns and 'Status' in df.columns:
-            norm_status = df['Status'].astype(str).apply(_normalize_voc_status)
-            severity_dist = {}
-            for issue_type, grp in df.groupby(df['Issue Type'].fillna('Other')):
-                grp_status = norm_status.loc[grp.index]
-                severity_dist[str(issue_type)] = {
-                    'total':   len(grp),
-                    'open':    int((grp_status == 'Open').sum()),
-                    'resolve': int((grp_status == 'Resolve').sum()),
-                    'close':   int((grp_status == 'Close').sum()),
-                }
+        # VOC: Issue Type × normalised Status crosstab
+        if 'Issue Type' in df.columns and norm_status is not None:
+            severity_dist = issue_type_breakdown(df, norm_status)
         else:
             severity_dist = {}
-        scored_rows = []
     else:
-        if excel_paths:
-            # _build_severity_distribution returns severity_dist with scale-down
-            # already applied: High=Severe-tier-only, Medium=original+moved, Low=unchanged
-            severity_dist, scored_rows = _build_severity_distribution(excel_paths)
-        else:
-            raw = df['Severity'].value_counts().to_dict() if 'Severity' in df.columns else {}
-            severity_dist = {k: {'total': v, 'open': 0, 'resolve': 0, 'close': 0}
-                             for k, v in raw.items()}
-            scored_rows = []
+        raw = schemas.value_counts(df['Severity']).to_dict() if 'Severity' in df.columns else {}
+        severity_dist = {k: {'total': v, 'open': 0, 'resolve': 0, 'close': 0}
+                         for k, v in raw.items()}
 
     return {
         "total_rows":            total_rows,
@@ -307,7 +265,6 @@ def compute_kpis(df: pd.DataFrame, excel_paths: list = None) -> dict:
         "resolved_issues":       resolved_issues,
         "close_issues":          close_issues,
         "schema":                "voc" if voc else "issue",
-        "scored_rows":           scored_rows,
     }
 
 
@@ -318,7 +275,7 @@ def group_by_column(df: pd.DataFrame, column: str) -> list:
         col_data = df[column]
         if isinstance(col_data, pd.DataFrame):
             col_data = col_data.iloc[:, 0]
-        counts = col_data.value_counts().sort_values(ascending=False)
+        counts = schemas.value_counts(col_data).sort_values(ascending=False)
         return [{"label": str(idx), "count": int(count)}
                 for idx, count in counts.items()]
     except Exception:
@@ -379,11 +336,9 @@ def map_model_name(model_number):
 def time_series(df: pd.DataFrame, date_column: str) -> list:
     if date_column not in df.columns:
         return []
-    df_copy = df.copy()
-    df_copy[date_column] = pd.to_datetime(df_copy[date_column], errors='coerce')
-    df_copy = df_copy.dropna(subset=[date_column])
+    dates = pd.to_datetime(df[date_column], errors='coerce').dropna()
     return (
-        df_copy.groupby(df_copy[date_column].dt.date)
+        dates.groupby(dates.dt.date)
                .size().sort_index()
                .reset_index(name='count')
                .rename(columns={date_column: 'date'})
@@ -455,7 +410,7 @@ def cluster_insights(df: pd.DataFrame) -> pd.DataFrame:
 
     import sys
     sys.stderr.write("Starting AI Insight clustering...\n")
-    df = df.groupby(group_cols, group_keys=False).apply(process_group)
+    df = df.groupby(group_cols, group_keys=False, observed=True).apply(process_group)
     sys.stderr.write("AI Insight clustering complete.\n")
     return df
 
@@ -466,27 +421,228 @@ if __name__ == "__main__":
         sys.exit(1)
 
 
-def _process_folder(folder_path: str, save_to_file: bool = True) -> bool:
+# ── Per-file partials ─────────────────────────────────────────────────────────
+# Each workbook's scores and mergeable aggregates are kept in
+# <folder>/__partials__/ (partials.py); a run only scores new or changed
+# workbooks and merges the partials into the folder summary.
+
+# Columns whose first-seen value counts feed the distributions / top lists
+_PARTIAL_COUNT_COLUMNS = ('Model No.', 'Module', 'Category', 'Source', 'CSC', 'Progr.Stat.')
+
+
+def _file_partial(name: str, raw: pd.DataFrame, columns: list, scores: list,
+                  scored_rows: int) -> dict:
+    """
+    Partial of one workbook. `raw` is laid out with the folder's `columns`
+    (as in the combined frame), so missing columns count like the concat's
+    NaN cells. `scores` = [[Case Code key, tier, criticality_score], ...].
+    """
+    df = transform_model_names(schemas.apply_schema(raw).reindex(columns=columns))
+
+    counts = {c: first_seen_counts(df[c]) for c in _PARTIAL_COUNT_COLUMNS if c in df.columns}
+    progr  = counts.get('Progr.Stat.', [])
+
+    voc_status  = normalize_voc_status(df) if 'Status' in df.columns else None
+    issue_types = (issue_type_counts(df, voc_status)
+                   if voc_status is not None and 'Issue Type' in df.columns else None)
+
+    dates = time_series(df, 'Date') if 'Date' in df.columns else []
+
+    # updated_tier cells without the tier merge, and with this file's scores
+    tier_cells_raw = tier_severity_cells(df)
+    apply_tier_lookups(df, {k: t for k, t, _ in scores}, {k: sc for k, _, sc in scores})
+    tier_cells = tier_severity_cells(df)
+
+    return {
+        "version":     partials.PARTIAL_VERSION,
+        "file":        name,
+        "context":     [str(c) for c in columns],
+        "scored_rows": scored_rows,
+        "scores":      scores,
+        "aggregates": {
+            "rows":   len(df),
+            "counts": counts,
+            "progr":  [
+                sum(n for v, n in progr if v == 'Open'),
+                sum(n for v, n in progr if isinstance(v, str) and v.startswith('Resolve')),
+                sum(n for v, n in progr if v == 'Close'),
+            ],
+            "models":         [] if 'Model No.' not in df.columns else df['Model No.'].dropna().unique().tolist(),
+            "voc_status":     first_seen_counts(voc_status) if voc_status is not None else None,
+            "issue_types":    issue_types,
+            "dates":          [[d['date'].isoformat(), int(d['count'])] for d in dates],
+            "tier_cells":     tier_cells.tolist(),
+            "tier_cells_raw": tier_cells_raw.tolist(),
+            "case_keys":      case_code_keys(df),
+        },
+    }
+
+
+def _folder_partials(folder: Path, frames: dict, columns: list, rebuild: bool = False,
+                     jobs: int = 1, on_pending=None) -> dict:
+    """
+    Partials of every loaded workbook (input order), reusing stored ones.
+    The new / changed workbooks are scored in one batch (jobs > 1: in
+    parallel). `on_pending(reused, to_score)` — {path: stored partial},
+    {path: raw frame} — is called before that batch is scored.
+
+    Returns {partials, fingerprints, scored_by_path, stats}: scored_by_path
+    holds the score_criticality_frame() results of the workbooks scored in
+    this run (new / changed), for the moved-issues export.
+    """
+    manifest = {} if rebuild else partials.load_manifest(folder)
+    context  = [str(c) for c in columns]
+
+    file_partials, fingerprints, scored_by_path = {}, {}, {}
+    stats = {"reused": 0, "built": 0, "reaggregated": 0,
+             "removed": len(set(manifest) - {input_manifest.source_name(p) for p in frames})}
+
+    reused, to_score = {}, {}
+    for path, raw in frames.items():
+        name  = input_manifest.source_name(path)
+        entry = manifest.get(name)
+        # archived inputs keep the fingerprint of the workbook they came from
+        fp    = input_manifest.archived_fingerprint(path) or partials.fingerprint(path, entry)
+        fingerprints[name] = fp
+        cached = partials.load_partial(folder, entry, fp)
+        if cached is not None:
+            reused[path] = cached
+        else:
+            to_score[path] = raw
+    if on_pending is not None:
+        on_pending(reused, to_score)
+    scored_files = _score_files(to_score, jobs) if to_score else {}
+
+    for path, raw in frames.items():
+        name   = input_manifest.source_name(path)
+        cached = reused.get(path)
+
+        if cached is not None and cached["context"] == context:
+            file_partials[name] = cached
+            stats["reused"] += 1
+            continue
+
+        if cached is not None:
+            # Same workbook, different folder columns → re-aggregate, keep scores
+            scores, scored_rows = cached["scores"], cached["scored_rows"]
+            stats["reaggregated"] += 1
+        else:
+            scored, result = scored_files.get(path, (None, None))
+            issues = result.get('issues', []) if result else []
+            tiers, scores_by_key = tier_lookups(issues)
+            scores, scored_rows = [[k, tiers[k], scores_by_key[k]] for k in tiers], len(issues)
+            if scored is not None:
+                scored_by_path[path] = scored
+            stats["built"] += 1
+
+        file_partials[name] = _file_partial(name, raw, columns, scores, scored_rows)
+
+    return {
+        "partials":       file_partials,
+        "fingerprints":   fingerprints,
+        "scored_by_path": scored_by_path,
+        "stats":          stats,
+    }
+
+
+def _publish_approximate(folder: Path, df: pd.DataFrame, voc: bool,
+                         reused: dict, to_score: dict) -> None:
     """
-    Process one source folder: load all Excel files, build analytics.
+    --progressive: before a large scoring batch, write analytics.approx.json
+    — the summary with the raw-row KPIs exact and the tier-scaled
+    severity_distribution estimated from a sample (approx_kpis.py).
+    """
+    rows = sum(len(raw) for raw in to_score.values())
+    if voc or rows < approx_kpis.MIN_ROWS:
+        return
+    start = time.perf_counter()
+    try:
+        kpis = compute_kpis(df)
+        estimate = approx_kpis.estimate_severity_distribution(
+            to_score, exact_cells=[p["aggregates"]["tier_cells"] for p in reused.values()]
+        )
+        severity_distribution = estimate["severity_distribution"]
+
+        top_models = group_by_column(df, 'Model No.')
+        for m in top_models:
+            m['friendly_name'] = map_model_name(m['label'])
+
+        summary = {
+            "kpis": {
+                "total_rows":            kpis["total_rows"],
+                "unique_models":         kpis["unique_models"],
+                "high_issues":           severity_distribution['High']['total'],
+                "severity_distribution": severity_distribution,
+                "source_distribution":   kpis["source_distribution"],
+                "open_issues":           kpis["open_issues"],
+                "resolved_issues":       kpis["resolved_issues"],
+                "close_issues":          kpis["close_issues"],
+                "schema":                kpis["schema"],
+            },
+            "top_models": top_models,
+            "categories": group_by_column(df, 'Module'),
+        }
+        time_data = time_series(df, 'Date') if 'Date' in df.columns else []
+        if time_data:
+            summary["time_series"] = time_data
+        summary["approximate"] = approx_kpis.approximate_block(estimate, time.perf_counter() - start)
+        approx_kpis.publish(folder, summary)
+    except Exception as e:
+        sys.stderr.write(f"  [WARN]  Could not publish approximate analytics for {folder.name}: {e}\n")
+        return
+
+    low, high = estimate["bounds"]["High"]["total"]
+    sys.stderr.write(
+        f"  [APPROX] {folder.name}/{approx_kpis.APPROX_FILE}  (high_issues ~{severity_distribution['High']['total']} "
+        f"[{low}, {high}], {estimate['sample_rows']} of {rows} rows sampled, {time.perf_counter() - start:.2f}s)\n"
+    )
+
+
+def _process_folder(folder_path: str, save_to_file: bool = True, jobs: int = 1,
+                    pretty: bool = False, rebuild: bool = False,
+                    export_moved: bool = False, progressive: bool = False) -> bool:
+    """
+    Process one source folder: load its canonical inputs (input_manifest.py),
+    build analytics.
     Auto-detects VOC vs issue schema per file.
 
-    save_to_file=True  (default): write analytics.json into the folder.
-    save_to_file=False:           print JSON to stdout only (--stdout-only mode).
+    save_to_file=True  (default): write the analytics.json summary plus the
+                                  rows.ndjson / rows.idx row store (row_store.py)
+                                  and the drill.json / drill.bin drill-down
+                                  index (drill_index.py).
+    save_to_file=False:           print the full JSON, rows included, to stdout
+                                  only (--stdout-only mode).
+    jobs > 1:                     parse and score the folder's Excel files in parallel.
+    pretty=True:                  indent the JSON (debug; compact by default).
+    rebuild=True:                 ignore stored partials, re-score every file.
+    export_moved=True:            also write moved_issues_updated_file.xlsx for
+                                  the issue-schema files (moved_export.py);
+                                  otherwise exports are made on demand.
+    progressive=True:             before scoring a large batch (approx_kpis.MIN_ROWS
+                                  rows or more), publish analytics.approx.json
+                                  with estimated tier KPIs; removed once
+                                  analytics.json is written (save_to_file only).
+
+    INCREMENTAL RUNS:
+    ─────────────────
+    Only new or changed workbooks are scored (and exported); the KPIs,
+    top_models, categories and time_series are merged from the per-file
+    partials in __partials__/ (see partials.py). Stored partials are only
+    written in save_to_file mode. The row store is rewritten from the
+    cached frames with the merged tiers.
 
     SCALE-DOWN (issue schema):
     ──────────────────────────
     severity_distribution['High']   = Severe-tier count only
     severity_distribution['Medium'] = original Medium + High's Moderate + High's Deferred
-    This is transparently handled by _build_severity_distribution() via
-    extract_criticality's severity_breakdown output.
+    i.e. the updated_tier breakdown (kpi_kernel.apply_tier_lookups rules).
 
     high_issues KPI = severity_distribution['High']['total'] (scaled)
     """
     folder      = Path(folder_path)
     folder_name = folder.name
 
-    excel_paths = list(folder.glob("*.xlsx")) + list(folder.glob("*.xls"))
+    excel_paths = _list_input_excels(folder)
     if not excel_paths:
         msg = f"No Excel files found in {folder_name}/"
         sys.stderr.write(f"  [SKIP]  {folder_name}/ — no Excel files found\n")
@@ -495,23 +651,46 @@ def _process_folder(folder_path: str, save_to_file: bool = True) -> bool:
         return False
 
     try:
-        df = load_all_excels(folder_path)
+        # ── Parse every file exactly once; the raw frames are reused for the
+        #    combined KPI frame, per-file scoring and the moved-issues export.
+        prune_excel_cache(folder)
+        prune_score_cache(folder)
+        frames = load_folder_frames(excel_paths, jobs=jobs)
+        excel_paths = list(frames)
+
+        df = load_all_excels(folder_path, frames=frames)
+        columns = list(df.columns)
         df = transform_model_names(df)
+        sys.stderr.write(f"  [MEM]   {schemas.format_memory(schemas.memory_report(df))}\n")
 
         voc = _is_voc_schema(df)
         sys.stderr.write(f"  Schema: {'VOC' if voc else 'Issue'}\n")
 
-        # Pass excel_paths only for issue schema (extract_criticality needs them)
-        kpis = compute_kpis(df, excel_paths=(None if voc else excel_paths))
+        # ── Per-file partials: score new / changed files only, then merge ──
+        on_pending = None
+        if progressive and save_to_file:
+            def on_pending(reused, to_score):
+                _publish_approximate(folder, df, voc, reused, to_score)
+        folder_parts = _folder_partials(folder, frames, columns, rebuild=rebuild, jobs=jobs,
+                                        on_pending=on_pending)
+        stats = folder_parts["stats"]
+        sys.stderr.write(
+            f"  [PART]  {stats['reused']} reused, {stats['built']} new/changed, "
+            f"{stats['reaggregated']} re-aggregated, {stats['removed']} removed\n"
+        )
+        merged = partials.merge_partials(
+            [folder_parts["partials"][input_manifest.source_name(p)] for p in excel_paths], voc
+        )
+        kpis = merged["kpis"]
 
-        top_models = group_by_column(df, 'Model No.')
+        top_models = merged["top_models"]
         for m in top_models:
             m['friendly_name'] = map_model_name(m['label'])
 
         # VOC uses Category as primary grouping; issue schema uses Module
-        categories = group_by_column(df, 'Category' if voc else 'Module')
+        categories = merged["categories"]
 
-        time_data = time_series(df, 'Date') if 'Date' in df.columns else []
+        time_data = merged["time_series"]
 
         # ── Merge tier scores back onto raw rows ───────────────────────────
         # extract_criticality scores each issue and assigns a 'tier'
@@ -527,83 +706,36 @@ def _process_folder(folder_path: str, save_to_file: bool = True) -> bool:
         # them in the Moderate bucket — consistent with where they were moved.
         #
         # Join key: 'Case Code' (unique issue identifier, present in both
-        # the raw df and the extract_criticality scored output).
-        scored_rows = kpis.get("scored_rows", [])
-        if scored_rows and not voc:
-            # Build lookup: Case Code → {tier, criticality_score}
-            tier_lookup = {
-                str(r.get('Case Code', '')).strip(): {
-                    'tier':              r.get('tier', ''),
-                    'criticality_score': r.get('criticality_score', None),
-                }
-                for r in scored_rows
-                if r.get('Case Code')
-            }
-            rows = []
-            for rec in df.to_dict('records'):
-                cc = str(rec.get('Case Code', '')).strip()
-                scored = tier_lookup.get(cc, {})
-                rec['tier']              = scored.get('tier', 'Deferred')
-                rec['criticality_score'] = scored.get('criticality_score', None)
-                # ── Compute updated_tier (scale-down applied) ──────────────
-                # Same rules as export_moved_issues_updated_file:
-                #   High  + Severe   → updated_tier = Severe   (kept)
-                #   High  + Moderate → updated_tier = Moderate (moved)
-                #   High  + Low      → updated_tier = Deferred (moved)
-                #   High  + Excluded → updated_tier = Deferred (moved)
-                #   Medium + Severe  → updated_tier = Moderate (scaled down)
-                #   All others       → updated_tier = tier     (unchanged)
-                sev  = str(rec.get('Severity', '')).strip()
-                tier = str(rec.get('tier',     '')).strip()
-                if sev == 'High':
-                    if tier == 'Severe':
-                        rec['updated_tier'] = 'Severe'
-                    elif tier == 'Moderate':
-                        rec['updated_tier'] = 'Moderate'
-                    else:
-                        rec['updated_tier'] = 'Deferred'
-                elif sev == 'Medium' and tier == 'Severe':
-                    rec['updated_tier'] = 'Moderate'
-                else:
-                    rec['updated_tier'] = tier
-                rows.append(rec)
-        else:
-            rows = df.to_dict('records')
+        # the raw df and the extract_criticality scored output); the lookups
+        # are merged from the per-file partials (later files win).
+        if merged["scored_rows"] and not voc:
+            # Case Code merge + np.select for updated_tier — see
+            # kpi_kernel.apply_tier_lookups for the scale-down rules:
+            #   High  + Severe   → updated_tier = Severe   (kept)
+            #   High  + Moderate → updated_tier = Moderate (moved)
+            #   High  + Low      → updated_tier = Deferred (moved)
+            #   High  + Excluded → updated_tier = Deferred (moved)
+            #   Medium + Severe  → updated_tier = Moderate (scaled down)
+            #   All others       → updated_tier = tier     (unchanged)
+            apply_tier_lookups(df, merged["tier_lookup"], merged["score_lookup"])
+        elif voc:
             # VOC rows: add schema-appropriate tier proxy using Issue Type
-            if voc:
-                for rec in rows:
-                    rec['tier']         = rec.get('Issue Type', 'Other')
-                    rec['updated_tier'] = rec.get('Issue Type', 'Other')
+            proxy = df['Issue Type'] if 'Issue Type' in df.columns else 'Other'
+            df['tier']         = proxy
+            df['updated_tier'] = proxy
 
-        # ── Recompute severity_distribution from updated_tier on rows ───────
+        # ── severity_distribution from updated_tier on rows ────────────────
         # updated_tier is the single source of truth after scale-down:
         #   Severe                      → High   bucket
         #   Moderate                    → Medium bucket
         #   Low / Deferred / Excluded   → Low    bucket
         # Progr.Stat. is used to split open / resolve / close per bucket.
+        # Summed from the partials unless a Case Code is scored by another
+        # file than its row's (then counted on the combined frame).
         if not voc:
-            _sev_dist = {
-                'High':   {'total': 0, 'open': 0, 'resolve': 0, 'close': 0},
-                'Medium': {'total': 0, 'open': 0, 'resolve': 0, 'close': 0},
-                'Low':    {'total': 0, 'open': 0, 'resolve': 0, 'close': 0},
-            }
-            for rec in rows:
-                ut  = str(rec.get('updated_tier', '')).strip()
-                st  = str(rec.get('Progr.Stat.', '')).lower()
-                if ut == 'Severe':
-                    bucket = 'High'
-                elif ut == 'Moderate':
-                    bucket = 'Medium'
-                else:                          # Low / Deferred / Excluded / anything else
-                    bucket = 'Low'
-                _sev_dist[bucket]['total'] += 1
-                if st.startswith('open'):
-                    _sev_dist[bucket]['open']    += 1
-                elif st.startswith('resolve'):
-                    _sev_dist[bucket]['resolve'] += 1
-                elif st.startswith('close'):
-                    _sev_dist[bucket]['close']   += 1
-            severity_distribution = _sev_dist
+            severity_distribution = kpis["severity_distribution"]
+            if severity_distribution is None:
+                severity_distribution = tier_severity_breakdown(df)
             high_issues = severity_distribution['High']['total']
         else:
             severity_distribution = kpis["severity_distribution"]
@@ -623,39 +755,52 @@ def _process_folder(folder_path: str, save_to_file: bool = True) -> bool:
             },
             "top_models": top_models,
             "categories": categories,
-            "rows":        rows,
+            "rows":        None,            # streamed from df by json_io
         }
         if time_data:
             response["time_series"] = time_data
 
-        response = sanitize_nan(response)
-
         if save_to_file:
-            json_path = folder / "analytics.json"
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(response, f, indent=2)
+            # Rows go to the paged row store; analytics.json keeps the summary
+            # (written last, so a reader never sees a summary without its rows)
+            del response["rows"]
+            response["row_store"] = row_store.write_row_store(folder, df)
+            # Tier drill-down buckets over the same rows (drill_index.py)
+            response["drill_index"] = drill_index.write_drill_index(folder, df)
+            json_path = folder / row_store.SUMMARY_FILE
+            json_io.dump(response, json_path, pretty=pretty)
+            approx_kpis.clear(folder)
             sys.stderr.write(
                 f"  [OK]    {folder_name}/analytics.json  "
                 f"({kpis['total_rows']} rows, schema={'VOC' if voc else 'Issue'})\n"
             )
+            partials.save_partials(folder, folder_parts["partials"], folder_parts["fingerprints"])
+
             # ── Export moved_issues_updated_file.xlsx for issue schema ────
-            # Runs export_moved_issues_updated_file on each Excel file in the
-            # folder so you can verify which High/Medium rows moved tiers.
-            if not voc:
+            # Opt-in (--export-moved): writes the export of every Excel file
+            # so you can verify which High/Medium rows moved tiers. Files
+            # scored in this run reuse the scoring computed above; files
+            # whose partial was reused go through moved_export's cache
+            # (scored only if their export is missing or stale).
+            if export_moved and not voc:
+                scored_by_path = folder_parts["scored_by_path"]
                 for excel_path in excel_paths:
+                    if input_manifest.is_archived(excel_path):
+                        continue                # archived inputs are not exported
                     try:
-                        out_path = str(excel_path).replace(
-                            excel_path.suffix,
-                            '_moved_issues_updated_file.xlsx'
+                        moved_export.export(
+                            excel_path,
+                            df=frames[excel_path], scored=scored_by_path.get(excel_path),
                         )
-                        export_moved_issues_updated_file(str(excel_path), out_path)
                     except Exception as _exp_err:
                         sys.stderr.write(
                             f"  [WARN]  Could not export moved issues for "
                             f"{excel_path.name}: {_exp_err}\n"
                         )
         else:
-            print(json.dumps(response))
+            json_io.write_payload(sys.stdout, response, rows_key="rows", rows_df=df,
+                                  pretty=pretty, ensure_ascii=True)
+            sys.stdout.write("\n")
 
         return True
 
@@ -665,9 +810,87 @@ def _process_folder(folder_path: str, save_to_file: bool = True) -> bool:
         sys.stderr.write(traceback.format_exc())
         if not save_to_file:
             print(json.dumps({"error": str(e)}))
+        else:
+            approx_kpis.clear(folder)
         return False
 
 
+# ── Parallel driver ───────────────────────────────────────────────────────────
+# Folders are independent, so each one runs in its own worker process; the
+# remaining job budget parses the files inside a folder in parallel.
+# Every worker captures its --stdout-only JSON and the parent prints the
+# captured output in folder order, so results are deterministic regardless of
+# completion order. A failure (even a crashed worker) only fails its folder.
+def _run_folder(folder: str, save_to_file: bool, file_jobs: int, pretty: bool = False,
+                rebuild: bool = False, export_moved: bool = False,
+                progressive: bool = False) -> dict:
+    """Pool worker: process one folder, capturing its stdout and timing it."""
+    import io
+    from contextlib import redirect_stdout
+
+    buf   = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(buf):
+            ok = _process_folder(folder, save_to_file=save_to_file, jobs=file_jobs,
+                                 pretty=pretty, rebuild=rebuild, export_moved=export_moved,
+                                 progressive=progressive)
+    except Exception as e:
+        sys.stderr.write(f"  [ERROR] {Path(folder).name}/ — {e}\n")
+        ok = False
+    return {
+        "folder":  folder,
+        "ok":      ok,
+        "seconds": time.perf_counter() - start,
+        "stdout":  buf.getvalue(),
+    }
+
+
+def process_folders(folders: list, save_to_file: bool = True, jobs: int = 1,
+                    pretty: bool = False, rebuild: bool = False,
+                    export_moved: bool = False, progressive: bool = False) -> list:
+    """
+    Process every folder with up to `jobs` worker processes.
+    Returns one {folder, ok, seconds} dict per folder, in input order, and
+    writes a per-folder timing report to stderr.
+    """
+    folders   = [str(f) for f in folders]
+    jobs      = max(1, jobs)
+    start     = time.perf_counter()
+    file_jobs = max(1, jobs // max(1, len(folders)))
+
+    if jobs > 1 and len(folders) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        workers = min(jobs, len(folders))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_folder, f, save_to_file, file_jobs, pretty, rebuild,
+                                   export_moved, progressive)
+                       for f in folders]
+            results = []
+            for folder, fut in zip(folders, futures):
+                try:
+                    results.append(fut.result())
+                except Exception as e:          # worker crashed / unpicklable result
+                    sys.stderr.write(f"  [ERROR] {Path(folder).name}/ — worker failed: {e}\n")
+                    results.append({"folder": folder, "ok": False, "seconds": 0.0, "stdout": ""})
+    else:
+        results = [_run_folder(f, save_to_file, jobs, pretty, rebuild, export_moved, progressive)
+                   for f in folders]
+
+    for res in results:
+        out = res.pop("stdout")
+        if out:
+            sys.stdout.write(out)
+    sys.stdout.flush()
+
+    sys.stderr.write(f"\nTimings (jobs={jobs}):\n")
+    for res in results:
+        status = "ok    " if res["ok"] else "FAILED"
+        sys.stderr.write(f"  [TIME]  {Path(res['folder']).name + '/':<28} {status} {res['seconds']:7.2f}s\n")
+    sys.stderr.write(f"  [TIME]  {'total':<28} {'':6} {time.perf_counter() - start:7.2f}s\n")
+    return results
+
+
 # ── Entry point ───────────────────────────────────────────────────────────────
 if __name__ == "__main__":
     import shutil
@@ -677,8 +900,25 @@ if __name__ == "__main__":
 
     stdout_only = '--stdout-only' in sys.argv
     save_json   = not stdout_only
+    pretty      = '--pretty' in sys.argv        # debug: indented JSON
+    rebuild     = '--rebuild' in sys.argv       # ignore stored per-file partials
+    export_moved = '--export-moved' in sys.argv # also write moved_issues_updated_file.xlsx
+    progressive = '--progressive' in sys.argv   # publish approximate KPIs before scoring
+
+    # --jobs N / --jobs=N : worker processes (0 → one per CPU, default 1)
+    argv = sys.argv[1:]
+    jobs = 1
+    for i, a in enumerate(argv):
+        if a == '--jobs' or a.startswith('--jobs='):
+            value = a.split('=', 1)[1] if '=' in a else (argv[i + 1] if i + 1 < len(argv) else '')
+            if not value.lstrip('-').isdigit():
+                sys.stderr.write(f"ERROR: --jobs expects an integer, got '{value}'\n")
+                sys.exit(1)
+            jobs = int(value) if int(value) > 0 else (os.cpu_count() or 1)
+            argv = argv[:i] + argv[i + (1 if '=' in a else 2):]
+            break
 
-    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    args = [a for a in argv if not a.startswith('--')]
 
     if args:
         target_folders = []
@@ -727,12 +967,13 @@ if __name__ == "__main__":
     )
 
     ok = failed = 0
-    for folder in target_folders:
-        success = _process_folder(str(folder), save_to_file=save_json)
-        ok     += int(success)
-        failed += int(not success)
+    for res in process_folders(target_folders, save_to_file=save_json, jobs=jobs,
+                               pretty=pretty, rebuild=rebuild, export_moved=export_moved,
+                               progressive=progressive):
+        ok     += int(res["ok"])
+        failed += int(not res["ok"])
 
     sys.stderr.write(f"\nDone — {ok} succeeded, {failed} failed/skipped.\n\n")
 
     if failed and not ok:
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -0,0 +1,236 @@
+"""
+partials.py
+===========
+Per-file partial aggregates for incremental analytics.
+
+A new upload used to make pandas_aggregator re-score and re-aggregate every
+workbook already in the folder. Each input workbook now gets a partial:
+
+    downloads/<module>/__partials__/manifest.json     file → fingerprint + partial
+    downloads/<module>/__partials__/<file name>.json  one partial per workbook
+
+A partial holds what the folder summary needs from one workbook:
+
+    scores      Case Code → tier / criticality_score   (extract_criticality)
+    aggregates  row count, first-seen value counts per column (model, module,
+                category, source, CSC, Progr.Stat., VOC status), distinct
+                models, date buckets, VOC Issue Type × Status counts,
+                updated_tier × Progr.Stat. cells, distinct Case Code keys
+
+Only new or changed workbooks (size / mtime, then SHA-1 — same rule as
+excel_cache) are scored again; deleted workbooks are subtracted by dropping
+their partial before the merge. merge_partials() is O(files × distinct
+values), independent of the row count.
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+MERGE RULES
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+  • Aggregates are computed on the workbook laid out with the folder's
+    columns (as pd.concat would), so they are stored with that column list
+    ("context"). When files add or drop columns, aggregates are recomputed
+    from the cached frame; scores are kept.
+  • Value counts merge in file order, so the merged counts are in the same
+    first-appearance order the combined frame has and sort identically.
+  • Title similarity: similar_bug_count compares titles within the frame
+    extract_criticality scores, and every workbook is scored on its own, so
+    a workbook's scores depend on that workbook only and stay valid as
+    other files come and go. The one cross-file step is the Case Code tier
+    join (later files win on duplicate keys). merge_partials() detects any
+    row whose Case Code is scored by a different file and then leaves the
+    tier breakdown to the caller (combined frame) instead of summing cells.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import json_io
+from excel_cache import file_sha1
+from kpi_kernel import counts_from_pairs, issue_type_breakdown_from_counts, tier_severity_from_cells
+
+PARTIALS_DIR  = "__partials__"
+MANIFEST_FILE = "manifest.json"
+
+# Bump when the partial layout or the aggregate semantics change
+PARTIAL_VERSION = 1
+
+
+# ── Storage ───────────────────────────────────────────────────────────────────
+
+
+def _partials_dir(folder) -> Path:
+    return Path(folder) / PARTIALS_DIR
+
+
+def load_manifest(folder) -> dict:
+    """{file name: {size, mtime_ns, sha1, partial}} of the last run ({} if none)."""
+    try:
+        manifest = json_io.load(_partials_dir(folder) / MANIFEST_FILE)
+    except (OSError, ValueError):
+        return {}
+    return manifest.get("files", {}) if manifest.get("version") == PARTIAL_VERSION else {}
+
+
+def fingerprint(path, previous: dict = None) -> dict:
+    """
+    {size, mtime_ns, sha1} of `path`. The content hash is reused from
+    `previous` while size + mtime are unchanged.
+    """
+    st = Path(path).stat()
+    if previous and previous.get("size") == st.st_size and previous.get("mtime_ns") == st.st_mtime_ns:
+        sha1 = previous["sha1"]
+    else:
+        sha1 = file_sha1(Path(path))
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": sha1}
+
+
+def load_partial(folder, entry: dict, fp: dict):
+    """The stored partial of a manifest entry if its content hash matches `fp`, else None."""
+    if not entry or entry.get("sha1") != fp["sha1"]:
+        return None
+    try:
+        partial = json_io.load(_partials_dir(folder) / entry["partial"])
+    except (OSError, ValueError, KeyError):
+        return None
+    return partial if partial.get("version") == PARTIAL_VERSION else None
+
+
+def save_partials(folder, partials: dict, fingerprints: dict) -> None:
+    """
+    Write {file name: partial} plus the manifest, and remove partials of
+    files no longer listed.
+    """
+    pdir = _partials_dir(folder)
+    pdir.mkdir(parents=True, exist_ok=True)
+
+    files = {}
+    for name, partial in partials.items():
+        partial_file = f"{name}.json"
+        json_io.dump(partial, pdir / partial_file)
+        files[name] = dict(fingerprints[name], partial=partial_file)
+
+    json_io.dump({"version": PARTIAL_VERSION, "files": files}, pdir / MANIFEST_FILE)
+
+    keep = {entry["partial"] for entry in files.values()} | {MANIFEST_FILE}
+    for stale in pdir.glob("*.json"):
+        if stale.name not in keep:
+            stale.unlink()
+
+
+# ── Merge ─────────────────────────────────────────────────────────────────────
+
+
+def _tier_join_is_local(partials: list) -> bool:
+    """
+    True when the folder-wide join gives every row the score of its own file
+    (or none) — i.e. per-file tier cells add up to the combined frame's.
+    """
+    owner = {}
+    for i, p in enumerate(partials):
+        for key, _tier, _score in p["scores"]:
+            owner[key] = i                          # later files win, as in the join
+    return all(
+        owner.get(key, i) == i
+        for i, p in enumerate(partials)
+        for key in p["aggregates"]["case_keys"]
+    )
+
+
+def merge_scores(partials: list) -> tuple:
+    """(tier_lookup, score_lookup) of the folder: per-file lookups, later files win."""
+    tier_lookup, score_lookup = {}, {}
+    for p in partials:
+        for key, tier, score in p["scores"]:
+            tier_lookup[key]  = tier
+            score_lookup[key] = score
+    return tier_lookup, score_lookup
+
+
+def _sorted_counts(pair_lists) -> dict:
+    """value_distributions() ordering of merged counts."""
+    return counts_from_pairs(pair_lists).sort_values(ascending=False).to_dict()
+
+
+def _grouped(pair_lists) -> list:
+    """group_by_column() of merged counts (value_counts, then sorted again)."""
+    counts = counts_from_pairs(pair_lists).sort_values(ascending=False).sort_values(ascending=False)
+    return [{"label": str(idx), "count": int(count)} for idx, count in counts.items()]
+
+
+def merge_partials(partials: list, voc: bool) -> dict:
+    """
+    Folder summary from per-file partials (in input order):
+
+        {kpis, top_models, categories, time_series,
+         scored_rows, tier_lookup, score_lookup}
+
+    kpis carries the compute_kpis() keys (no high_issues). For the issue
+    schema kpis["severity_distribution"] is the updated_tier breakdown, or
+    None when the Case Code tier join is not file-local — the caller then
+    computes it from the combined frame.
+    """
+    aggs = [p["aggregates"] for p in partials]
+
+    def _counts(col):
+        return [a["counts"].get(col, []) for a in aggs]
+
+    category_col = 'Category' if voc else 'Module'
+    models = set()
+    for a in aggs:
+        models.update(a["models"])
+
+    if voc:
+        status_dist = _sorted_counts(a["voc_status"] or [] for a in aggs)
+        open_issues     = status_dist.get('Open',    0)
+        resolved_issues = status_dist.get('Resolve', 0)
+        close_issues    = status_dist.get('Close',   0)
+    else:
+        status_dist = _sorted_counts(_counts('Progr.Stat.'))
+        open_issues, resolved_issues, close_issues = (
+            int(sum(a["progr"][k] for a in aggs)) for k in range(3)
+        )
+
+    tier_lookup, score_lookup = ({}, {}) if voc else merge_scores(partials)
+    scored_rows = 0 if voc else int(sum(p["scored_rows"] for p in partials))
+
+    if voc:
+        triples = [t for a in aggs for t in (a["issue_types"] or [])]
+        severity_dist = issue_type_breakdown_from_counts(triples) if any(
+            a["issue_types"] is not None for a in aggs) else {}
+    elif not scored_rows:
+        # no scores anywhere → tiers are not merged onto the rows at all
+        severity_dist = tier_severity_from_cells(sum((np.asarray(a["tier_cells_raw"]) for a in aggs), np.zeros((3, 4), dtype=np.int64)))
+    elif _tier_join_is_local(partials):
+        severity_dist = tier_severity_from_cells(sum((np.asarray(a["tier_cells"]) for a in aggs), np.zeros((3, 4), dtype=np.int64)))
+    else:
+        severity_dist = None
+
+    dates = {}
+    for a in aggs:
+        for day, n in a["dates"]:
+            dates[day] = dates.get(day, 0) + n
+
+    return {
+        "kpis": {
+            "total_rows":            int(sum(a["rows"] for a in aggs)),
+            "unique_models":         len(models),
+            "severity_distribution": severity_dist,
+            "status_distribution":   status_dist,
+            "source_distribution":   _sorted_counts(_counts('CSC' if voc else 'Source')),
+            "open_issues":           open_issues,
+            "resolved_issues":       resolved_issues,
+            "close_issues":          close_issues,
+            "schema":                "voc" if voc else "issue",
+        },
+        "top_models":   _grouped(_counts('Model No.')),
+        "categories":   _grouped(_counts(category_col)),
+        "time_series":  [{"date": day, "count": dates[day]} for day in sorted(dates)],
+        "scored_rows":  scored_rows,
+        "tier_lookup":  tier_lookup,
+        "score_lookup": score_lookup,
+    }
@@ -0,0 +1,199 @@
+"""
+row_store.py
+============
+Paged row store next to each source's analytics.json.
+
+analytics.json used to embed every raw row ("rows"), so anything that only
+needed the KPIs — /api/analytics/:module, generate_central_cache, the AI
+insight job — parsed the whole document. _process_folder now writes:
+
+    downloads/<module>/analytics.json   summary: kpis, top_models, categories,
+                                        time_series + a "row_store" descriptor
+    downloads/<module>/rows.ndjson      one compact JSON object per row
+    downloads/<module>/rows.idx         row byte offsets, little-endian uint64
+                                        (count + 1 entries; row i spans
+                                        [idx[i], idx[i + 1]) incl. newline)
+
+The offset index gives O(1) page access (one seek + one read) from Python
+and from server.js; filters and field projections are applied per row.
+
+Readers fall back to a legacy analytics.json that still embeds "rows", so
+folders generated before the split keep working until they are rebuilt.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import json_io
+
+SUMMARY_FILE = "analytics.json"
+ROWS_FILE    = "rows.ndjson"
+INDEX_FILE   = "rows.idx"
+
+# Bump when the on-disk layout changes (checked by server.js as well)
+STORE_VERSION = 1
+
+_INDEX_DTYPE = "<u8"
+
+
+# ── Writing ───────────────────────────────────────────────────────────────────
+
+
+def write_row_store(folder, df) -> dict:
+    """
+    Write df's rows (df.to_dict('records') semantics) as rows.ndjson + rows.idx
+    in `folder`, atomically. Returns the descriptor stored in the summary.
+    """
+    folder = Path(folder)
+    rows_path, index_path = folder / ROWS_FILE, folder / INDEX_FILE
+    rows_tmp = rows_path.with_name(rows_path.name + f".tmp{os.getpid()}")
+    index_tmp = index_path.with_name(index_path.name + f".tmp{os.getpid()}")
+
+    offsets = [np.zeros(1, dtype=np.uint64)]
+    written = 0
+    try:
+        with open(rows_tmp, "wb") as f:
+            for rows in json_io.iter_record_chunks(df):
+                blob = ("\n".join(rows) + "\n").encode("utf-8")
+                # JSON text never contains a raw newline, so every b"\n" ends a row
+                ends = np.flatnonzero(np.frombuffer(blob, dtype=np.uint8) == 10) + 1
+                offsets.append(ends.astype(np.uint64) + np.uint64(written))
+                f.write(blob)
+                written += len(blob)
+        np.concatenate(offsets).astype(_INDEX_DTYPE).tofile(index_tmp)
+        os.replace(rows_tmp, rows_path)
+        os.replace(index_tmp, index_path)
+    finally:
+        for tmp in (rows_tmp, index_tmp):
+            if tmp.exists():
+                tmp.unlink()
+
+    return {
+        "version": STORE_VERSION,
+        "format":  "ndjson",
+        "file":    ROWS_FILE,
+        "index":   INDEX_FILE,
+        "count":   int(len(df)),
+        "bytes":   written,
+        "fields":  [str(c) for c in df.columns],
+    }
+
+
+# ── Reading ───────────────────────────────────────────────────────────────────
+
+
+def load_summary(folder) -> dict:
+    """Parsed analytics.json of `folder` ({} if missing or unreadable)."""
+    path = Path(folder) / SUMMARY_FILE
+    try:
+        return json_io.load(path)
+    except (OSError, ValueError):
+        return {}
+
+
+def _has_store(folder, summary: dict) -> bool:
+    store = summary.get("row_store")
+    return bool(store) and store.get("version") == STORE_VERSION and (Path(folder) / ROWS_FILE).exists()
+
+
+def _load_offsets(folder) -> np.ndarray:
+    return np.fromfile(Path(folder) / INDEX_FILE, dtype=_INDEX_DTYPE)
+
+
+def _project(row: dict, fields):
+    # Absent fields stay absent, so callers' rec.get(f, default) still applies
+    return row if fields is None else {f: row[f] for f in fields if f in row}
+
+
+def _matches(row: dict, where: dict) -> bool:
+    """where = {field: value | list/tuple/set of accepted values}."""
+    for field, accepted in where.items():
+        value = row.get(field)
+        if isinstance(accepted, (list, tuple, set, frozenset)):
+            if value not in accepted:
+                return False
+        elif value != accepted:
+            return False
+    return True
+
+
+def row_count(folder, summary: dict = None) -> int:
+    summary = load_summary(folder) if summary is None else summary
+    if _has_store(folder, summary):
+        return int(summary["row_store"]["count"])
+    return len(summary.get("rows", []))
+
+
+def iter_rows(folder, fields: list = None, where: dict = None, summary: dict = None):
+    """Stream every row (optionally filtered / projected) without loading all."""
+    summary = load_summary(folder) if summary is None else summary
+    if not _has_store(folder, summary):
+        for row in summary.get("rows", []):                # legacy embedded rows
+            if not where or _matches(row, where):
+                yield _project(row, fields)
+        return
+
+    with open(Path(folder) / ROWS_FILE, "rb") as f:
+        for line in f:
+            row = json_io.loads(line)
+            if not where or _matches(row, where):
+                yield _project(row, fields)
+
+
+def read_rows(folder, offset: int = 0, limit: int = None, fields: list = None,
+              where: dict = None, summary: dict = None) -> list:
+    """
+    One page of rows. Without `where` the page is read straight from its byte
+    range via the offset index; with `where` the page applies to the matches.
+    """
+    summary = load_summary(folder) if summary is None else summary
+    offset = max(0, int(offset))
+
+    if where or not _has_store(folder, summary):
+        out = []
+        for i, row in enumerate(iter_rows(folder, fields, where, summary)):
+            if i < offset:
+                continue
+            if limit is not None and len(out) >= limit:
+                break
+            out.append(row)
+        return out
+
+    offsets = _load_offsets(folder)
+    count = len(offsets) - 1
+    end = count if limit is None else min(count, offset + max(0, int(limit)))
+    if offset >= end:
+        return []
+    start_byte, end_byte = int(offsets[offset]), int(offsets[end])
+    with open(Path(folder) / ROWS_FILE, "rb") as f:
+        f.seek(start_byte)
+        blob = f.read(end_byte - start_byte)
+    return [_project(json_io.loads(line), fields) for line in blob.split(b"\n")[:-1]]
+
+
+def read_rows_at(folder, ids, fields: list = None, summary: dict = None) -> list:
+    """Rows at positions `ids`, in that order — one seek + read per row."""
+    summary = load_summary(folder) if summary is None else summary
+    if not _has_store(folder, summary):
+        rows = summary.get("rows", [])
+        return [_project(rows[int(i)], fields) for i in ids]
+
+    offsets = np.memmap(Path(folder) / INDEX_FILE, dtype=_INDEX_DTYPE, mode="r")
+    out = []
+    with open(Path(folder) / ROWS_FILE, "rb") as f:
+        for i in ids:
+            start, end = int(offsets[i]), int(offsets[i + 1])
+            f.seek(start)
+            out.append(_project(json_io.loads(f.read(end - start)), fields))
+    return out
+
+
+def load_rows(folder, fields: list = None, where: dict = None, summary: dict = None) -> list:
+    """Every row of `folder` as a list (the old analytics.json["rows"])."""
+    return list(iter_rows(folder, fields, where, summary))
@@ -0,0 +1,296 @@
+"""
+schemas.py
+==========
+Declared column types of the analytics frames, per input schema.
+
+Workbooks parse every text column as Python `object` strings — one PyObject
+per cell, copied again by each normalise / filter step. Every loader
+(pandas_aggregator, central_aggregator) applies this registry right after
+reading a workbook instead:
+
+    category   low-cardinality labels (status, severity, module ...):
+               small integer codes + one copy of each label, so filters,
+               value counts and groupbys run on the codes
+    text       free text and identifiers (Title, Problem, Case Code ...):
+               Arrow-backed strings (pd.StringDtype("pyarrow")); pandas'
+               Python string dtype when pyarrow is not installed
+
+Numbers and dates keep their parsed dtypes; undeclared columns are left as
+loaded. Text cells are stringified as parsed (123.0 → '123'), and a label
+column is only made categorical when every value is a string, so mixed
+columns keep their values.
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+SCHEMAS  (detection as in extract_criticality / pandas_aggregator)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    voc       'Status' + 'Category', no 'Progr.Stat.'
+    schema1   'Priority' + 'Occurr. Freq.'
+    schema2   'Resolve'
+    issue     any other issue export (shared issue columns only)
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+CATEGORICAL PITFALLS (handled here)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+  • pd.concat turns categoricals with different categories into object —
+    concat_frames() aligns the categories first.
+  • Categorical.value_counts() lists unused categories and breaks ties by
+    category order — value_counts() keeps object semantics (observed values,
+    ties in first-appearance order).
+  • Mapping labels row by row defeats the codes — map_labels() maps each
+    distinct label once.
+
+Memory report of a folder (raw object frame vs typed frame):
+  python server/analytics/schemas.py downloads/beta_ut [more folders ...]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    TEXT_DTYPE = pd.StringDtype("python")
+
+CATEGORY, TEXT = "category", "text"
+VOC, SCHEMA1, SCHEMA2, ISSUE = "voc", "schema1", "schema2", "issue"
+
+# ── Registry ──────────────────────────────────────────────────────────────────
+
+_ISSUE_CATEGORY = ['Source', 'Progr.Stat.', 'Severity', 'Module', 'Sub-Module',
+                   'Issue Type', 'Sub-Issue Type']
+_ISSUE_TEXT     = ['Case Code', 'Model No.', 'S/W Ver.', 'Title', 'Problem',
+                   'AI Insight', 'Severity Reason']
+
+SCHEMAS = {
+    SCHEMA1: {
+        CATEGORY: _ISSUE_CATEGORY + ['Sub-Sources', 'Priority', 'Occurr. Freq.'],
+        TEXT:     _ISSUE_TEXT,
+    },
+    SCHEMA2: {
+        CATEGORY: _ISSUE_CATEGORY + ['Resolve'],
+        TEXT:     _ISSUE_TEXT,
+    },
+    ISSUE: {
+        CATEGORY: _ISSUE_CATEGORY,
+        TEXT:     _ISSUE_TEXT,
+    },
+    VOC: {
+        CATEGORY: ['Source', 'Status', 'OS', 'CSC', 'Category', 'Application Type',
+                   'Main Type', 'Sub Type', 'Module', 'Sub-Module', 'Issue Type',
+                   'Sub-Issue Type', 'Severity'],
+        TEXT:     ['Model No.', 'S/W Ver.', 'Application Name', 'content', 'AI Insight',
+                   'Case Code', 'Title'],
+    },
+}
+
+
+def detect_schema(columns) -> str:
+    cols = set(columns)
+    if 'Status' in cols and 'Category' in cols and 'Progr.Stat.' not in cols:
+        return VOC
+    if 'Priority' in cols and 'Occurr. Freq.' in cols:
+        return SCHEMA1
+    if 'Resolve' in cols:
+        return SCHEMA2
+    return ISSUE
+
+
+# ── Typing ────────────────────────────────────────────────────────────────────
+
+
+def _as_text(col: pd.Series) -> pd.Series:
+    """Cells stringified as parsed: integral numbers of float columns → '123'."""
+    values = col.astype(object)
+    if pd.api.types.is_float_dtype(col):
+        values = pd.Series(
+            [int(v) if v.is_integer() else v for v in values],
+            index=values.index, dtype=object,
+        )
+    return values.astype(TEXT_DTYPE)
+
+
+def apply_schema(df: pd.DataFrame, schema: str = None) -> pd.DataFrame:
+    """
+    Copy of df with the registry dtypes of `schema` (detected from the
+    columns when None).
+    """
+    spec = SCHEMAS[schema or detect_schema(df.columns)]
+    df = df.copy(deep=False)
+    for col in spec[TEXT]:
+        if col in df.columns and df[col].dtype != TEXT_DTYPE:
+            df[col] = _as_text(df[col])
+    for col in spec[CATEGORY]:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            if pd.api.types.infer_dtype(df[col], skipna=True) == 'string':
+                df[col] = df[col].astype('category')
+    return df
+
+
+def concat_frames(dfs: list) -> pd.DataFrame:
+    """
+    pd.concat(dfs, ignore_index=True, sort=False) that keeps categorical
+    columns categorical: each column's categories are unioned (first-seen
+    order) across the frames before concatenating.
+    """
+    dfs = [d for d in dfs if d is not None]
+    if not dfs:
+        return pd.DataFrame()
+
+    union, mixed = {}, set()
+    for d in dfs:
+        for col in d.columns:
+            dtype = d[col].dtype
+            if isinstance(dtype, pd.CategoricalDtype):
+                union.setdefault(col, []).append(dtype.categories)
+            else:
+                mixed.add(col)                  # not categorical everywhere → object
+    aligned = {
+        col: pd.CategoricalDtype(pd.Index(pd.unique(np.concatenate([c.to_numpy(object) for c in cats]))))
+        for col, cats in union.items() if col not in mixed and len(cats) > 1
+    }
+
+    if aligned:
+        dfs = [
+            d.astype({c: t for c, t in aligned.items() if c in d.columns and d[c].dtype != t})
+            for d in dfs
+        ]
+    return pd.concat(dfs, ignore_index=True, sort=False)
+
+
+def downcast_integers(df: pd.DataFrame) -> pd.DataFrame:
+    """int64 columns → smallest integer dtype holding their values (in place)."""
+    for col in df.select_dtypes(include=['int64']):
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+
+# ── Copy-free label operations ────────────────────────────────────────────────
+
+
+def map_labels(series: pd.Series, func, missing=None) -> pd.Series:
+    """
+    Categorical series of func(str(label)) for every non-missing cell,
+    evaluating func once per distinct label. Missing cells stay missing, or
+    become func(missing) when `missing` is given (astype(str) gives 'nan').
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype('category')
+    mapped  = [func(str(c)) for c in series.cat.categories]
+    if missing is not None:
+        mapped.append(func(missing))
+    new_cat = pd.Index(pd.unique(np.asarray(mapped, dtype=object)))
+    remap   = new_cat.get_indexer(mapped)
+    if missing is None:
+        remap = np.append(remap, -1)                          # code -1 → -1
+    codes   = remap[series.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(new_cat)),
+                     index=series.index, name=series.name)
+
+
+def value_counts(series: pd.Series) -> pd.Series:
+    """
+    series.value_counts() with object-column semantics for any dtype:
+    observed values only, descending, ties in first-appearance order.
+    Categoricals are counted on their codes; Arrow text columns (whose own
+    value_counts breaks ties differently) on their factorized codes.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    elif isinstance(series.dtype, pd.StringDtype):
+        codes, uniques = pd.factorize(series)
+    else:
+        return series.value_counts()
+
+    codes = codes[codes >= 0]
+    uniq, first = np.unique(codes, return_index=True)
+    order  = uniq[np.argsort(first, kind='stable')]
+    counts = np.bincount(codes, minlength=len(uniques))[order]
+    labels = pd.Index(np.asarray(uniques, dtype=object)[order], dtype=object, name=series.name)
+    return pd.Series(counts.astype('int64'), index=labels, name='count').sort_values(ascending=False)
+
+
+# ── Memory report ─────────────────────────────────────────────────────────────
+
+
+def _family(dtype) -> str:
+    if isinstance(dtype, pd.CategoricalDtype):
+        return CATEGORY
+    if isinstance(dtype, pd.StringDtype):
+        return TEXT
+    if dtype == object:
+        return "object"
+    return "other"
+
+
+def memory_report(df: pd.DataFrame) -> dict:
+    """Deep memory of df in bytes, in total and per dtype family."""
+    usage = df.memory_usage(deep=True, index=False)
+    report = {"rows": len(df), "columns": len(df.columns), "total": int(usage.sum()),
+              CATEGORY: 0, TEXT: 0, "object": 0, "other": 0}
+    for col, nbytes in usage.items():
+        report[_family(df[col].dtype)] += int(nbytes)
+    return report
+
+
+def format_memory(report: dict) -> str:
+    mb = lambda n: f"{n / 1e6:.1f}"
+    return (
+        f"{mb(report['total'])} MB  (category {mb(report[CATEGORY])}, text {mb(report[TEXT])}, "
+        f"object {mb(report['object'])}, other {mb(report['other'])}) — "
+        f"{report['rows']} rows × {report['columns']} cols"
+    )
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+
+def _time(fn, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None) -> int:
+    import argparse
+    if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import input_manifest
+
+    parser = argparse.ArgumentParser(description="Memory report: raw vs typed analytics frames")
+    parser.add_argument("folders", nargs="+", help="downloads/<module> folders")
+    args = parser.parse_args(argv)
+
+    for folder in args.folders:
+        raws = [input_manifest.read_input(p) for p in input_manifest.canonical_inputs(folder)]
+        if not raws:
+            sys.stderr.write(f"  [SKIP]  {folder} — no inputs\n")
+            continue
+        raw   = pd.concat(raws, ignore_index=True, sort=False)
+        typed = concat_frames([apply_schema(r) for r in raws])
+        r_rep, t_rep = memory_report(raw), memory_report(typed)
+
+        sys.stderr.write(f"\n{folder}  schema={detect_schema(typed.columns)}\n")
+        sys.stderr.write(f"  [MEM]   raw    {format_memory(r_rep)}\n")
+        sys.stderr.write(f"  [MEM]   typed  {format_memory(t_rep)}\n")
+        sys.stderr.write(f"  [MEM]   {r_rep['total'] / max(t_rep['total'], 1):.1f}x smaller\n")
+
+        keys = [c for c in ('Module', 'Category', 'Progr.Stat.', 'Status') if c in typed.columns][:2]
+        if keys:
+            t_raw   = _time(lambda: raw.groupby(keys, sort=False, dropna=False).size())
+            t_typed = _time(lambda: typed.groupby(keys, sort=False, dropna=False, observed=True).size())
+            sys.stderr.write(
+                f"  [TIME]  groupby {keys}: raw {t_raw * 1e3:.1f} ms, typed {t_typed * 1e3:.1f} ms\n"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
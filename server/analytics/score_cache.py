@@ -0,0 +1,200 @@
+"""
+score_cache.py
+==============
+Result cache for extract_criticality_data() (and what_if.py's dimension
+matrices, stored under their own `kind`).
+
+get_severe_issues(), get_issues_by_tier(), get_summary() and
+central_aggregator.get_high_severity_breakdown() each ran the full
+extract_criticality_data() — Excel parse, TF-IDF pass, scoring — on files
+that had been scored before with the same settings. Results are now cached
+in two tiers:
+
+    memory   LRU of the last LRU_SIZE results in this process (pickled)
+    disk     <folder>/__score_cache__/<file name>.<config key>.pkl   (result)
+             <folder>/__score_cache__/<file name>.<config key>.json  (meta)
+
+Other kinds of per-file artefact add the kind to the name
+(<file name>.<config key>.<kind>.pkl / .json). Archived inputs
+(input_manifest.py) are cached in their module folder's __score_cache__
+under their workbook name, never inside the archive partitions.
+
+Pickle keeps the result exactly as computed (NaN cells, NumPy scalars), so
+a cached result is indistinguishable from a fresh one. The memory tier keeps
+the pickled bytes too, so every get() returns a private copy — a caller
+mutating its result cannot change what the next caller sees.
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+KEY
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    file     size + mtime, then SHA-1 of the content (same rule as
+             excel_cache: a touched but unchanged file is still a hit)
+    config   hash of the effective scoring config — weights, rank maps,
+             tier thresholds, similar-bug settings, sklearn availability —
+             with the module defaults filled in, so passing a default
+             explicitly hits the same entry as omitting it
+
+Bump CACHE_VERSION when the scoring semantics change.
+Set MARKET_PULSE_SCORE_CACHE=0 to bypass the cache entirely.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+from excel_cache import file_sha1, write_atomic
+
+CACHE_DIR_NAME = "__score_cache__"
+
+# Bump when the result layout or the scoring semantics change
+CACHE_VERSION = 1
+
+LRU_SIZE = 32
+
+RESULT = "result"
+
+_LRU = OrderedDict()
+
+
+def enabled() -> bool:
+    return os.environ.get("MARKET_PULSE_SCORE_CACHE", "1") not in ("0", "false", "no")
+
+
+def config_key(config: dict) -> str:
+    """Stable short key of an effective scoring config."""
+    blob = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:12]
+
+
+def cache_location(path) -> tuple:
+    """
+    (cache dir, entry name) of an input: <folder>/__score_cache__ and the
+    file name; an archived input maps to its module folder and workbook name.
+    """
+    import input_manifest
+    path = Path(path)
+    if input_manifest.is_archived(path):
+        return path.parents[3] / CACHE_DIR_NAME, input_manifest.source_name(path)
+    return path.parent / CACHE_DIR_NAME, path.name
+
+
+def _paths(path: Path, cfg_key: str, kind: str = RESULT) -> tuple:
+    cache_dir, name = cache_location(path)
+    stem = f"{name}.{cfg_key}" if kind == RESULT else f"{name}.{cfg_key}.{kind}"
+    return cache_dir / f"{stem}.json", cache_dir / f"{stem}.pkl"
+
+
+def _read_meta(meta_path: Path):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return meta if meta.get("version") == CACHE_VERSION else None
+    except (OSError, ValueError):
+        return None
+
+
+def _remember(key: tuple, blob: bytes) -> None:
+    _LRU[key] = blob
+    _LRU.move_to_end(key)
+    while len(_LRU) > LRU_SIZE:
+        _LRU.popitem(last=False)
+
+
+def get(path, cfg_key: str, kind: str = RESULT):
+    """Cached `kind` entry for `path` scored with config `cfg_key`, or None."""
+    path = Path(path)
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+
+    mem_key = (str(path.resolve()), st.st_size, st.st_mtime_ns, cfg_key, kind)
+    if mem_key in _LRU:
+        _LRU.move_to_end(mem_key)
+        return pickle.loads(_LRU[mem_key])
+
+    meta_path, data_path = _paths(path, cfg_key, kind)
+    meta = _read_meta(meta_path)
+    if meta is None or not data_path.exists():
+        return None
+    if meta["size"] != st.st_size or meta["mtime_ns"] != st.st_mtime_ns:
+        if meta["sha1"] != file_sha1(path):
+            return None
+        meta.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+        write_atomic(meta_path, lambda p: p.write_text(json.dumps(meta), encoding="utf-8"))
+    try:
+        blob = data_path.read_bytes()
+        result = pickle.loads(blob)
+    except Exception as e:
+        sys.stderr.write(f"Warning: score cache for {path.name} unreadable ({e}), re-scoring\n")
+        return None
+
+    _remember(mem_key, blob)
+    return result
+
+
+def put(path, cfg_key: str, result: dict, kind: str = RESULT) -> None:
+    """Store `result` for `path` + config in both tiers (disk errors are warned)."""
+    path = Path(path)
+    st = path.stat()
+    blob = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+    _remember((str(path.resolve()), st.st_size, st.st_mtime_ns, cfg_key, kind), blob)
+
+    meta_path, data_path = _paths(path, cfg_key, kind)
+    try:
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(data_path, lambda p: p.write_bytes(blob))
+        meta = {
+            "version":  CACHE_VERSION,
+            "source":   str(path.resolve()),
+            "size":     st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha1":     file_sha1(path),
+            "config":   cfg_key,
+            "kind":     kind,
+        }
+        write_atomic(meta_path, lambda p: p.write_text(json.dumps(meta), encoding="utf-8"))
+    except OSError as e:
+        sys.stderr.write(f"Warning: Could not write score cache for {path.name}: {e}\n")
+
+
+def clear_memory() -> None:
+    """Drop the in-process tier (the disk tier is kept)."""
+    _LRU.clear()
+
+
+def prune_score_cache(folder) -> int:
+    """Remove cached results whose source workbook no longer exists. Returns files removed."""
+    import shutil
+    import input_manifest
+    removed = 0
+    # caches once written inside the archive partitions (now kept in the folder's own)
+    for legacy in input_manifest.archive_dir(folder).glob(f"*/{CACHE_DIR_NAME}"):
+        removed += sum(1 for f in legacy.iterdir() if f.is_file())
+        shutil.rmtree(legacy, ignore_errors=True)
+
+    cache_dir = Path(folder) / CACHE_DIR_NAME
+    if not cache_dir.is_dir():
+        return removed
+    for meta_path in cache_dir.glob("*.json"):
+        meta = _read_meta(meta_path)
+        source = Path(meta["source"]) if meta else None
+        if source is None or not source.exists():
+            # not a glob: workbook names may contain [ ] * ?
+            prefix = meta_path.name[:-len("json")]
+            for f in list(cache_dir.iterdir()):
+                if f.name.startswith(prefix):
+                    f.unlink()
+                    removed += 1
+    # similarity_index files (<file name>.similarity.pkl) have no meta
+    archived = input_manifest.load_manifest(folder)["archive"]
+    for index_path in cache_dir.glob("*.similarity.pkl"):
+        name = index_path.name[:-len(".similarity.pkl")]
+        if not (cache_dir.parent / name).exists() and name not in archived:
+            index_path.unlink()
+            removed += 1
+    return removed
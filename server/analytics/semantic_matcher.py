@@ -4,6 +4,8 @@ import sys
 import time
 from pathlib import Path
 
+import row_store
+
 # Configuration
 SIMILARITY_THRESHOLD = 0.85
 MODEL_NAME = 'all-MiniLM-L6-v2'
@@ -45,8 +47,9 @@ def main():
         print("[ERROR] Missing analytics data. Skipping semantic matching.")
         return
 
-    smvoc_rows = smvoc_data.get('rows', [])
-    global_rows = global_data.get('rows', [])
+    # Rows live in the row store next to each analytics.json summary
+    smvoc_rows = row_store.load_rows(smvoc_path.parent, summary=smvoc_data)
+    global_rows = row_store.load_rows(global_path.parent, summary=global_data)
 
     print(f"[INFO] Loaded {len(smvoc_rows)} SMVOC rows and {len(global_rows)} Global VOC rows.")
 
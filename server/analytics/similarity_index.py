@@ -0,0 +1,268 @@
+"""
+similarity_index.py
+===================
+Incremental title-similarity counts for extract_criticality (opt-in).
+
+_title_similarity_counts() refits the TF-IDF model and compares every title
+with every other title on each run — O(corpus²) although a daily upload of
+the same export only appends a few hundred issues. With incremental
+similarity on, each input keeps an index next to its score cache:
+
+    <folder>/__score_cache__/<file name>.similarity.pkl
+
+holding the fitted vectorizer (vocabulary + IDF), the L2-normalised vector
+of every distinct title, its multiplicity, and its neighbour count. On the
+next run only the titles that appeared (or disappeared) are vectorised and
+multiplied against the stored vectors — the sparse product touches only
+titles sharing a term with them (the transposed vectors are an inverted
+term index) — and the counts are updated in both directions:
+
+    new → old   a new title counts its neighbours already in the corpus
+    old → new   every neighbour of a new / removed title gains / loses it
+
+Cost per run: O(changed titles × corpus) instead of O(corpus²).
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+DRIFT
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Titles added after the fit are vectorised with the frozen vocabulary and
+IDF, so their unseen terms are ignored and the counts drift from a full
+refit. The share of out-of-vocabulary terms among all terms added since
+the fit is tracked; once it passes DRIFT_THRESHOLD the index is rebuilt
+from scratch. A rebuild (and the first run) gives exactly the counts of
+_title_similarity_counts(). Between rebuilds the IDF is stale as well:
+pairs within a few 1e-3 of the similarity threshold can fall on the other
+side than in a full refit (most visible on small, templated vocabularies).
+DRIFT_THRESHOLD = 0 rebuilds whenever an unseen term arrives.
+
+The index is also rebuilt when it is missing, unreadable, of another
+INDEX_VERSION or built for another similarity threshold.
+
+Enable per call (extract_criticality_data(..., incremental_similarity=True))
+or for every run with MARKET_PULSE_INCREMENTAL_SIMILARITY=1. Frames scored
+without a source file always use the full computation.
+"""
+
+import os
+import pickle
+import sys
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import scipy.sparse as sp
+    from sklearn.preprocessing import normalize
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+from excel_cache import write_atomic
+
+INDEX_VERSION = 1
+
+# Refit once this share of the terms added since the last fit is unknown
+DRIFT_THRESHOLD = 0.10
+
+# Similarities are computed in row blocks of at most this many cells
+# (as extract_criticality.SIMILARITY_BLOCK_CELLS)
+BLOCK_CELLS = 1 << 24
+
+
+def enabled() -> bool:
+    """Default of extract_criticality's incremental_similarity option."""
+    return os.environ.get("MARKET_PULSE_INCREMENTAL_SIMILARITY", "0") in ("1", "true", "yes")
+
+
+def index_path(source) -> Path:
+    from score_cache import cache_location
+    cache_dir, name = cache_location(source)
+    return cache_dir / f"{name}.similarity.pkl"
+
+
+# ── Index life cycle ──────────────────────────────────────────────────────────
+
+
+def _load(path: Path, threshold: float):
+    try:
+        with open(path, "rb") as f:
+            index = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        sys.stderr.write(f"Warning: similarity index {path.name} unreadable ({e}), rebuilding\n")
+        return None
+    if index.get("version") != INDEX_VERSION or index.get("threshold") != threshold:
+        return None
+    return index
+
+
+def _save(path: Path, index: dict) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, lambda p: p.write_bytes(pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)))
+    except OSError as e:
+        sys.stderr.write(f"Warning: Could not write similarity index {path.name}: {e}\n")
+
+
+def _hits(rows, ids: np.ndarray, vectors, threshold: float) -> tuple:
+    """
+    (row position, neighbour id) of every similarity >= threshold between
+    the given rows (title ids `ids`) and all stored vectors, self excluded;
+    plus whether each row is its own neighbour (similarity with itself).
+    Multiplied in row blocks of at most BLOCK_CELLS cells.
+    """
+    vectors_t = vectors.T.tocsr()
+    step = max(1, BLOCK_CELLS // max(vectors.shape[0], 1))
+    self_hit = np.zeros(len(ids), dtype=bool)
+    all_pos, all_nbr = [], []
+    for start in range(0, rows.shape[0], step):
+        product = (rows[start:start + step] @ vectors_t).tocsr()
+        pos  = np.repeat(np.arange(product.shape[0]), np.diff(product.indptr)) + start
+        keep = product.data >= threshold
+        is_self = product.indices == ids[pos]
+        self_hit[pos[keep & is_self]] = True
+        keep &= ~is_self
+        all_pos.append(pos[keep])
+        all_nbr.append(product.indices[keep])
+    if not all_pos:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), self_hit
+    return np.concatenate(all_pos), np.concatenate(all_nbr), self_hit
+
+
+def _build(titles: list, threshold: float, vectorizer) -> dict:
+    """Fresh index of `titles` (the full computation, counted per distinct title)."""
+    vectorizer.fit(titles)
+    mult = Counter(titles)
+    unique = list(mult)
+    vectors = normalize(vectorizer.transform(unique)).tocsr()
+    m = np.fromiter(mult.values(), dtype=np.int64, count=len(unique))
+    ids = np.arange(len(unique))
+
+    pos, nbr, self_hit = _hits(vectors, ids, vectors, threshold)
+    counts = np.bincount(pos, weights=m[nbr], minlength=len(unique)).astype(np.int64)
+    return {
+        "version":     INDEX_VERSION,
+        "threshold":   threshold,
+        "vectorizer":  vectorizer,
+        "lookup":      {t: i for i, t in enumerate(unique)},
+        "vectors":     vectors,
+        "mult":        m,
+        "counts":      counts,
+        "self_hit":    self_hit,
+        "added_terms": 0,
+        "oov_terms":   0,
+    }
+
+
+def _term_counts(vectorizer, titles: list) -> tuple:
+    """(terms, out-of-vocabulary terms) of titles under the fitted vectorizer."""
+    analyze = vectorizer.build_analyzer()
+    vocab = vectorizer.vocabulary_
+    total = oov = 0
+    for title in titles:
+        terms = analyze(title)
+        total += len(terms)
+        oov += sum(1 for t in terms if t not in vocab)
+    return total, oov
+
+
+def _update(index: dict, titles: list) -> bool:
+    """
+    Bring `index` to the multiset `titles` in place. False when the added
+    titles push the vocabulary drift past DRIFT_THRESHOLD (index untouched).
+    """
+    lookup, threshold = index["lookup"], index["threshold"]
+    target = Counter(titles)
+
+    new_titles = [t for t in target if t not in lookup]
+    if new_titles:
+        total, oov = _term_counts(index["vectorizer"], new_titles)
+        added, missing = index["added_terms"] + total, index["oov_terms"] + oov
+        if added and missing / added > DRIFT_THRESHOLD:
+            return False
+        index["added_terms"], index["oov_terms"] = added, missing
+
+        first = len(lookup)
+        for i, t in enumerate(new_titles):
+            lookup[t] = first + i
+        new_vectors = normalize(index["vectorizer"].transform(new_titles)).tocsr()
+        index["vectors"]  = sp.vstack([index["vectors"], new_vectors], format="csr")
+        index["mult"]     = np.concatenate([index["mult"], np.zeros(len(new_titles), dtype=np.int64)])
+        index["counts"]   = np.concatenate([index["counts"], np.zeros(len(new_titles), dtype=np.int64)])
+        index["self_hit"] = np.concatenate([index["self_hit"], np.zeros(len(new_titles), dtype=bool)])
+
+    mult = index["mult"]
+    new_mult = np.zeros_like(mult)
+    for t, k in target.items():
+        new_mult[lookup[t]] = k
+    delta = new_mult - mult
+    changed = np.flatnonzero(delta)
+    if len(changed) == 0:
+        return True
+
+    is_new = np.zeros(len(mult), dtype=bool)
+    if new_titles:
+        is_new[len(mult) - len(new_titles):] = True
+
+    vectors = index["vectors"]
+    pos, nbr, self_hit = _hits(vectors[changed], changed, vectors, threshold)
+    src = changed[pos]
+    counts = index["counts"]
+
+    # old → new: every stored neighbour gains / loses the changed copies
+    old_nbr = ~is_new[nbr]
+    counts += np.bincount(nbr[old_nbr], weights=delta[src[old_nbr]],
+                          minlength=len(counts)).astype(np.int64)
+
+    # new → old: a new title counts all its neighbours from scratch
+    new_src = is_new[src]
+    fresh = np.bincount(src[new_src], weights=new_mult[nbr[new_src]],
+                        minlength=len(counts)).astype(np.int64)
+    counts[is_new] = fresh[is_new]
+    index["self_hit"][changed] = self_hit
+
+    index["mult"] = new_mult
+    _compact(index)
+    return True
+
+
+def _compact(index: dict) -> None:
+    """Drop the titles no longer present once they are the majority."""
+    live = index["mult"] > 0
+    if live.sum() * 2 >= len(live):
+        return
+    keep = np.flatnonzero(live)
+    remap = np.full(len(live), -1)
+    remap[keep] = np.arange(len(keep))
+    index["lookup"]   = {t: int(remap[i]) for t, i in index["lookup"].items() if live[i]}
+    index["vectors"]  = index["vectors"][keep]
+    index["mult"]     = index["mult"][keep]
+    index["counts"]   = index["counts"][keep]
+    index["self_hit"] = index["self_hit"][keep]
+
+
+# ── API ───────────────────────────────────────────────────────────────────────
+
+
+def title_similarity_counts(titles: list, similarity_threshold: float, vectorizer, source) -> np.ndarray:
+    """
+    _title_similarity_counts(titles, similarity_threshold) kept up to date
+    in the index of `source`. `vectorizer` is an unfitted TfidfVectorizer,
+    used when the index is (re)built.
+    """
+    path  = index_path(source)
+    index = _load(path, similarity_threshold)
+
+    if index is not None and _update(index, titles):
+        sys.stderr.write(f"  [SIM]   {Path(source).name}: incremental "
+                         f"(drift {index['oov_terms'] / max(index['added_terms'], 1):.1%})\n")
+    else:
+        index = _build(titles, similarity_threshold, vectorizer)
+        sys.stderr.write(f"  [SIM]   {Path(source).name}: index built ({len(index['lookup'])} titles)\n")
+    _save(path, index)
+
+    ids = np.fromiter((index["lookup"][t] for t in titles), dtype=np.int64, count=len(titles))
+    mult, self_hit = index["mult"][ids], index["self_hit"][ids]
+    return (index["counts"][ids] + (mult - 1) * self_hit).astype(int)
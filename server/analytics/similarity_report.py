@@ -0,0 +1,179 @@
+"""
+similarity_report.py
+====================
+Impact report of partitioned similar-bug counting versus the global mode.
+
+Partitioned mode (extract_criticality.SIMILARITY_PARTITION) compares titles
+only within equal values of some columns. It uses the same TF-IDF vectors as
+the global mode, so a row's partitioned title-similarity count is its global
+count minus its matches in other partitions — counts can only go down. This
+report scores every input both ways and shows what adopting a partition
+would change:
+
+    similar   rows whose capped similar_bug_count changes, mean count,
+              rows at the cap (MAX_SIMILAR_BUGS)
+    tiers     tier counts both ways, rows changing tier, tier transitions
+    severity  High / Medium / Low totals of the severity breakdown
+    time      scoring time both ways (partitioned with --jobs processes)
+
+Usage:
+  python server/analytics/similarity_report.py <module|folder|file>
+         --partition Module [--partition "Issue Type,Sub-Issue Type"]
+         [--jobs N] [--json]
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
+
+import input_manifest
+import json_io
+import schemas
+from extract_criticality import (
+    _build_severity_summary,
+    _partition_keys,
+    score_criticality_frame,
+)
+from what_if import _DIMENSIONS
+
+_TIERS = ['Severe', 'Moderate', 'Low']
+
+
+def _similar_counts(scored: dict) -> np.ndarray:
+    """Capped similar_bug_count per active row (from the 'similar' dimension)."""
+    names = list(_DIMENSIONS[scored['schema']])
+    cap = scored['sim_cfg']['max_similar_bugs']
+    return np.rint(scored['dimensions'][:, names.index('similar')] * cap).astype(int)
+
+
+def _scored(frame: pd.DataFrame, partition: list, jobs: int) -> tuple:
+    start = time.perf_counter()
+    scored = score_criticality_frame(frame, similarity_partition=partition, similarity_jobs=jobs)
+    return scored, time.perf_counter() - start
+
+
+def compare(frame: pd.DataFrame, partition: list, jobs: int = 1, baseline: tuple = None) -> dict:
+    """
+    Global vs partitioned scoring of one frame. `baseline` — a previous
+    (scored, seconds) global result of the same frame, to score it once
+    for several partitions.
+    """
+    glob, t_glob = baseline or _scored(frame, [], 1)
+    part, t_part = _scored(frame, partition, jobs)
+
+    g_sim, p_sim = _similar_counts(glob), _similar_counts(part)
+    cap = glob['sim_cfg']['max_similar_bugs']
+    g_tier = glob['active']['tier'].to_numpy(dtype=object)
+    p_tier = part['active']['tier'].to_numpy(dtype=object)
+
+    keys = _partition_keys(glob['active'], partition)
+    sizes = keys.value_counts() if keys is not None else pd.Series([len(g_tier)])
+
+    transitions = {
+        f"{a}→{b}": int(((g_tier == a) & (p_tier == b)).sum())
+        for a in _TIERS for b in _TIERS if a != b
+    }
+    g_sev = _build_severity_summary(glob['active'], glob['excluded'])
+    p_sev = _build_severity_summary(part['active'], part['excluded'])
+
+    return {
+        'partition':  partition,
+        'rows':       int(len(g_tier)),
+        'partitions': int(len(sizes)),
+        'largest':    int(sizes.max()) if len(sizes) else 0,
+        'similar': {
+            'rows_changed':     int((g_sim != p_sim).sum()),
+            'mean_global':      round(float(g_sim.mean()), 3) if len(g_sim) else 0.0,
+            'mean_partitioned': round(float(p_sim.mean()), 3) if len(p_sim) else 0.0,
+            'at_cap_global':      int((g_sim >= cap).sum()),
+            'at_cap_partitioned': int((p_sim >= cap).sum()),
+        },
+        'tiers': {
+            'global':       {t: int((g_tier == t).sum()) for t in _TIERS},
+            'partitioned':  {t: int((p_tier == t).sum()) for t in _TIERS},
+            'rows_changed': int((g_tier != p_tier).sum()),
+            'transitions':  {k: v for k, v in transitions.items() if v},
+        },
+        'severity': {
+            sev: {'global': g_sev[sev]['total'], 'partitioned': p_sev[sev]['total']}
+            for sev in ('High', 'Medium', 'Low')
+        },
+        'seconds': {'global': round(t_glob, 3), 'partitioned': round(t_part, 3)},
+    }
+
+
+def _inputs(arg: str) -> list:
+    path = Path(arg)
+    if path.is_file():
+        return [path]
+    return input_manifest.canonical_inputs(input_manifest._resolve_folder(arg))
+
+
+def _write(name: str, r: dict) -> None:
+    sim, tiers, sec = r['similar'], r['tiers'], r['seconds']
+    speedup = sec['global'] / sec['partitioned'] if sec['partitioned'] else float('inf')
+    sys.stderr.write(
+        f"\n{name}  partition={' + '.join(r['partition'])}\n"
+        f"  [PART]  {r['partitions']} partitions, largest {r['largest']} of {r['rows']} rows\n"
+        f"  [SIM]   {sim['rows_changed']} rows changed similar_bug_count "
+        f"(mean {sim['mean_global']} → {sim['mean_partitioned']}, "
+        f"at cap {sim['at_cap_global']} → {sim['at_cap_partitioned']})\n"
+        f"  [TIER]  {tiers['rows_changed']} rows changed tier  "
+        f"global {tiers['global']}  partitioned {tiers['partitioned']}\n"
+    )
+    if tiers['transitions']:
+        sys.stderr.write(f"          {tiers['transitions']}\n")
+    sev = '  '.join(f"{k} {v['global']}→{v['partitioned']}" for k, v in r['severity'].items())
+    sys.stderr.write(
+        f"  [SEV]   {sev}\n"
+        f"  [TIME]  global {sec['global']:.2f}s, partitioned {sec['partitioned']:.2f}s ({speedup:.1f}x)\n"
+    )
+
+
+def main(argv=None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare partitioned vs global similar-bug counting")
+    parser.add_argument("target", help="downloads/<module> folder, module name or workbook")
+    parser.add_argument("--partition", action="append", required=True,
+                        help='comma-separated partition columns, e.g. "Issue Type,Sub-Issue Type" (repeatable)')
+    parser.add_argument("--jobs", type=int, default=1, help="processes for partitioned scoring (0 → one per CPU)")
+    parser.add_argument("--json", action="store_true", help="write the report as JSON to stdout")
+    args = parser.parse_args(argv)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    partitions = [[c.strip() for c in p.split(',') if c.strip()] for p in args.partition]
+
+    report = {}
+    try:
+        paths = _inputs(args.target)
+    except OSError as e:
+        sys.stderr.write(f"ERROR: {e}\n")
+        return 1
+    for path in paths:
+        name = input_manifest.source_name(path)
+        frame = input_manifest.read_input(path)
+        if schemas.detect_schema(frame.columns) not in (schemas.SCHEMA1, schemas.SCHEMA2):
+            sys.stderr.write(f"  [SKIP]  {name} — not an issue-schema file\n")
+            continue
+        baseline = _scored(frame, [], 1)
+        report[name] = []
+        for partition in partitions:
+            r = compare(frame, partition, jobs, baseline=baseline)
+            report[name].append(r)
+            _write(name, r)
+
+    if args.json:
+        sys.stdout.write(json_io.dumps(report, ensure_ascii=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
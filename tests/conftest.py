@@ -0,0 +1,13 @@
+"""
+Shared pytest setup: the analytics and RAG modules import each other as
+top-level modules (each script inserts its own folder into sys.path), so
+the tests do the same.
+"""
+
+import os
+import sys
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _path in (os.path.join(_ROOT, "server", "analytics"), os.path.join(_ROOT, "RAG")):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
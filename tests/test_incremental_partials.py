@@ -0,0 +1,67 @@
+"""
+An incremental _process_folder() run (per-file partials reused, changed
+files re-scored and merged) writes the same analytics as a full --rebuild
+run over the same inputs.
+"""
+
+import shutil
+
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("openpyxl")
+
+import pandas_aggregator
+from bench_excel_reader import synthetic_frame
+
+ANALYTICS_FILES = ["analytics.json", "rows.ndjson", "rows.idx", "drill.json", "drill.bin"]
+
+
+def _write(folder, name, seed, first_code, n=150):
+    df = synthetic_frame("issue", n, seed=seed)
+    df["Case Code"] = [f"P{first_code + i}" for i in range(n)]   # no collisions across files
+    df.to_excel(folder / name, index=False)
+
+
+def _outputs(folder):
+    return {name: (folder / name).read_bytes() for name in ANALYTICS_FILES}
+
+
+def test_incremental_run_matches_full_rebuild(tmp_path, capsys):
+    inc = tmp_path / "inc"
+    inc.mkdir()
+    _write(inc, "a.xlsx", seed=1, first_code=100000)
+    _write(inc, "b.xlsx", seed=2, first_code=200000)
+    assert pandas_aggregator._process_folder(str(inc))
+
+    # change one input, add another: b's partial is reused
+    _write(inc, "a.xlsx", seed=3, first_code=100000, n=170)
+    _write(inc, "c.xlsx", seed=4, first_code=300000)
+    capsys.readouterr()
+    assert pandas_aggregator._process_folder(str(inc))
+    assert "1 reused, 2 new/changed" in capsys.readouterr().err
+
+    full = tmp_path / "full"
+    full.mkdir()
+    for name in ("a.xlsx", "b.xlsx", "c.xlsx"):
+        shutil.copy2(inc / name, full / name)
+    assert pandas_aggregator._process_folder(str(full), rebuild=True)
+
+    assert _outputs(inc) == _outputs(full)
+
+
+def test_removed_input_is_dropped_from_the_merge(tmp_path):
+    inc = tmp_path / "inc"
+    inc.mkdir()
+    for name, seed, code in (("a.xlsx", 1, 100000), ("b.xlsx", 2, 200000)):
+        _write(inc, name, seed=seed, first_code=code)
+    assert pandas_aggregator._process_folder(str(inc))
+    (inc / "b.xlsx").unlink()
+    assert pandas_aggregator._process_folder(str(inc))
+
+    full = tmp_path / "full"
+    full.mkdir()
+    shutil.copy2(inc / "a.xlsx", full / "a.xlsx")
+    assert pandas_aggregator._process_folder(str(full), rebuild=True)
+
+    assert _outputs(inc) == _outputs(full)
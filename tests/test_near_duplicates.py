@@ -0,0 +1,77 @@
+"""MinHash LSH near-duplicate clustering (RAG/near_duplicates.py)."""
+
+import random
+
+import pytest
+
+import near_duplicates
+from near_duplicates import find_near_duplicates
+
+BASE = [
+    "Camera app crashes when switching to night mode after the latest update",
+    "Battery drains overnight with wifi and bluetooth turned off",
+    "Display flickers at low brightness while scrolling in the browser",
+    "Bluetooth earbuds disconnect every few minutes during calls",
+    "Phone overheats while charging and playing games at the same time",
+]
+
+
+def _batch():
+    titles = list(BASE)
+    titles.append(BASE[0].upper() + "   ")             # exact duplicate after normalising
+    titles.append(BASE[1] + "!!")                       # near duplicate
+    titles.append(BASE[2].replace("scrolling", "scroling"))  # near duplicate (typo)
+    return titles
+
+
+def _invariants(result, n):
+    member_of = result["member_of"]
+    assert result["total_rows"] == n == len(member_of)
+    assert result["representatives"] == sorted(set(member_of))
+    assert result["total_clusters"] == len(result["representatives"])
+    for cluster in result["clusters"]:
+        assert cluster["representative"] == min(cluster["members"])
+        assert all(member_of[m] == cluster["representative"] for m in cluster["members"])
+
+
+def test_clusters_exact_and_near_duplicates():
+    titles = _batch()
+    result = find_near_duplicates(titles)
+    _invariants(result, len(titles))
+
+    member_of = result["member_of"]
+    assert member_of[5] == 0
+    assert member_of[6] == 1
+    assert member_of[7] == 2
+    # the distinct complaints stay apart
+    assert len({member_of[i] for i in range(len(BASE))}) == len(BASE)
+    assert result["total_clusters"] == len(BASE)
+
+
+def test_problem_text_separates_identical_titles():
+    titles = ["Camera crash"] * 2
+    problems = ["Crashes when opening the front camera in portrait mode on startup",
+                "Wifi drops after the device wakes from sleep and never reconnects"]
+    assert find_near_duplicates(titles, problems)["total_clusters"] == 2
+    assert find_near_duplicates(titles)["total_clusters"] == 1
+
+
+def test_chunking_does_not_change_clusters(monkeypatch):
+    rng = random.Random(3)
+    words = "camera battery wifi display crash drain lag flicker bluetooth update heat noise".split()
+    titles = [" ".join(rng.choice(words) for _ in range(rng.randint(4, 10))) for _ in range(300)]
+    titles += titles[:40]
+    expected = find_near_duplicates(titles)
+    monkeypatch.setattr(near_duplicates, "_CHUNK_SHINGLES", 50)
+    assert find_near_duplicates(titles) == expected
+    _invariants(expected, len(titles))
+
+
+def test_edge_inputs():
+    assert find_near_duplicates([])["total_clusters"] == 0
+    assert find_near_duplicates(["only one"])["member_of"] == [0]
+    # lone surrogates (e.g. from a badly decoded workbook) must not crash hashing
+    result = find_near_duplicates(["broken \ud83d title", "broken \ud83d title", "other"])
+    assert result["member_of"] == [0, 0, 2]
+    with pytest.raises(ValueError):
+        find_near_duplicates(["a", "b"], ["only one problem"])
@@ -0,0 +1,38 @@
+"""_title_similarity_counts() against the dense cosine_similarity() it replaced."""
+
+import numpy as np
+import pytest
+
+sklearn = pytest.importorskip("sklearn")
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+import extract_criticality
+from bench_excel_reader import synthetic_frame
+
+
+def _dense_counts(titles, threshold):
+    """The original implementation: full n × n matrix, zeroed diagonal."""
+    mat = TfidfVectorizer(stop_words='english', ngram_range=(1, 2), min_df=1).fit_transform(titles)
+    sim = cosine_similarity(mat)
+    np.fill_diagonal(sim, 0)
+    return (sim >= threshold).sum(axis=1)
+
+
+@pytest.fixture(scope="module")
+def titles():
+    titles = synthetic_frame("issue", 600, seed=7)["Title"].tolist()
+    # exact duplicates, a stop-word-only title and an empty one
+    return titles + titles[:25] + ["the and of", ""]
+
+
+@pytest.mark.parametrize("threshold", [0.0, 0.3, 0.5, 0.8, 1.0])
+def test_matches_dense_cosine(titles, threshold):
+    got = extract_criticality._title_similarity_counts(titles, threshold)
+    np.testing.assert_array_equal(got, _dense_counts(titles, threshold))
+
+
+def test_blocking_does_not_change_counts(titles, monkeypatch):
+    expected = extract_criticality._title_similarity_counts(titles, 0.5)
+    monkeypatch.setattr(extract_criticality, "SIMILARITY_BLOCK_CELLS", 7 * len(titles))
+    np.testing.assert_array_equal(extract_criticality._title_similarity_counts(titles, 0.5), expected)
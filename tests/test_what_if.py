@@ -0,0 +1,50 @@
+"""what_if.rescore() against a full extract_criticality_data() run."""
+
+import pytest
+
+pytest.importorskip("sklearn")
+
+import what_if
+from bench_excel_reader import synthetic_frame
+from extract_criticality import extract_criticality_data, score_criticality_frame
+
+SCHEMA1_WEIGHTS = {"priority": 0.5, "frequency": 0.1, "issue_type": 0.1, "status": 0.1, "similar": 0.2}
+SCHEMA2_WEIGHTS = {"severity": 1, "issue_type": 1, "sub_issue": 1, "resolve": 1, "similar": 1}
+
+CASES = [
+    ("schema1", None, None),
+    ("schema1", SCHEMA1_WEIGHTS, None),
+    ("schema1", None, {"Severe": 60, "Moderate": 30}),
+    ("schema2", None, None),
+    ("schema2", SCHEMA2_WEIGHTS, {"Severe": 90, "Moderate": 70}),
+]
+
+
+@pytest.fixture(scope="module")
+def frames():
+    schema1 = synthetic_frame("issue", 500, seed=11)
+    # no Priority / Occurr. Freq. but a Resolve column → schema 2
+    return {"schema1": schema1, "schema2": schema1.drop(columns=["Priority", "Occurr. Freq."])}
+
+
+@pytest.fixture(scope="module")
+def matrices(frames):
+    return {schema: what_if.build_matrix(score_criticality_frame(df.copy())) for schema, df in frames.items()}
+
+
+@pytest.mark.parametrize("schema,weights,thresholds", CASES)
+def test_rescore_matches_extract_criticality(frames, matrices, schema, weights, thresholds):
+    matrix = matrices[schema]
+    assert matrix["schema"] == schema
+
+    expected = extract_criticality_data(frames[schema].copy(), tier_thresholds=thresholds,
+                                        **{f"{schema}_weights": weights})
+    got = what_if.rescore(matrix, weights, thresholds, issues=True)
+
+    assert got["severity_breakdown"] == expected["severity_breakdown"]
+    assert got["total_scored"] == expected["active"]
+
+    def by_code(issues):
+        return sorted((i["Case Code"], i["criticality_score"], i["tier"]) for i in issues)
+
+    assert by_code(got["issues"]) == by_code(expected["issues"])